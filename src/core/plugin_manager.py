@@ -412,7 +412,9 @@ class PluginManager:
         end_date: str = None,
         end_time: str = None,
         progress_callback=None,
-        disable_local_filtering: bool = False  # Новый параметр
+        disable_local_filtering: bool = False,  # Новый параметр
+        incremental: bool = False,
+        queue_size: int = None
     ) -> dict:
         """
         Полная координация поиска: VKSearch → PostProcessor → Database → Export
@@ -425,12 +427,18 @@ class PluginManager:
             minus_words: Исключаемые слова
             start_date, start_time, end_date, end_time: Для фильтрации результатов
             progress_callback: Функция обратного вызова для прогресса
+            incremental: Дозагрузить только посты новее прошлого запуска с теми же запросами
+                и дописать их в ту же задачу
+            queue_size: Сколько пачек постов может ждать между этапами конвейера
+                (по умолчанию STREAM_QUEUE_SIZE)
 
         Returns:
-            {"filepath": str, "posts_count": int, "task_id": int}
+            {"filepath": str, "posts_count": int, "task_id": int, "elapsed_time": float, "pipeline": dict}
         """
         from datetime import datetime
 
+        from src.core.search_pipeline import SearchPipeline
+
         start_time_all = time.time()
         logger = self.get_logger()
 
@@ -462,43 +470,27 @@ class PluginManager:
 
             logger.info(f"Доступно токенов: {len(all_tokens)}")
 
-            # 3. Выполняем поиск через VKSearchPlugin
+            # 3. Создаём задачу в базе данных до поиска, чтобы сохранять посты по мере поступления
             if progress_callback:
-                progress_callback("Выполняется поиск в VK...", 10)
-
-            search_results = await vk_plugin.mass_search_with_tokens(
-                queries=api_keywords,
-                start_date=start_ts,
-                end_date=end_ts,
-                exact_match=exact_match,
-                minus_words=minus_words or [],
-                tokens=all_tokens
-            )
+                progress_callback("Создание задачи в базе данных...", 5)
 
-            logger.info(f"Найдено {len(search_results)} постов через VKSearchPlugin")
-
-            # 4. Создаём задачу в базе данных
-            if progress_callback:
-                progress_callback("Создание задачи в базе данных...", 30)
-
-            task_params = {
-                "keywords": keywords,
-                "start_date": start_date,
-                "start_time": start_time,
-                "end_date": end_date,
-                "end_time": end_time,
-                "exact_match": exact_match,
-                "minus_words": minus_words or []
-            }
+            task_id = None
+            since = {}
+            if incremental:
+                task_id = database_plugin.find_incremental_task(keywords, exact_match, minus_words or [])
+                if task_id is not None:
+                    since = database_plugin.get_keyword_watermarks(task_id)
+                    logger.info(f"♻️ Инкрементальный поиск: дописываем задачу {task_id}, отметок: {len(since)}")
 
-            task_id = database_plugin.create_task(
-                task_name=f"Поиск: {', '.join(keywords[:3])}{'...' if len(keywords) > 3 else ''} [{datetime.now().strftime('%d.%m.%Y %H:%M:%S')}]",
-                keywords=keywords,
-                start_date=start_date,
-                end_date=end_date,
-                exact_match=exact_match,
-                minus_words=minus_words or []
-            )
+            if task_id is None:
+                task_id = database_plugin.create_task(
+                    task_name=f"Поиск: {', '.join(keywords[:3])}{'...' if len(keywords) > 3 else ''} [{datetime.now().strftime('%d.%m.%Y %H:%M:%S')}]",
+                    keywords=keywords,
+                    start_date=start_date,
+                    end_date=end_date,
+                    exact_match=exact_match,
+                    minus_words=minus_words or []
+                )
 
             if task_id is None:
                 logger.error("Не удалось создать задачу в базе данных")
@@ -508,72 +500,101 @@ class PluginManager:
                     "success": False,
                     "error": "Не удалось создать задачу в базе данных",
                     "task_id": None,
-                    "posts_count": len(search_results) if search_results else 0,
+                    "posts_count": 0,
                     "filepath": None,
-                    "execution_time": time.time() - start_time
+                    "execution_time": time.time() - start_time_all
                 }
 
-            # 5. Сохраняем сырые результаты
+            # 4. Потоковый конвейер: страницы VK → постобработка → база данных → CSV.
+            # Этапы связаны ограниченными очередями, поэтому посты сохраняются
+            # по мере поступления, а память не растёт с объёмом результатов
             if progress_callback:
-                progress_callback("Сохранение результатов поиска...", 50)
-
-            if search_results:
-                database_plugin.save_posts(task_id, search_results)
-                logger.info(f"Сохранено {len(search_results)} постов для задачи {task_id}")
-
-            # Постобработка (если включена локальная фильтрация)
-            if not disable_local_filtering and post_processor and search_results:
-                logger.info(f"🔄 Запуск постобработки для {len(search_results)} постов...")
-
-                processed_results = await post_processor.process_posts(
-                    search_results,
-                    keywords,
-                    remove_duplicates=False,  # Дедупликацию уже провели в VKSearch
-                    clean_text=True,
-                    filter_keywords=True
-                )
+                progress_callback("Выполняется поиск в VK...", 10)
 
-                if isinstance(processed_results, dict):
-                    final_posts = processed_results.get('final_posts', search_results)
-                    logger.info(f"Постобработка: {len(search_results)} → {len(final_posts)} постов")
-                else:
-                    final_posts = processed_results
-                    logger.info(f"Постобработка: {len(search_results)} → {len(final_posts)} постов")
+            # Строгую фильтрацию по ключам уже выполнил VKSearchPlugin;
+            # постобработка дополнительно отсеивает посты с минус-словами
+            post_pipeline = None
+            if not disable_local_filtering and post_processor:
+                post_pipeline = post_processor.build_pipeline(
+                    ["minus_words"], keywords, exact_match, minus_words=minus_words or []
+                )
             elif disable_local_filtering:
-                logger.info(f"🚫 Локальная фильтрация отключена. Используем только VK API + строгую фильтрацию: {len(search_results)} постов")
-                final_posts = search_results
-            else:
-                logger.warning("PostProcessorPlugin недоступен")
-                final_posts = search_results
+                logger.info("🚫 Локальная фильтрация отключена. Используем только VK API + строгую фильтрацию")
+
+            data_dir = Path(database_plugin.config.get("data_dir", "data/results"))
+            data_dir.mkdir(parents=True, exist_ok=True)
+            filepath = str(data_dir / f"search_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv")
+
+            stream = SearchPipeline(
+                database_plugin,
+                post_pipeline=post_pipeline,
+                csv_path=filepath,
+                queue_size=queue_size,
+                progress_callback=progress_callback,
+            )
+            watermarks = {} if incremental else None
+            stream_stats = await stream.run(
+                vk_plugin.iter_search(
+                    queries=api_keywords,
+                    start_date=start_ts,
+                    end_date=end_ts,
+                    exact_match=exact_match,
+                    minus_words=minus_words or [],
+                    tokens=all_tokens,
+                    since=since,
+                    watermarks=watermarks
+                ),
+                task_id,
+            )
 
-            # 7. Экспорт результатов в CSV
+            page_stats = getattr(vk_plugin, "last_search_stats", {})
+            if page_stats.get("pages_failed") and not page_stats.get("pages_loaded"):
+                raise RuntimeError(
+                    f"VK API не вернул ни одной страницы ({page_stats['pages_failed']} ошибок): "
+                    f"проверьте токены и доступность API"
+                )
+
+            posts_count = stream_stats["posts_saved"]
+            logger.info(
+                f"Найдено {stream_stats['posts_received']} постов, сохранено {posts_count} для задачи {task_id}"
+            )
+            if post_pipeline is not None and post_pipeline.stages:
+                logger.info(
+                    f"Постобработка: {stream_stats['posts_received']} → {stream_stats['posts_processed']} постов"
+                )
+            if stream_stats["time_to_first_post"] is not None:
+                logger.info(f"Первые посты сохранены через {stream_stats['time_to_first_post']:.1f}с")
+
+            if watermarks:
+                database_plugin.update_keyword_watermarks(task_id, watermarks)
+
+            # 5. CSV уже записан потоком; дописанной инкрементальной задаче нужна полная выгрузка
             if progress_callback:
                 progress_callback("Экспорт результатов...", 90)
 
-            filename = f"search_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-            filepath = None
-
-            if processed_results:
-                try:
-                    filepath = database_plugin.export_task_to_csv(task_id, filename)
-                    logger.info(f"Результаты экспортированы в {filepath}")
-                except Exception as e:
-                    logger.error(f"Ошибка экспорта: {e}")
+            if since:
+                if not database_plugin.export_task_to_csv(task_id, filepath):
+                    filepath = None
+            elif not stream.csv_written:
+                filepath = None
+            if filepath:
+                logger.info(f"Результаты экспортированы в {filepath}")
 
-            # 8. Завершение
+            # 6. Завершение
             elapsed = time.time() - start_time_all
             database_plugin.update_task_status(task_id, "completed")
 
             if progress_callback:
-                progress_callback(f"Поиск завершён! Найдено {len(processed_results)} постов", 100)
+                progress_callback(f"Поиск завершён! Найдено {posts_count} постов", 100)
 
             logger.info(f"✅ Полный поиск завершён за {elapsed:.1f}с. Задача: {task_id}")
 
             return {
                 "filepath": filepath,
-                "posts_count": len(processed_results),
+                "posts_count": posts_count,
                 "task_id": task_id,
-                "elapsed_time": elapsed
+                "elapsed_time": elapsed,
+                "pipeline": stream_stats,
             }
 
         except Exception as e:
@@ -0,0 +1,152 @@
+"""
+Потоковый конвейер поиска: VK → постобработка → база данных → CSV
+
+Пачки постов идут между этапами через ограниченные очереди asyncio.
+Каждый этап забирает следующую пачку, как только передал предыдущую, поэтому
+первые посты попадают в базу и в CSV через секунды после начала поиска.
+Если запись отстаёт, очереди заполняются и загрузка страниц из VK
+приостанавливается (обратное давление), так что память ограничена пачками
+в очередях, а не объёмом результатов.
+"""
+
+import asyncio
+import contextlib
+import csv
+import time
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from src.plugins.database.database_plugin import CSV_COLUMNS
+
+# Сколько пачек может ждать в каждой очереди между этапами
+STREAM_QUEUE_SIZE = 4
+
+
+class SearchPipeline:
+    """
+    Три этапа, связанные очередями: загрузка → обработка → запись
+
+    post_pipeline - PostPipeline постобработки (или None); выполняется в потоке,
+    чтобы не блокировать цикл событий. Запись сохраняет пачку в базу и
+    дописывает её строки в CSV-файл csv_path (файл создаётся при первой строке).
+    """
+
+    def __init__(
+        self,
+        database_plugin,
+        post_pipeline=None,
+        csv_path: Optional[str] = None,
+        queue_size: int = None,
+        progress_callback: Callable[[str, int], Any] = None,
+    ):
+        self.database_plugin = database_plugin
+        self.post_pipeline = post_pipeline
+        self.csv_path = csv_path
+        self.queue_size = queue_size or STREAM_QUEUE_SIZE
+        self.progress_callback = progress_callback
+
+        self._csv_file = None
+        self._csv_writer = None
+        self.stats = {
+            "batches": 0,
+            "posts_received": 0,
+            "posts_processed": 0,
+            "posts_saved": 0,
+            "csv_rows": 0,
+            "time_to_first_post": None,
+            "peak_process_queue": 0,
+            "peak_write_queue": 0,
+            "elapsed_time": 0.0,
+        }
+
+    async def run(self, batches: AsyncIterator[List[Dict[str, Any]]], task_id: int) -> Dict[str, Any]:
+        """
+        Прогоняет поток пачек через все этапы до конца
+
+        Ошибка любого этапа отменяет остальные и пробрасывается наружу.
+
+        Returns:
+            Статистика конвейера (self.stats)
+        """
+        started = time.time()
+        finished = object()
+        process_queue = asyncio.Queue(maxsize=self.queue_size)
+        write_queue = asyncio.Queue(maxsize=self.queue_size)
+
+        async def fetch():
+            try:
+                async for batch in batches:
+                    self.stats["batches"] += 1
+                    self.stats["posts_received"] += len(batch)
+                    await process_queue.put(batch)
+                    self.stats["peak_process_queue"] = max(self.stats["peak_process_queue"], process_queue.qsize())
+            finally:
+                if hasattr(batches, "aclose"):
+                    await batches.aclose()
+            await process_queue.put(finished)
+
+        async def process():
+            while True:
+                batch = await process_queue.get()
+                if batch is finished:
+                    break
+                if self.post_pipeline is not None:
+                    batch = await asyncio.to_thread(self.post_pipeline.run, batch)
+                if batch:
+                    self.stats["posts_processed"] += len(batch)
+                    await write_queue.put(batch)
+                    self.stats["peak_write_queue"] = max(self.stats["peak_write_queue"], write_queue.qsize())
+            await write_queue.put(finished)
+
+        async def write():
+            while True:
+                batch = await write_queue.get()
+                if batch is finished:
+                    break
+                await asyncio.to_thread(self._write_batch, task_id, batch)
+                if self.stats["time_to_first_post"] is None and self.stats["posts_saved"]:
+                    self.stats["time_to_first_post"] = time.time() - started
+                if self.progress_callback:
+                    self.progress_callback(f"Найдено и сохранено {self.stats['posts_saved']} постов...", 30)
+
+        tasks = [asyncio.ensure_future(stage()) for stage in (fetch, process, write)]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await asyncio.gather(*tasks, return_exceptions=True)
+            self._close_csv()
+            self.stats["elapsed_time"] = time.time() - started
+
+        return self.stats
+
+    def _write_batch(self, task_id: int, batch: List[Dict[str, Any]]) -> None:
+        """Сохраняет пачку в базу и дописывает её в CSV (выполняется в потоке)"""
+        self.stats["posts_saved"] += self.database_plugin.save_posts(task_id, batch)
+
+        if self.csv_path is None:
+            return
+        # В базу попадают только посты с текстом - в CSV те же
+        rows = [self.database_plugin.post_to_csv_row(post) for post in batch if post.get("text")]
+        if not rows:
+            return
+        if self._csv_writer is None:
+            self._csv_file = open(self.csv_path, "w", newline="", encoding="utf-8")
+            self._csv_writer = csv.DictWriter(self._csv_file, fieldnames=CSV_COLUMNS, lineterminator="\n")
+            self._csv_writer.writeheader()
+        self._csv_writer.writerows(rows)
+        self._csv_file.flush()
+        self.stats["csv_rows"] += len(rows)
+
+    def _close_csv(self) -> None:
+        if self._csv_file is not None:
+            self._csv_file.close()
+        self._csv_file = None
+        self._csv_writer = None
+
+    @property
+    def csv_written(self) -> bool:
+        """Записана ли в CSV хотя бы одна строка"""
+        return self.stats["csv_rows"] > 0
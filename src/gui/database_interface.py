@@ -386,9 +386,8 @@ class DatabaseInterface:
         if result:
             try:
                 # Удаляем задачу (посты удалятся автоматически из-за CASCADE)
-                cursor = self.database_plugin.connection.cursor()
-                cursor.execute("DELETE FROM tasks WHERE id = ?", (self.current_task_id,))
-                self.database_plugin.connection.commit()
+                with self.database_plugin.write_connection() as conn:
+                    conn.execute("DELETE FROM tasks WHERE id = ?", (self.current_task_id,))
 
                 messagebox.showinfo("Успех", "Задача удалена")
                 self.current_task_id = None
@@ -105,6 +105,7 @@ class MainInterface:
         tools_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="Инструменты", menu=tools_menu)
         tools_menu.add_command(label="Статистика БД", command=self.show_database_stats)
+        tools_menu.add_command(label="Сверить итоги задач", command=self.reconcile_task_statistics)
         tools_menu.add_command(label="Статус плагинов", command=self.show_plugin_status)
         tools_menu.add_command(label="Очистить БД", command=self.clear_database)
 
@@ -242,6 +243,27 @@ class MainInterface:
         except Exception as e:
             messagebox.showerror("Ошибка", f"Не удалось получить статистику: {e}")
 
+    def reconcile_task_statistics(self):
+        """Сверить итоги задач с постами и исправить расхождения"""
+        if not self.database_plugin:
+            messagebox.showwarning("Внимание", "База данных недоступна")
+            return
+
+        try:
+            result = self.database_plugin.reconcile_task_statistics()
+            if result["fixed"]:
+                fixed = ", ".join(str(task_id) for task_id in result["fixed"])
+                text = f"Проверено задач: {result['checked']}\nИсправлены итоги задач: {fixed}"
+            else:
+                text = f"Проверено задач: {result['checked']}\nРасхождений нет"
+            messagebox.showinfo("Сверка итогов", text)
+
+            if hasattr(self, "db_interface"):
+                self.db_interface.load_tasks()
+
+        except Exception as e:
+            messagebox.showerror("Ошибка", f"Не удалось сверить итоги: {e}")
+
     def show_plugin_status(self):
         """Показать статус плагинов"""
         if not hasattr(self, "plugin_manager"):
@@ -279,11 +301,10 @@ class MainInterface:
 
         if result:
             try:
-                cursor = self.database_plugin.connection.cursor()
-                cursor.execute("DELETE FROM posts")
-                cursor.execute("DELETE FROM tasks")
-                cursor.execute("DELETE FROM task_metadata")
-                self.database_plugin.connection.commit()
+                with self.database_plugin.write_connection() as conn:
+                    conn.execute("DELETE FROM posts")
+                    conn.execute("DELETE FROM tasks")
+                    conn.execute("DELETE FROM task_metadata")
 
                 messagebox.showinfo("Успех", "База данных очищена")
 
@@ -1,4 +1,3 @@
-import asyncio
 import csv
 import json
 import os
@@ -10,7 +9,7 @@ from tkinter import filedialog, messagebox, ttk
 
 import pandas as pd
 
-from src.plugins.token_manager.token_limiter import TokenLimiter
+from src.plugins.token_manager.token_limiter import get_token_limiter
 from src.plugins.vk_search.vk_time_utils import to_vk_timestamp
 
 # Удалены прямые импорты плагинов - теперь получаем через PluginManager:
@@ -78,7 +77,9 @@ class VKParserInterface:
         if not self.token_manager:
             raise RuntimeError("TokenManagerPlugin не инициализирован через PluginManager")
 
-        self.token_limiter = TokenLimiter(self.token_manager.list_vk_tokens(), cooldown_seconds=60)
+        # Общий для процесса лимитер: его же используют поиски во всех потоках
+        self.token_limiter = get_token_limiter()
+        self.token_limiter.add_tokens(self.token_manager.list_vk_tokens())
 
         # Инициализируем VKSearchPlugin через PluginManager
         self.vk_search_plugin = self.plugin_manager.get_plugin("vk_search")
@@ -749,19 +750,16 @@ class VKParserInterface:
         """
         Упрощённый thread-safe поиск через новую архитектуру PluginManager
         """
-        import asyncio
-
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-
         try:
             # Callback для обновления прогресса из другого потока
             def update_progress(message: str, progress: int):
                 # Thread-safe обновление UI через after()
                 self.parent_frame.after(0, lambda: self._update_ui_progress(message, progress))
 
-            # Используем новую архитектуру PluginManager
-            result = loop.run_until_complete(
+            # Поиск выполняется в долгоживущем loop VK-плагина,
+            # чтобы пул соединений переиспользовался между запусками
+            vk_plugin = self.plugin_manager.get_plugin("vk_search")
+            result = vk_plugin.session_manager.run(
                 self.plugin_manager.coordinate_full_search(
                     keywords=keywords,
                     api_keywords=api_keywords,
@@ -786,7 +784,6 @@ class VKParserInterface:
             self.parent_frame.after(0, lambda: self._handle_search_error(error_msg))
 
         finally:
-            loop.close()
             # Thread-safe сброс UI
             self.parent_frame.after(0, self._reset_search_ui)
 
@@ -0,0 +1,145 @@
+"""
+Соединения с базой данных SQLite: читатели по потокам и один писатель
+
+Каждый поток читает через собственное соединение (создаётся при первом
+обращении и переиспользуется), все записи идут через единственное
+соединение-писатель под блокировкой. В режиме WAL чтения не ждут записи, а
+запись не ждёт чтений, поэтому GUI может читать, пока фоновая задача
+сохраняет посты. Настройки (PRAGMA) и пользовательские SQL-функции
+применяются один раз при открытии соединения, а не на каждый вызов.
+"""
+
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from loguru import logger
+
+
+class ConnectionManager:
+    """
+    Читатели по потокам и сериализованный писатель для одного файла БД
+
+    reader() - соединение текущего потока для SELECT; транзакцию чтения оно не
+    держит, поэтому каждый запрос видит последние зафиксированные данные.
+    writer() - контекстный менеджер записи: фиксирует транзакцию при выходе и
+    откатывает при исключении. Повторный вход из того же потока возвращает
+    то же соединение, фиксация выполняется только на внешнем уровне.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        pragmas: Optional[Dict[str, Any]] = None,
+        functions: Optional[Dict[str, Callable[[Any], Any]]] = None,
+    ):
+        self.db_path = db_path
+        self.pragmas = dict(pragmas or {})
+        # Детерминированные SQL-функции одного аргумента: имя -> функция
+        self.functions = dict(functions or {})
+
+        self._local = threading.local()
+        # ident потока -> (поток, соединение); соединения завершившихся потоков закрываются
+        self._readers: Dict[int, Tuple[threading.Thread, sqlite3.Connection]] = {}
+        self._readers_lock = threading.Lock()
+
+        self._writer: Optional[sqlite3.Connection] = None
+        self._write_lock = threading.RLock()
+        self._write_depth = 0
+        self._closed = False
+
+        self.stats = {
+            "connections_opened": 0,
+            "readers_closed": 0,
+            "write_transactions": 0,
+            "write_rollbacks": 0,
+            "write_wait_time": 0.0,
+        }
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._closed:
+            raise sqlite3.ProgrammingError("ConnectionManager закрыт")
+
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row  # Для доступа по именам колонок
+        for name, value in self.pragmas.items():
+            try:
+                conn.execute(f"PRAGMA {name}={value}")
+            except sqlite3.Error as e:
+                logger.warning(f"PRAGMA {name}={value} не применена: {e}")
+        for name, function in self.functions.items():
+            conn.create_function(name, 1, function, deterministic=True)
+        self.stats["connections_opened"] += 1
+        return conn
+
+    def reader(self) -> sqlite3.Connection:
+        """Соединение для чтения, закреплённое за текущим потоком"""
+        conn = getattr(self._local, "connection", None)
+        if conn is not None:
+            return conn
+
+        conn = self._connect()
+        with self._readers_lock:
+            self._close_finished_readers()
+            self._readers[threading.get_ident()] = (threading.current_thread(), conn)
+        self._local.connection = conn
+        return conn
+
+    def _close_finished_readers(self) -> None:
+        for ident, (thread, conn) in list(self._readers.items()):
+            if not thread.is_alive():
+                conn.close()
+                del self._readers[ident]
+                self.stats["readers_closed"] += 1
+
+    @contextmanager
+    def writer(self) -> Iterator[sqlite3.Connection]:
+        """Единственное соединение для записи; транзакция фиксируется на выходе"""
+        started = time.perf_counter()
+        with self._write_lock:
+            self.stats["write_wait_time"] += time.perf_counter() - started
+            if self._writer is None:
+                self._writer = self._connect()
+
+            conn = self._writer
+            self._write_depth += 1
+            try:
+                yield conn
+            except BaseException:
+                self._write_depth -= 1
+                if self._write_depth == 0:
+                    conn.rollback()
+                    self.stats["write_rollbacks"] += 1
+                raise
+            else:
+                self._write_depth -= 1
+                if self._write_depth == 0:
+                    conn.commit()
+                    self.stats["write_transactions"] += 1
+
+    def close(self) -> None:
+        """Закрывает писатель и соединения всех потоков"""
+        with self._write_lock:
+            self._closed = True
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+        with self._readers_lock:
+            for _, conn in self._readers.values():
+                conn.close()
+            self._readers.clear()
+        self._local = threading.local()
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Счётчики соединений и транзакций записи"""
+        with self._readers_lock:
+            readers = len(self._readers)
+        return {
+            **self.stats,
+            "write_wait_time": round(self.stats["write_wait_time"], 4),
+            "open_readers": readers,
+            "writer_open": self._writer is not None,
+        }
@@ -7,14 +7,164 @@ import hashlib
 import json
 import os
 import sqlite3
+import time
 from datetime import datetime
+from itertools import groupby, islice
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional
 
 import pandas as pd
 
 from src.core.event_system import EventType
 from src.plugins.base_plugin import BasePlugin
+from src.plugins.database.connection_manager import ConnectionManager
+from src.plugins.database.post_search import (
+    SEARCH_FUNCTIONS,
+    SEARCH_INDEX_VERSION,
+    SEARCH_TABLE_SQL,
+    SEARCH_TRIGGERS,
+    build_search_condition,
+    has_unindexed_posts,
+    index_posts,
+    sync_search_index,
+)
+
+# Префикс ключей task_metadata с отметками инкрементального поиска
+WATERMARK_PREFIX = "watermark:"
+
+# Колонки CSV-выгрузки результатов (в порядке столбцов файла)
+CSV_COLUMNS = (
+    "link",
+    "text",
+    "type",
+    "author",
+    "author_link",
+    "date",
+    "likes",
+    "comments",
+    "reposts",
+    "views",
+    "keywords_matched",
+)
+
+
+# Вставка поста; дубликаты по (task_id, link_hash) пропускаются
+INSERT_POST_SQL = """
+    INSERT OR IGNORE INTO posts
+    (task_id, vk_id, link, link_hash, text, text_hash, date,
+     likes, comments, reposts, views, keywords_matched)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Вставка с обновлением существующего поста (update_task_posts). ON CONFLICT вместо
+# INSERT OR REPLACE: замена удаляет строку без срабатывания триггеров удаления
+UPSERT_POST_SQL = INSERT_POST_SQL.replace("INSERT OR IGNORE", "INSERT") + """
+    ON CONFLICT(task_id, link_hash) DO UPDATE SET
+        vk_id = excluded.vk_id, link = excluded.link, text = excluded.text,
+        text_hash = excluded.text_hash, date = excluded.date, likes = excluded.likes,
+        comments = excluded.comments, reposts = excluded.reposts, views = excluded.views,
+        keywords_matched = excluded.keywords_matched
+"""
+
+# Итоги задачи (tasks.total_*) ведутся по мере записи в posts. Вставка добавляет
+# итоги новых строк одним запросом (ADD_INSERTED_TOTALS_SQL): триггер на каждую
+# вставленную строку замедлял пакетное сохранение в полтора раза. Изменение и
+# удаление постов учитывают триггеры
+# Колонка tasks -> вклад одной строки posts ({row} - OLD или NEW)
+_POST_TOTAL_COLUMNS = {
+    "total_posts": "1",
+    "total_likes": "IFNULL({row}.likes, 0)",
+    "total_comments": "IFNULL({row}.comments, 0)",
+    "total_reposts": "IFNULL({row}.reposts, 0)",
+    "total_views": "IFNULL({row}.views, 0)",
+    "total_SI": "(IFNULL({row}.likes, 0) + IFNULL({row}.comments, 0) + IFNULL({row}.reposts, 0))",
+}
+
+
+def _post_totals_sql(sign: str, row: str) -> str:
+    """UPDATE итогов задачи строки row ("OLD"/"NEW"): вклад строки прибавляется (sign="+") или вычитается ("-")"""
+    assignments = ",\n        ".join(
+        f"{column} = {column} {sign} {value.format(row=row)}" for column, value in _POST_TOTAL_COLUMNS.items()
+    )
+    return f"""
+    UPDATE tasks SET
+        {assignments}
+    WHERE id = {row}.task_id;
+"""
+
+
+_SUBTRACT_POST_TOTALS = _post_totals_sql("-", "OLD")
+_ADD_POST_TOTALS = _post_totals_sql("+", "NEW")
+TASK_STATISTICS_TRIGGERS = {
+    "trg_posts_totals_delete": f"AFTER DELETE ON posts BEGIN {_SUBTRACT_POST_TOTALS} END",
+    "trg_posts_totals_update": (
+        "AFTER UPDATE OF task_id, likes, comments, reposts, views ON posts "
+        f"BEGIN {_SUBTRACT_POST_TOTALS} {_ADD_POST_TOTALS} END"
+    ),
+}
+
+# Добавляет к итогам задач посты с id больше заданного. id - AUTOINCREMENT, а писатель
+# один, поэтому это ровно строки, вставленные в текущей транзакции после замера id
+ADD_INSERTED_TOTALS_SQL = """
+    UPDATE tasks SET
+        total_posts = total_posts + d.posts,
+        total_likes = total_likes + d.likes,
+        total_comments = total_comments + d.comments,
+        total_reposts = total_reposts + d.reposts,
+        total_views = total_views + d.views,
+        total_SI = total_SI + d.likes + d.comments + d.reposts
+    FROM (
+        SELECT
+            task_id,
+            COUNT(*) AS posts,
+            IFNULL(SUM(likes), 0) AS likes,
+            IFNULL(SUM(comments), 0) AS comments,
+            IFNULL(SUM(reposts), 0) AS reposts,
+            IFNULL(SUM(views), 0) AS views
+        FROM posts NOT INDEXED  -- диапазон по id, а не полный обход индекса ради GROUP BY
+        WHERE id > ?
+        GROUP BY task_id
+    ) AS d
+    WHERE tasks.id = d.task_id
+"""
+
+# Итоги задач, пересчитанные по постам (reconcile_task_statistics)
+TASK_TOTALS_SQL = """
+    SELECT
+        t.id AS task_id,
+        t.total_posts, t.total_likes, t.total_comments, t.total_reposts, t.total_views, t.total_SI,
+        COUNT(p.id) AS posts,
+        IFNULL(SUM(p.likes), 0) AS likes,
+        IFNULL(SUM(p.comments), 0) AS comments,
+        IFNULL(SUM(p.reposts), 0) AS reposts,
+        IFNULL(SUM(p.views), 0) AS views
+    FROM tasks t LEFT JOIN posts p ON p.task_id = t.id
+    {where}
+    GROUP BY t.id
+"""
+
+# Настройки SQLite по умолчанию для каждого соединения
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -65536,  # 64 МБ
+    "mmap_size": 268435456,  # 256 МБ
+    "temp_store": "MEMORY",
+    "busy_timeout": 5000,
+}
+
+
+def _chunks(rows: Iterable[tuple], size: int) -> Iterator[List[tuple]]:
+    iterator = iter(rows)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _metric_count(value: Any) -> int:
+    """Счётчик из ответа VK ({"count": N}) или уже сохранённое число"""
+    if isinstance(value, dict):
+        return value.get("count", 0)
+    return value or 0
 
 
 class DatabasePlugin(BasePlugin):
@@ -33,12 +183,15 @@ class DatabasePlugin(BasePlugin):
             "auto_save": True,
             "max_file_size": "100MB",
             "db_path": "data/parser_results.db",
+            "sqlite_pragmas": dict(DEFAULT_PRAGMAS),
+            "insert_chunk_size": 10_000,
         }
 
         self.data_dir = self.config["data_dir"]
         self.db_path = self.config["db_path"]
-        self.connection = None
+        self.connections: Optional[ConnectionManager] = None
         self.filter_plugin = None
+        self.last_save_stats: Dict[str, Any] = {}
 
     def initialize(self) -> None:
         """Инициализация плагина"""
@@ -60,32 +213,44 @@ class DatabasePlugin(BasePlugin):
     def _init_database(self):
         """Инициализация базы данных"""
         try:
-            # Создаем подключение к БД с thread safety
-            self.connection = sqlite3.connect(self.db_path, check_same_thread=False)
-            self.connection.row_factory = sqlite3.Row  # Для доступа по именам колонок
+            if self.connections is not None:
+                self.connections.close()
+                self.connections = None
 
             # Создаем таблицы
-            self._create_tables()
+            with self.write_connection() as conn:
+                self._create_tables(conn)
 
             self.log_info("База данных инициализирована")
 
         except Exception as e:
             self.log_error(f"Ошибка инициализации БД: {e}")
 
-    def _get_connection(self):
-        """Получить безопасное соединение для текущего потока"""
-        try:
-            # Создаем новое соединение для каждого потока
-            conn = sqlite3.connect(self.db_path, check_same_thread=False)
-            conn.row_factory = sqlite3.Row
-            return conn
-        except Exception as e:
-            self.log_error(f"Ошибка создания соединения: {e}")
-            return self.connection  # Fallback
+    def _connection_manager(self) -> ConnectionManager:
+        """Читатели по потокам и один писатель; sqlite_pragmas и функции поиска применяются при открытии соединения"""
+        if self.connections is None:
+            self.connections = ConnectionManager(
+                self.db_path, self.config.get("sqlite_pragmas", DEFAULT_PRAGMAS), SEARCH_FUNCTIONS
+            )
+        return self.connections
 
-    def _create_tables(self):
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """
+        Соединение для чтения, закреплённое за текущим потоком
+
+        Для записи используйте write_connection(): она сериализует писателей и
+        фиксирует транзакцию.
+        """
+        return self._connection_manager().reader()
+
+    def write_connection(self):
+        """Контекстный менеджер единственного соединения для записи (commit на выходе, rollback при ошибке)"""
+        return self._connection_manager().writer()
+
+    def _create_tables(self, conn: sqlite3.Connection):
         """Создание таблиц в базе данных"""
-        cursor = self.connection.cursor()
+        cursor = conn.cursor()
 
         # Таблица задач
         cursor.execute(
@@ -150,32 +315,66 @@ class DatabasePlugin(BasePlugin):
         )
 
         # Создаем индексы для оптимизации производительности
-        self._create_indexes()
+        self._create_indexes(conn)
+        self._create_statistics_triggers(conn)
+        self._create_search_index(conn)
 
-        self.connection.commit()
         self.log_info("Таблицы и индексы созданы")
 
-    def _create_indexes(self):
+    def _create_statistics_triggers(self, conn: sqlite3.Connection):
+        """Триггеры итогов задач; в базе без них итоги один раз сверяются с постами"""
+        existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")}
+        missing = [name for name in TASK_STATISTICS_TRIGGERS if name not in existing]
+        for name in missing:
+            conn.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {TASK_STATISTICS_TRIGGERS[name]}")
+
+        if missing:
+            self.reconcile_task_statistics()
+
+    def _create_search_index(self, conn: sqlite3.Connection):
+        """Полнотекстовый индекс posts_fts; в существующей базе или при смене формата он строится по всем постам"""
+        exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'posts_fts'").fetchone()
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if not exists:
+            conn.execute(SEARCH_TABLE_SQL)
+        elif version < SEARCH_INDEX_VERSION:
+            conn.execute("DELETE FROM posts_fts")
+
+        if not exists or version < SEARCH_INDEX_VERSION:
+            indexed = index_posts(conn, "1")
+            conn.execute(f"PRAGMA user_version = {SEARCH_INDEX_VERSION}")
+            if indexed:
+                self.log_info(f"Полнотекстовый индекс построен для {indexed} постов")
+
+        for name, trigger_sql in SEARCH_TRIGGERS.items():
+            conn.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {trigger_sql}")
+
+    def _create_indexes(self, conn: sqlite3.Connection):
         """Создание индексов для оптимизации производительности"""
-        cursor = self.connection.cursor()
+        cursor = conn.cursor()
 
         # Индексы для таблицы tasks
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_tasks_created_at ON tasks(created_at)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_tasks_keywords ON tasks(keywords)")
 
-        # Индексы для таблицы posts
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_posts_task_id ON posts(task_id)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_posts_link_hash ON posts(link_hash)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_posts_text_hash ON posts(text_hash)")
+        # Индексы для таблицы posts. Поиск по task_id и (task_id, link_hash) обслуживает
+        # индекс ограничения UNIQUE(task_id, link_hash); копии только замедляли вставку.
+        # Отдельные индексы по хешам не нужны: уникальность держит тот же UNIQUE,
+        # а поиск дубликатов идёт одним проходом по таблице
+        redundant_indexes = (
+            "idx_posts_task_id",
+            "idx_posts_task_link_hash",
+            "idx_posts_link_hash",
+            "idx_posts_text_hash",
+            "idx_posts_task_text_hash",
+        )
+        for name in redundant_indexes:
+            cursor.execute(f"DROP INDEX IF EXISTS {name}")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_posts_date ON posts(date)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_posts_likes ON posts(likes)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_posts_created_at ON posts(created_at)")
 
-        # Составной индекс для поиска дубликатов
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_posts_task_link_hash ON posts(task_id, link_hash)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_posts_task_text_hash ON posts(task_id, text_hash)")
-
         # Индексы для таблицы task_metadata
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_metadata_task_id ON task_metadata(task_id)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_metadata_key ON task_metadata(meta_key)")
@@ -199,27 +398,23 @@ class DatabasePlugin(BasePlugin):
     ) -> int:
         """Создание новой задачи"""
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-
-            cursor.execute(
-                """
-                INSERT INTO tasks (task_name, keywords, start_date, end_date, exact_match, minus_words)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """,
-                (
-                    task_name,
-                    json.dumps(keywords, ensure_ascii=False),
-                    start_date,
-                    end_date,
-                    exact_match,
-                    json.dumps(minus_words or [], ensure_ascii=False),
-                ),
-            )
+            with self.write_connection() as conn:
+                cursor = conn.execute(
+                    """
+                    INSERT INTO tasks (task_name, keywords, start_date, end_date, exact_match, minus_words)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                    (
+                        task_name,
+                        json.dumps(keywords, ensure_ascii=False),
+                        start_date,
+                        end_date,
+                        exact_match,
+                        json.dumps(minus_words or [], ensure_ascii=False),
+                    ),
+                )
 
             task_id = cursor.lastrowid
-            conn.commit()
-            conn.close()
 
             self.log_info(f"Создана задача {task_id}: {task_name}")
             return task_id
@@ -229,145 +424,143 @@ class DatabasePlugin(BasePlugin):
             return None
 
     def save_posts(self, task_id: int, posts: List[Dict]) -> int:
-        """Сохранение постов в базу данных"""
+        """Сохранение постов в базу данных (возвращает число новых постов)"""
         if not posts:
             return 0
+        return self.save_posts_bulk(task_id, posts)["saved"]
 
-        try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            saved_count = 0
-
-            for post in posts:
-                # Извлекаем данные из поста
-                owner_id = post.get("owner_id", 0)
-                post_id = post.get("id", 0)
-                vk_id = f"{owner_id}_{post_id}"
-                link = f"https://vk.com/wall{owner_id}_{post_id}"
-
-                text = post.get("text", "")
-                if not text:
-                    continue
-
-                # Создаем хеши для дедупликации
-                link_hash = hashlib.md5(link.encode("utf-8"), usedforsecurity=False).hexdigest()
-                text_hash = hashlib.md5(text.encode("utf-8"), usedforsecurity=False).hexdigest()
-
-                # Извлекаем метрики
-                likes = (
-                    post.get("likes", {}).get("count", 0)
-                    if isinstance(post.get("likes"), dict)
-                    else post.get("likes", 0)
-                )
-                comments = (
-                    post.get("comments", {}).get("count", 0)
-                    if isinstance(post.get("comments"), dict)
-                    else post.get("comments", 0)
-                )
-                reposts = (
-                    post.get("reposts", {}).get("count", 0)
-                    if isinstance(post.get("reposts"), dict)
-                    else post.get("reposts", 0)
-                )
-                views = (
-                    post.get("views", {}).get("count", 0)
-                    if isinstance(post.get("views"), dict)
-                    else post.get("views", 0)
-                )
-
-                # Ключевые слова
-                keywords_matched = post.get("keywords_matched", [])
-
-                try:
-                    cursor.execute(
-                        """
-                        INSERT OR IGNORE INTO posts
-                        (task_id, vk_id, link, link_hash, text, text_hash, date,
-                         likes, comments, reposts, views, keywords_matched)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """,
-                        (
-                            task_id,
-                            vk_id,
-                            link,
-                            link_hash,
-                            text,
-                            text_hash,
-                            post.get("date", 0),
-                            likes,
-                            comments,
-                            reposts,
-                            views,
-                            json.dumps(keywords_matched, ensure_ascii=False),
-                        ),
-                    )
-                    if cursor.rowcount > 0:
-                        saved_count += 1
-
-                except sqlite3.IntegrityError:
-                    # Пост уже существует, пропускаем
-                    pass
-
-            # Обновляем статистику задачи
-            self._update_task_statistics(task_id)
+    def save_posts_bulk(self, task_id: int, posts: Iterable[Dict], chunk_size: int = None) -> Dict[str, Any]:
+        """
+        Пакетное сохранение постов
 
-            conn.commit()
-            conn.close()
+        Строки готовятся один раз (prepare_post_rows), вставляются через
+        executemany чанками по chunk_size в одной транзакции; итоги задачи
+        увеличиваются на итоги вставленных строк одним запросом. Полнотекстовый
+        индекс дополняется при следующем поиске (sync_search_index).
 
-            self.log_info(f"Сохранено {saved_count} из {len(posts)} постов для задачи {task_id}")
-            return saved_count
+        Returns:
+            {"rows", "saved", "elapsed_time", "rows_per_second"}; то же - в last_save_stats
+        """
+        started = time.perf_counter()
+        chunk_size = chunk_size or self.config.get("insert_chunk_size", 10_000)
+        rows = saved = 0
 
+        try:
+            with self.write_connection() as conn:
+                last_post_id = self._last_post_id(conn)
+                for chunk in _chunks(self.prepare_post_rows(task_id, posts), chunk_size):
+                    # rowcount суммируется по всем строкам executemany
+                    saved += conn.executemany(INSERT_POST_SQL, chunk).rowcount
+                    rows += len(chunk)
+                conn.execute(ADD_INSERTED_TOTALS_SQL, (last_post_id,))
         except Exception as e:
             self.log_error(f"Ошибка сохранения постов: {e}")
-            return 0
-
-    def _update_task_statistics(self, task_id: int):
-        """Обновление статистики задачи"""
-        try:
-            cursor = self.connection.cursor()
-
-            # Получаем статистику по постам
-            cursor.execute(
-                """
-                SELECT
-                    COUNT(*) as total_posts,
-                    SUM(likes) as total_likes,
-                    SUM(comments) as total_comments,
-                    SUM(reposts) as total_reposts,
-                    SUM(views) as total_views
-                FROM posts
-                WHERE task_id = ?
-            """,
-                (task_id,),
+            saved = 0
+
+        elapsed = time.perf_counter() - started
+        self.last_save_stats = {
+            "rows": rows,
+            "saved": saved,
+            "elapsed_time": round(elapsed, 4),
+            "rows_per_second": round(rows / elapsed) if elapsed > 0 else 0,
+        }
+        self.log_info(
+            f"Сохранено {saved} из {rows} постов для задачи {task_id} "
+            f"({self.last_save_stats['rows_per_second']} строк/с)"
+        )
+        return self.last_save_stats
+
+    @staticmethod
+    def _last_post_id(conn: sqlite3.Connection) -> int:
+        return conn.execute("SELECT IFNULL(MAX(id), 0) FROM posts").fetchone()[0]
+
+    @staticmethod
+    def prepare_post_rows(task_id: int, posts: Iterable[Dict]) -> Iterator[tuple]:
+        """Строки для INSERT_POST_SQL; посты без текста пропускаются"""
+        md5 = hashlib.md5
+        # Наборы совпавших ключей у постов одной задачи повторяются - сериализуем каждый один раз
+        keywords_json: Dict[tuple, str] = {}
+        for post in posts:
+            text = post.get("text", "")
+            if not text:
+                continue
+
+            keywords_matched = post.get("keywords_matched") or []
+            try:
+                keywords_value = keywords_json.get(tuple(keywords_matched))
+                if keywords_value is None:
+                    keywords_value = keywords_json[tuple(keywords_matched)] = json.dumps(keywords_matched, ensure_ascii=False)
+            except TypeError:
+                keywords_value = json.dumps(keywords_matched, ensure_ascii=False)
+
+            vk_id = f"{post.get('owner_id', 0)}_{post.get('id', 0)}"
+            link = f"https://vk.com/wall{vk_id}"
+            yield (
+                task_id,
+                vk_id,
+                link,
+                # Хеши для дедупликации
+                md5(link.encode("utf-8"), usedforsecurity=False).hexdigest(),
+                text,
+                md5(text.encode("utf-8"), usedforsecurity=False).hexdigest(),
+                post.get("date", 0),
+                _metric_count(post.get("likes", 0)),
+                _metric_count(post.get("comments", 0)),
+                _metric_count(post.get("reposts", 0)),
+                _metric_count(post.get("views", 0)),
+                keywords_value,
             )
 
-            stats = cursor.fetchone()
+    def reconcile_task_statistics(self, task_id: int = None) -> Dict[str, Any]:
+        """
+        Сверка итогов задач с постами
 
-            if stats:
-                total_SI = (stats["total_likes"] or 0) + (stats["total_comments"] or 0) + (stats["total_reposts"] or 0)
+        Итоги ведут save_posts_bulk()/update_task_posts() и триггеры
+        TASK_STATISTICS_TRIGGERS; сверка пересчитывает COUNT/SUM одним запросом
+        (по задаче task_id или по всем) и исправляет расходящиеся итоги, например
+        после вставки постов в обход DatabasePlugin.
 
-                cursor.execute(
-                    """
-                    UPDATE tasks
-                    SET total_posts = ?, total_likes = ?, total_comments = ?,
-                        total_reposts = ?, total_views = ?, total_SI = ?
-                    WHERE id = ?
-                """,
-                    (
-                        stats["total_posts"] or 0,
-                        stats["total_likes"] or 0,
-                        stats["total_comments"] or 0,
-                        stats["total_reposts"] or 0,
-                        stats["total_views"] or 0,
-                        total_SI,
-                        task_id,
-                    ),
-                )
+        Returns:
+            {"checked": число проверенных задач, "fixed": id исправленных задач}
+        """
+        where, params = ("WHERE t.id = ?", (task_id,)) if task_id is not None else ("", ())
+        checked, fixed = 0, []
 
-                self.connection.commit()
+        try:
+            with self.write_connection() as conn:
+                rows = conn.execute(TASK_TOTALS_SQL.format(where=where), params).fetchall()
+                for row in rows:
+                    totals = (
+                        row["posts"],
+                        row["likes"],
+                        row["comments"],
+                        row["reposts"],
+                        row["views"],
+                        row["likes"] + row["comments"] + row["reposts"],
+                    )
+                    stored = tuple(
+                        row[column]
+                        for column in ("total_posts", "total_likes", "total_comments", "total_reposts", "total_views", "total_SI")
+                    )
+                    if stored != totals:
+                        conn.execute(
+                            """
+                            UPDATE tasks
+                            SET total_posts = ?, total_likes = ?, total_comments = ?,
+                                total_reposts = ?, total_views = ?, total_SI = ?
+                            WHERE id = ?
+                        """,
+                            (*totals, row["task_id"]),
+                        )
+                        fixed.append(row["task_id"])
+                checked = len(rows)
 
         except Exception as e:
-            self.log_error(f"Ошибка обновления статистики: {e}")
+            self.log_error(f"Ошибка сверки статистики задач: {e}")
+
+        if fixed:
+            self.log_warning(f"Итоги исправлены для задач: {fixed}")
+        return {"checked": checked, "fixed": fixed}
 
     def get_tasks(self, status: str = None) -> List[Dict]:
         """Получение списка задач"""
@@ -431,108 +624,132 @@ class DatabasePlugin(BasePlugin):
             self.log_error(f"Ошибка получения постов: {e}")
             return []
 
+    def get_posts_by_ids(self, post_ids: Iterable[int]) -> List[Dict]:
+        """Посты с заданными id (в порядке get_task_posts - новые первыми)"""
+        try:
+            cursor = self.connection.execute(
+                "SELECT * FROM posts WHERE id IN (SELECT value FROM json_each(?)) ORDER BY date DESC",
+                (json.dumps(list(post_ids)),),
+            )
+            posts = []
+            for row in cursor.fetchall():
+                post = dict(row)
+                post["keywords_matched"] = json.loads(post["keywords_matched"] or "[]")
+                posts.append(post)
+            return posts
+
+        except Exception as e:
+            self.log_error(f"Ошибка получения постов по id: {e}")
+            return []
+
+    def search_posts(
+        self, task_id: Optional[int], keywords: List[str], exact_match: bool = True, minus_words: List[str] = None
+    ) -> List[int]:
+        """
+        id постов задачи (task_id=None - всех задач), подходящих под ключи, по полнотекстовому индексу
+
+        exact_match=True - в тексте есть фраза ключа, иначе - все слова ключа;
+        посты с минус-словами исключаются (правила - build_search_condition).
+        """
+        search = build_search_condition(keywords, exact_match, minus_words)
+        if search is None:
+            return []
+
+        condition, params = search
+        if task_id is not None:
+            condition, params = f"task_id = ? AND {condition}", [task_id, *params]
+        try:
+            self.sync_search_index()
+            cursor = self.connection.execute(f"SELECT id FROM posts WHERE {condition} ORDER BY id", params)
+            return [row[0] for row in cursor.fetchall()]
+
+        except Exception as e:
+            self.log_error(f"Ошибка полнотекстового поиска: {e}")
+            return []
+
+    def delete_posts_not_matching(
+        self, task_id: int, keywords: List[str], exact_match: bool = True, minus_words: List[str] = None
+    ) -> int:
+        """Удаляет посты задачи, не подходящие под ключи (правила search_posts), одним запросом"""
+        search = build_search_condition(keywords, exact_match, minus_words)
+        if search is None:
+            return 0
+
+        condition, params = search
+        try:
+            with self.write_connection() as conn:
+                sync_search_index(conn)
+                cursor = conn.execute(f"DELETE FROM posts WHERE task_id = ? AND NOT ({condition})", [task_id, *params])
+            return cursor.rowcount
+
+        except Exception as e:
+            self.log_error(f"Ошибка удаления постов задачи {task_id}: {e}")
+            return 0
+
+    def sync_search_index(self) -> int:
+        """Дописывает в полнотекстовый индекс посты, сохранённые после последней индексации"""
+        try:
+            if not has_unindexed_posts(self.connection):
+                return 0
+            with self.write_connection() as conn:
+                indexed = sync_search_index(conn)
+            self.log_info(f"Полнотекстовый индекс дополнен: {indexed} постов")
+            return indexed
+
+        except Exception as e:
+            self.log_error(f"Ошибка индексации новых постов: {e}")
+            return 0
+
+    def rebuild_search_index(self) -> int:
+        """Перестраивает полнотекстовый индекс по всем постам; возвращает число постов"""
+        try:
+            with self.write_connection() as conn:
+                conn.execute("DELETE FROM posts_fts")
+                indexed = index_posts(conn, "1")
+            self.log_info(f"Полнотекстовый индекс перестроен: {indexed} постов")
+            return indexed
+
+        except Exception as e:
+            self.log_error(f"Ошибка перестроения полнотекстового индекса: {e}")
+            return 0
+
     def update_task_posts(self, task_id: int, posts: List[Dict]):
         """Обновляет посты для существующей задачи"""
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            deleted_count = 0
-            inserted_count = 0
-
-            # Определяем существующие посты
-            existing_post_ids = set()
-            cursor.execute("SELECT id FROM posts WHERE task_id = ?", (task_id,))
-            for row in cursor.fetchall():
-                existing_post_ids.add(row["id"])
-
-            # Определяем новые посты
-            new_post_ids = set()
-            for post in posts:
-                owner_id = post.get("owner_id", 0)
-                post_id = post.get("id", 0)
-                new_post_ids.add(f"{owner_id}_{post_id}")
-
-            # Удаляем посты, которые больше не существуют
-            for post_id in existing_post_ids - new_post_ids:
-                cursor.execute("DELETE FROM posts WHERE id = ?", (post_id,))
-                deleted_count += 1
-
-            # Сохраняем новые посты
-            for post in posts:
-                owner_id = post.get("owner_id", 0)
-                post_id = post.get("id", 0)
-                vk_id = f"{owner_id}_{post_id}"
-                link = f"https://vk.com/wall{owner_id}_{post_id}"
-
-                text = post.get("text", "")
-                if not text:
-                    continue
-
-                link_hash = hashlib.md5(link.encode("utf-8"), usedforsecurity=False).hexdigest()
-                text_hash = hashlib.md5(text.encode("utf-8"), usedforsecurity=False).hexdigest()
-
-                likes = (
-                    post.get("likes", {}).get("count", 0)
-                    if isinstance(post.get("likes"), dict)
-                    else post.get("likes", 0)
-                )
-                comments = (
-                    post.get("comments", {}).get("count", 0)
-                    if isinstance(post.get("comments"), dict)
-                    else post.get("comments", 0)
+            with self.write_connection() as conn:
+                cursor = conn.cursor()
+                rows = list(self.prepare_post_rows(task_id, posts))
+
+                # Удаляем посты, которых нет в новом наборе: vk_id сохраняемых постов
+                # во временной таблице, удаление - одним запросом
+                cursor.execute("CREATE TEMP TABLE IF NOT EXISTS keep_vk_ids (vk_id TEXT PRIMARY KEY)")
+                cursor.execute("DELETE FROM temp.keep_vk_ids")
+                cursor.executemany(
+                    "INSERT OR IGNORE INTO temp.keep_vk_ids VALUES (?)",
+                    ((f"{post.get('owner_id', 0)}_{post.get('id', 0)}",) for post in posts),
                 )
-                reposts = (
-                    post.get("reposts", {}).get("count", 0)
-                    if isinstance(post.get("reposts"), dict)
-                    else post.get("reposts", 0)
-                )
-                views = (
-                    post.get("views", {}).get("count", 0)
-                    if isinstance(post.get("views"), dict)
-                    else post.get("views", 0)
+                cursor.execute(
+                    "DELETE FROM posts WHERE task_id = ? AND vk_id NOT IN (SELECT vk_id FROM temp.keep_vk_ids)",
+                    (task_id,),
                 )
+                deleted_count = cursor.rowcount
+                cursor.execute("DROP TABLE temp.keep_vk_ids")
+
+                # Сохраняем новые посты; итоги изменённых строк поправят триггеры
+                last_post_id = self._last_post_id(conn)
+                cursor.executemany(UPSERT_POST_SQL, rows)
+                cursor.execute(ADD_INSERTED_TOTALS_SQL, (last_post_id,))
+                # Сначала все посты, сохранённые после индексации: иначе проиндексированные здесь
+                # посты задачи скрыли бы от sync_search_index более ранние посты других задач.
+                # Затем посты с изменённым текстом (триггер снял их строки индекса)
+                sync_search_index(conn)
+                index_posts(conn, "task_id = ? AND id NOT IN (SELECT rowid FROM posts_fts)", (task_id,))
+                inserted_count = len(rows)
 
-                keywords_matched = post.get("keywords_matched", [])
-
-                try:
-                    cursor.execute(
-                        """
-                        INSERT OR REPLACE INTO posts
-                        (task_id, vk_id, link, link_hash, text, text_hash, date,
-                         likes, comments, reposts, views, keywords_matched)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """,
-                        (
-                            task_id,
-                            vk_id,
-                            link,
-                            link_hash,
-                            text,
-                            text_hash,
-                            post.get("date", 0),
-                            likes,
-                            comments,
-                            reposts,
-                            views,
-                            json.dumps(keywords_matched, ensure_ascii=False),
-                        ),
-                    )
-                    inserted_count += 1
-                except sqlite3.IntegrityError:
-                    # Пост уже существует, пропускаем
-                    pass
-
-            # Обновляем статистику задачи
-            self._update_task_statistics(task_id)
-
-            conn.commit()
-            conn.close()
             self.log_info(f"Обновлено {inserted_count} постов и удалено {deleted_count} постов для задачи {task_id}")
 
         except Exception as e:
             self.log_error(f"Ошибка обновления постов задачи {task_id}: {e}")
-            if 'conn' in locals():
-                conn.close()
 
     def export_task_to_csv(self, task_id: int, output_path: str) -> bool:
         """Экспорт задачи в CSV"""
@@ -554,32 +771,7 @@ class DatabasePlugin(BasePlugin):
                 return False
 
             # Конвертируем в формат для CSV
-            csv_data = []
-            for post in posts:
-                # Правильно обрабатываем keywords_matched
-                keywords_matched = post.get("keywords_matched", [])
-                if isinstance(keywords_matched, str):
-                    try:
-                        keywords_matched = json.loads(keywords_matched)
-                    except (json.JSONDecodeError, TypeError):
-                        keywords_matched = []
-
-                keywords_str = ", ".join(keywords_matched) if keywords_matched else ""
-
-                csv_row = {
-                    "link": post["link"],
-                    "text": post["text"],
-                    "type": "Пост",
-                    "author": "",
-                    "author_link": "",
-                    "date": datetime.fromtimestamp(post["date"]).strftime("%H:%M %d.%m.%Y") if post["date"] else "",
-                    "likes": post["likes"],
-                    "comments": post["comments"],
-                    "reposts": post["reposts"],
-                    "views": post["views"],
-                    "keywords_matched": keywords_str,
-                }
-                csv_data.append(csv_row)
+            csv_data = [self.post_to_csv_row(post) for post in posts]
 
             # Сохраняем в CSV
             df = pd.DataFrame(csv_data)
@@ -592,6 +784,38 @@ class DatabasePlugin(BasePlugin):
             self.log_error(f"Ошибка экспорта в CSV: {e}")
             return False
 
+    @staticmethod
+    def post_to_csv_row(post: Dict) -> Dict[str, Any]:
+        """
+        Строка CSV-выгрузки для поста
+
+        Принимает как строку таблицы posts, так и пост из ответа VK
+        (ссылка строится из owner_id/id, метрики - словари {"count": N}).
+        """
+        keywords_matched = post.get("keywords_matched") or []
+        if isinstance(keywords_matched, str):
+            try:
+                keywords_matched = json.loads(keywords_matched)
+            except (json.JSONDecodeError, TypeError):
+                keywords_matched = []
+
+        link = post.get("link") or f"https://vk.com/wall{post.get('owner_id', 0)}_{post.get('id', 0)}"
+        date = post.get("date")
+
+        return {
+            "link": link,
+            "text": post.get("text", ""),
+            "type": "Пост",
+            "author": "",
+            "author_link": "",
+            "date": datetime.fromtimestamp(date).strftime("%H:%M %d.%m.%Y") if date else "",
+            "likes": _metric_count(post.get("likes")),
+            "comments": _metric_count(post.get("comments")),
+            "reposts": _metric_count(post.get("reposts")),
+            "views": _metric_count(post.get("views")),
+            "keywords_matched": ", ".join(keywords_matched) if keywords_matched else "",
+        }
+
     def get_task_statistics(self, task_id: int) -> Dict:
         """Получение статистики задачи"""
         try:
@@ -622,53 +846,126 @@ class DatabasePlugin(BasePlugin):
     def update_task_status(self, task_id: int, status: str):
         """Обновление статуса задачи"""
         try:
-            cursor = self.connection.cursor()
-            cursor.execute("UPDATE tasks SET status = ? WHERE id = ?", (status, task_id))
-            self.connection.commit()
+            with self.write_connection() as conn:
+                conn.execute("UPDATE tasks SET status = ? WHERE id = ?", (status, task_id))
 
             self.log_info(f"Статус задачи {task_id} обновлен на '{status}'")
 
         except Exception as e:
             self.log_error(f"Ошибка обновления статуса: {e}")
 
-    def find_duplicates(self, task_id: int = None) -> List[List[Dict]]:
-        """Поиск дубликатов в постах"""
+    def set_task_metadata(self, task_id: int, meta_key: str, value: Any):
+        """Сохраняет значение метаданных задачи (JSON), перезаписывая старое"""
         try:
-            cursor = self.connection.cursor()
-
-            if task_id:
-                cursor.execute(
+            with self.write_connection() as conn:
+                conn.execute(
                     """
-                    SELECT link_hash, COUNT(*) as count, GROUP_CONCAT(id) as post_ids
-                    FROM posts
-                    WHERE task_id = ?
-                    GROUP BY link_hash
-                    HAVING COUNT(*) > 1
+                    INSERT INTO task_metadata (task_id, meta_key, meta_value) VALUES (?, ?, ?)
+                    ON CONFLICT(task_id, meta_key) DO UPDATE SET
+                        meta_value = excluded.meta_value, created_at = CURRENT_TIMESTAMP
                 """,
-                    (task_id,),
+                    (task_id, meta_key, json.dumps(value, ensure_ascii=False)),
                 )
-            else:
-                cursor.execute(
-                    """
-                    SELECT link_hash, COUNT(*) as count, GROUP_CONCAT(id) as post_ids
-                    FROM posts
-                    GROUP BY link_hash
-                    HAVING COUNT(*) > 1
+
+        except Exception as e:
+            self.log_error(f"Ошибка сохранения метаданных задачи: {e}")
+
+    def get_task_metadata(self, task_id: int, prefix: str = "") -> Dict[str, Any]:
+        """Возвращает метаданные задачи, ключи которых начинаются с prefix"""
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute(
+                "SELECT meta_key, meta_value FROM task_metadata WHERE task_id = ? AND substr(meta_key, 1, ?) = ?",
+                (task_id, len(prefix), prefix),
+            )
+            return {row["meta_key"]: json.loads(row["meta_value"]) for row in cursor.fetchall()}
+
+        except Exception as e:
+            self.log_error(f"Ошибка получения метаданных задачи: {e}")
+            return {}
+
+    def get_keyword_watermarks(self, task_id: int) -> Dict[str, Dict]:
+        """
+        Отметки инкрементального поиска задачи: ключевое слово -> самый новый пост
+
+        Отметка хранится в task_metadata под ключом "watermark:<ключевое слово>"
+        как {"date": timestamp, "owner_id": ..., "id": ...}.
+        """
+        metadata = self.get_task_metadata(task_id, WATERMARK_PREFIX)
+        return {meta_key[len(WATERMARK_PREFIX):]: mark for meta_key, mark in metadata.items()}
+
+    def update_keyword_watermarks(self, task_id: int, watermarks: Dict[str, Dict]):
+        """Сдвигает отметки вперёд; более старые отметки не перезаписывают новые"""
+        current = self.get_keyword_watermarks(task_id)
+        for keyword, mark in watermarks.items():
+            previous = current.get(keyword)
+            if previous and (previous["date"], previous["id"]) >= (mark["date"], mark["id"]):
+                continue
+            self.set_task_metadata(task_id, f"{WATERMARK_PREFIX}{keyword}", mark)
+
+    def find_incremental_task(self, keywords: List[str], exact_match: bool, minus_words: List[str] = None):
+        """Находит последнюю задачу с тем же набором запросов и отметками инкрементального поиска"""
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute(
                 """
-                )
+                SELECT t.id FROM tasks t
+                WHERE t.keywords = ? AND t.exact_match = ? AND t.minus_words = ?
+                  AND EXISTS (
+                      SELECT 1 FROM task_metadata m
+                      WHERE m.task_id = t.id AND substr(m.meta_key, 1, ?) = ?
+                  )
+                ORDER BY t.id DESC LIMIT 1
+            """,
+                (
+                    json.dumps(keywords, ensure_ascii=False),
+                    exact_match,
+                    json.dumps(minus_words or [], ensure_ascii=False),
+                    len(WATERMARK_PREFIX),
+                    WATERMARK_PREFIX,
+                ),
+            )
+            row = cursor.fetchone()
+            return row["id"] if row else None
 
-            duplicates = []
-            for row in cursor.fetchall():
-                post_ids = [int(pid) for pid in row["post_ids"].split(",")]
-                duplicate_posts = []
+        except Exception as e:
+            self.log_error(f"Ошибка поиска задачи для инкрементального поиска: {e}")
+            return None
 
-                for post_id in post_ids:
-                    cursor.execute("SELECT * FROM posts WHERE id = ?", (post_id,))
-                    post = cursor.fetchone()
-                    if post:
-                        duplicate_posts.append(dict(post))
+    @staticmethod
+    def _task_scope(task_id: Optional[int]) -> tuple:
+        """WHERE по задаче для запросов по posts (task_id=None - все задачи)"""
+        return ("WHERE task_id = ?", (task_id,)) if task_id else ("", ())
 
-                duplicates.append(duplicate_posts)
+    def find_duplicates(self, task_id: int = None) -> List[List[Dict]]:
+        """
+        Поиск дубликатов в постах (по link_hash)
+
+        Группы целиком выбираются одним запросом с оконной функцией; внутри
+        группы посты идут по id, первым - тот, что остаётся при очистке.
+        """
+        where, params = self._task_scope(task_id)
+        try:
+            cursor = self.connection.execute(
+                f"""
+                SELECT * FROM (
+                    SELECT p.*, COUNT(*) OVER (PARTITION BY link_hash) AS group_size
+                    FROM posts p {where}
+                )
+                WHERE group_size > 1
+                ORDER BY link_hash, id
+            """,
+                params,
+            )
+
+            duplicates = []
+            for _, rows in groupby(cursor, key=lambda row: row["link_hash"]):
+                group = []
+                for row in rows:
+                    post = dict(row)
+                    del post["group_size"]
+                    group.append(post)
+                duplicates.append(group)
 
             return duplicates
 
@@ -676,12 +973,53 @@ class DatabasePlugin(BasePlugin):
             self.log_error(f"Ошибка поиска дубликатов: {e}")
             return []
 
+    def count_duplicates(self, task_id: int = None) -> Dict[str, int]:
+        """Число групп дубликатов по link_hash и лишних постов в них (одним запросом)"""
+        where, params = self._task_scope(task_id)
+        try:
+            row = self.connection.execute(
+                f"""
+                SELECT COUNT(*) AS groups, IFNULL(SUM(size - 1), 0) AS duplicates
+                FROM (SELECT COUNT(*) AS size FROM posts {where} GROUP BY link_hash HAVING COUNT(*) > 1)
+            """,
+                params,
+            ).fetchone()
+            return {"duplicate_groups": row["groups"], "total_duplicates": row["duplicates"]}
+
+        except Exception as e:
+            self.log_error(f"Ошибка подсчёта дубликатов: {e}")
+            return {"duplicate_groups": 0, "total_duplicates": 0}
+
+    def delete_duplicates(self, task_id: int = None) -> int:
+        """Удаляет дубликаты по link_hash одним запросом, в каждой группе остаётся пост с меньшим id"""
+        where, params = self._task_scope(task_id)
+        try:
+            with self.write_connection() as conn:
+                cursor = conn.execute(
+                    f"""
+                    DELETE FROM posts WHERE id IN (
+                        SELECT id FROM (
+                            SELECT id, ROW_NUMBER() OVER (PARTITION BY link_hash ORDER BY id) AS position
+                            FROM posts {where}
+                        )
+                        WHERE position > 1
+                    )
+                """,
+                    params,
+                )
+            return cursor.rowcount
+
+        except Exception as e:
+            self.log_error(f"Ошибка удаления дубликатов: {e}")
+            return 0
+
     def shutdown(self) -> None:
         """Завершение работы плагина"""
         self.log_info("Завершение работы плагина Database")
 
-        if self.connection:
-            self.connection.close()
+        if self.connections is not None:
+            self.connections.close()
+            self.connections = None
 
         self.emit_event(EventType.PLUGIN_UNLOADED, {"status": "shutdown"})
         self.log_info("Плагин Database завершен")
@@ -878,6 +1216,8 @@ class DatabasePlugin(BasePlugin):
                 "total_size": total_size,
                 "data_directory": self.data_dir,
                 "database_path": self.db_path,
+                "last_save": self.last_save_stats,
+                "connections": self.connections.get_statistics() if self.connections else {},
             }
 
         except Exception as e:
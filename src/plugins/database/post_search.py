@@ -0,0 +1,140 @@
+"""
+Полнотекстовый индекс сохранённых постов (SQLite FTS5)
+
+Таблица posts_fts хранит исходный текст поста в нижнем регистре со сжатыми
+пробелами; rowid строки - posts.id. Токенизатор trigram ищет фразы как
+подстроки, поэтому правила совпадения те же, что у filter_posts_by_keywords_fast
+и KeywordMatcher: ключ совпадает, если он встречается в тексте (хэштеги,
+упоминания и эмодзи не вырезаются). Фразы короче MIN_INDEXED_LENGTH символов
+триграммы не покрывают - для них строится LIKE по той же таблице.
+
+Сохранение постов индекс не трогает: посты, добавленные после последнего
+проиндексированного, DatabasePlugin дописывает перед поиском (sync_search_index)
+одним запросом INSERT ... SELECT. Удаление поста и изменение его текста снимают
+строку индекса триггерами SEARCH_TRIGGERS.
+"""
+
+import sqlite3
+from typing import Any, Iterable, List, Optional, Tuple
+
+# columnsize=0: ранжирование bm25 не используется, длины документов не храним
+SEARCH_TABLE_SQL = "CREATE VIRTUAL TABLE posts_fts USING fts5(text, tokenize = 'trigram', columnsize = 0)"
+
+SEARCH_TRIGGERS = {
+    "trg_posts_fts_delete": "AFTER DELETE ON posts BEGIN DELETE FROM posts_fts WHERE rowid = OLD.id; END",
+    # Изменённый текст переиндексирует записывающий код (index_posts по постам без строки индекса)
+    "trg_posts_fts_update": "AFTER UPDATE OF text ON posts BEGIN DELETE FROM posts_fts WHERE rowid = OLD.id; END",
+}
+
+# Формат текста в индексе; хранится в PRAGMA user_version базы. Индекс
+# прежнего формата (0 - очищенный текст) перестраивается при инициализации
+SEARCH_INDEX_VERSION = 1
+
+# Самая короткая фраза, которую находит триграммный индекс
+MIN_INDEXED_LENGTH = 3
+
+
+def normalize_search_text(text: str) -> str:
+    """Текст в том виде, в каком он хранится в индексе (и с которым сравниваются фразы)"""
+    return " ".join((text or "").lower().split())
+
+
+# SQL-функции, которые ConnectionManager регистрирует на каждом соединении.
+# Встроенная lower() SQLite меняет регистр только у латиницы
+SEARCH_FUNCTIONS = {"search_text": normalize_search_text}
+
+
+def index_posts(conn: sqlite3.Connection, where: str, params: Tuple = ()) -> int:
+    """Индексирует посты, подходящие под условие where на таблицу posts; возвращает их число"""
+    cursor = conn.execute(
+        f"INSERT INTO posts_fts(rowid, text) SELECT id, search_text(text) FROM posts WHERE {where}", params
+    )
+    return cursor.rowcount
+
+
+# id последнего проиндексированного поста. id постов - AUTOINCREMENT, поэтому
+# посты, сохранённые после индексации, - ровно посты с большим id
+LAST_INDEXED_SQL = "SELECT IFNULL((SELECT rowid FROM posts_fts ORDER BY rowid DESC LIMIT 1), 0)"
+
+
+def has_unindexed_posts(conn: sqlite3.Connection) -> bool:
+    """Есть ли посты, сохранённые после последней индексации"""
+    return bool(conn.execute(f"SELECT EXISTS (SELECT 1 FROM posts WHERE id > ({LAST_INDEXED_SQL}))").fetchone()[0])
+
+
+def sync_search_index(conn: sqlite3.Connection) -> int:
+    """Индексирует посты, сохранённые после последней индексации; возвращает их число"""
+    return index_posts(conn, f"id > ({LAST_INDEXED_SQL})")
+
+
+def _fts_phrase(term: str) -> str:
+    return '"' + term.replace('"', '""') + '"'
+
+
+def _like_pattern(term: str) -> str:
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def _union_query(groups: Iterable[List[str]]) -> Tuple[str, List[Any]]:
+    """
+    SELECT rowid индекса, где в тексте есть все фразы хотя бы одной группы
+
+    Группы только из длинных фраз объединяются в одно выражение MATCH через OR;
+    группа с короткими фразами даёт отдельную ветку UNION с LIKE (MATCH внутри
+    OR с другими условиями FTS5 не поддерживает).
+    """
+    matched, branches, params = [], [], []
+    for group in groups:
+        long_terms = [term for term in group if len(term) >= MIN_INDEXED_LENGTH]
+        short_terms = [term for term in group if len(term) < MIN_INDEXED_LENGTH]
+        expression = " AND ".join(_fts_phrase(term) for term in long_terms)
+        if not short_terms:
+            matched.append(f"({expression})")
+            continue
+
+        conditions = ["text LIKE ? ESCAPE '\\'"] * len(short_terms)
+        branch_params = [_like_pattern(term) for term in short_terms]
+        if expression:
+            conditions.insert(0, "posts_fts MATCH ?")
+            branch_params.insert(0, expression)
+        branches.append(f"SELECT rowid FROM posts_fts WHERE {' AND '.join(conditions)}")
+        params.extend(branch_params)
+
+    if matched:
+        branches.insert(0, "SELECT rowid FROM posts_fts WHERE posts_fts MATCH ?")
+        params.insert(0, " OR ".join(matched))
+    return " UNION ".join(branches), params
+
+
+def build_search_condition(
+    keywords: Iterable[str], exact_match: bool = True, minus_words: Iterable[str] = None
+) -> Optional[Tuple[str, List[Any]]]:
+    """
+    Условие на posts.id для постов, подходящих под ключи
+
+    exact_match=True - в тексте есть фраза ключа целиком, иначе - каждое слово
+    ключа (в любом порядке). Пост подходит, если совпал хотя бы один ключ и нет
+    ни одного минус-слова. Ключи и минус-слова нормализуются как текст индекса.
+
+    Returns:
+        (условие SQL, параметры) или None, если непустых ключей нет
+    """
+    groups = []
+    for keyword in keywords:
+        phrase = normalize_search_text(keyword)
+        if phrase:
+            groups.append([phrase] if exact_match else phrase.split())
+    if not groups:
+        return None
+
+    positive_sql, params = _union_query(groups)
+    condition = f"id IN ({positive_sql})"
+
+    minus_groups = [[phrase] for phrase in map(normalize_search_text, minus_words or []) if phrase]
+    if minus_groups:
+        negative_sql, negative_params = _union_query(minus_groups)
+        condition += f" AND id NOT IN ({negative_sql})"
+        params += negative_params
+
+    return condition, params
@@ -1,3 +1,4 @@
 from .deduplication_plugin import DeduplicationPlugin
+from .near_duplicates import NearDuplicateIndex
 
-__all__ = ["DeduplicationPlugin"]
+__all__ = ["DeduplicationPlugin", "NearDuplicateIndex"]
@@ -3,11 +3,21 @@
 """
 
 import asyncio
-from typing import Any, Dict, List
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
 
 from src.core.event_system import EventType
 from src.plugins.base_plugin import BasePlugin
 
+from .near_duplicates import NearDuplicateIndex
+from .post_identity import MISSING_IDENTITY, first_occurrence_mask, identity_keys
+from .sharded_dedup import SHARDABLE_METHODS, combine_shard, dedup_shard, merge_shards, shard_chunk
+
 
 class DeduplicationPlugin(BasePlugin):
     """Плагин для удаления дубликатов постов"""
@@ -20,14 +30,31 @@ class DeduplicationPlugin(BasePlugin):
 
         # Конфигурация по умолчанию
         self.config = {
-            "deduplication_method": "link_hash",  # link_hash, text, content_hash
+            "deduplication_method": "link_hash",  # link_hash, post_id, text, content_hash, near_duplicate
             "enable_logging": True,
             "batch_size": 1000,
+            # Поиск почти-дубликатов (MinHash/LSH)
+            "near_duplicate_threshold": 0.8,  # Оценка коэффициента Жаккара шинглов
+            "near_duplicate_num_perm": 128,
+            "near_duplicate_shingle_size": 5,
+            # Шардированная дедупликация в пуле процессов (remove_duplicates_parallel)
+            "parallel_min_posts": 1000,
+            "parallel_workers": None,  # По умолчанию число ядер
+            "parallel_shards": None,  # По умолчанию по числу процессов
+            "process_start_method": "spawn",
         }
 
         # Связи с другими плагинами
         self.database_plugin = None
 
+        # Индексы почти-дубликатов по задачам: (task_id, порог) -> NearDuplicateIndex
+        self.near_duplicate_indexes: Dict[tuple, NearDuplicateIndex] = {}
+
+        # Пул процессов создаётся при первой параллельной дедупликации
+        self.process_pool = None
+        self.process_pool_workers = 0
+        self.last_parallel_stats: Dict[str, Any] = {}
+
     def initialize(self) -> None:
         """Инициализация плагина"""
         self.log_info("Инициализация плагина Deduplication")
@@ -42,6 +69,7 @@ class DeduplicationPlugin(BasePlugin):
     def shutdown(self) -> None:
         """Завершение работы плагина"""
         self.log_info("Завершение работы плагина Deduplication")
+        self._close_process_pool()
 
         self.emit_event(EventType.PLUGIN_UNLOADED, {"status": "shutdown"})
         self.log_info("Плагин Deduplication завершен")
@@ -49,8 +77,9 @@ class DeduplicationPlugin(BasePlugin):
     def validate_config(self) -> bool:
         """Проверяет корректность конфигурации"""
         method = self.config.get("deduplication_method")
-        valid_methods = ["link_hash", "text", "content_hash"]
-        return method in valid_methods
+        valid_methods = ["link_hash", "post_id", "text", "content_hash", "near_duplicate"]
+        threshold = self.config.get("near_duplicate_threshold", 0.8)
+        return method in valid_methods and 0 < threshold <= 1
 
     def get_required_config_keys(self) -> list:
         """Возвращает список обязательных ключей конфигурации"""
@@ -62,6 +91,11 @@ class DeduplicationPlugin(BasePlugin):
             "enabled": self.is_enabled(),
             "config": self.get_config(),
             "method": self.config.get("deduplication_method"),
+            "last_parallel": self.last_parallel_stats,
+            "near_duplicate_indexes": {
+                f"{task_id}:{threshold}": index.get_statistics()
+                for (task_id, threshold), index in self.near_duplicate_indexes.items()
+            },
         }
 
     def remove_duplicates_by_link_hash(self, posts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
@@ -77,6 +111,7 @@ class DeduplicationPlugin(BasePlugin):
         if not posts:
             return []
 
+        # MD5 совпадает только у одинаковых ссылок, поэтому сравниваются сами ссылки
         seen = set()
         unique = []
         duplicates_count = 0
@@ -84,12 +119,8 @@ class DeduplicationPlugin(BasePlugin):
         for post in posts:
             link = post.get("link")
             if link:
-                import hashlib
-
-                link_hash = hashlib.md5(link.encode("utf-8"), usedforsecurity=False).hexdigest()
-
-                if link_hash not in seen:
-                    seen.add(link_hash)
+                if link not in seen:
+                    seen.add(link)
                     unique.append(post)
                 else:
                     duplicates_count += 1
@@ -97,6 +128,29 @@ class DeduplicationPlugin(BasePlugin):
         self.log_info(f"Дедупликация по link_hash: {len(posts)} -> {len(unique)} (удалено {duplicates_count})")
         return unique
 
+    def remove_duplicates_by_post_id(self, posts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Удаляет дубликаты постов по идентичности VK (owner_id, id)
+
+        Пары упаковываются в int64, первые вхождения находятся через
+        numpy.unique - подходит для миллионов постов. Порядок сохраняется,
+        посты без идентичности остаются.
+
+        Args:
+            posts: Список постов для дедупликации
+
+        Returns:
+            Список уникальных постов
+        """
+        if not posts:
+            return []
+
+        mask = first_occurrence_mask(identity_keys(posts))
+        unique = [posts[index] for index in np.flatnonzero(mask)]
+
+        self.log_info(f"Дедупликация по post_id: {len(posts)} -> {len(unique)} (удалено {len(posts) - len(unique)})")
+        return unique
+
     def remove_duplicates_by_text(self, posts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
         Удаляет дубликаты постов по тексту
@@ -168,7 +222,7 @@ class DeduplicationPlugin(BasePlugin):
 
         Args:
             posts: Список постов для дедупликации
-            method: Метод дедупликации (post_id, text, content_hash)
+            method: Метод дедупликации (link_hash, post_id, text, content_hash, near_duplicate)
 
         Returns:
             Список уникальных постов
@@ -181,23 +235,108 @@ class DeduplicationPlugin(BasePlugin):
 
         self.log_info(f"Запуск дедупликации {len(posts)} постов методом: {method}")
 
-        if method == "post_id":
+        if method == "link_hash":
+            return self.remove_duplicates_by_link_hash(posts)
+        elif method == "post_id":
             return self.remove_duplicates_by_post_id(posts)
         elif method == "text":
             return self.remove_duplicates_by_text(posts)
         elif method == "content_hash":
             return self.remove_duplicates_by_content_hash(posts)
+        elif method == "near_duplicate":
+            return self.remove_near_duplicates(posts)
         else:
             self.log_error(f"Неизвестный метод дедупликации: {method}")
             return posts
 
-    async def remove_duplicates_parallel(self, posts: List[Dict[str, Any]], method: str = None) -> List[Dict[str, Any]]:
+    def get_near_duplicate_index(self, task_id: int = None, threshold: float = None) -> NearDuplicateIndex:
+        """
+        Индекс почти-дубликатов задачи
+
+        Индекс задачи создаётся один раз и при подключённом DatabasePlugin
+        заполняется уже сохранёнными публикациями задачи, поэтому новые пачки
+        проверяются против всего сохранённого. Без task_id возвращается новый
+        пустой индекс.
+        """
+        if threshold is None:
+            threshold = self.config.get("near_duplicate_threshold", 0.8)
+
+        index = self.near_duplicate_indexes.get((task_id, threshold)) if task_id is not None else None
+        if index is not None:
+            return index
+
+        index = NearDuplicateIndex(
+            threshold=threshold,
+            num_perm=self.config.get("near_duplicate_num_perm", 128),
+            shingle_size=self.config.get("near_duplicate_shingle_size", 5),
+        )
+        if task_id is None:
+            return index
+
+        if self.database_plugin:
+            stored_posts = self.database_plugin.get_task_posts(task_id)
+            for post in stored_posts:
+                index.add(self._near_duplicate_key(post), self._extract_post_text(post))
+            self.log_info(f"Индекс почти-дубликатов задачи {task_id}: {len(stored_posts)} сохранённых публикаций")
+        self.near_duplicate_indexes[(task_id, threshold)] = index
+        return index
+
+    def reset_near_duplicate_index(self, task_id: int = None) -> None:
+        """Сбрасывает индексы почти-дубликатов задачи (или все при task_id=None)"""
+        for key in list(self.near_duplicate_indexes):
+            if task_id is None or key[0] == task_id:
+                del self.near_duplicate_indexes[key]
+
+    def assign_near_duplicate_clusters(
+        self, posts: List[Dict[str, Any]], threshold: float = None, task_id: int = None
+    ) -> int:
         """
-        Асинхронная дедупликация постов с параллельной обработкой
+        Записывает в посты кластеры почти-дубликатов
+
+        Каждый пост получает near_duplicate_cluster (ссылка или ключ первого
+        поста кластера), near_duplicate_similarity и is_near_duplicate.
+        Повтор ключа (та же ссылка) - всегда дубликат. С task_id посты
+        сравниваются и с уже сохранёнными публикациями задачи и добавляются
+        в её индекс.
+
+        Args:
+            posts: Список постов
+            threshold: Порог сходства (по умолчанию near_duplicate_threshold)
+            task_id: ID задачи для инкрементальной проверки
+
+        Returns:
+            Количество почти-дубликатов
+        """
+        index = self.get_near_duplicate_index(task_id, threshold)
+        near_duplicates = 0
+        for post in posts:
+            key = self._near_duplicate_key(post)
+            # Ключ уже в индексе: тот же пост раньше в этом списке (например, найден
+            # по другому ключевому слову) или уже сохранён в задаче - это дубликат
+            repeated = key in index
+            cluster, similarity = index.add(key, self._extract_post_text(post))
+            if repeated:
+                similarity = 1.0
+            is_duplicate = repeated or cluster != key
+            post["near_duplicate_cluster"] = cluster
+            post["near_duplicate_similarity"] = round(similarity, 3)
+            post["is_near_duplicate"] = is_duplicate
+            near_duplicates += is_duplicate
+        return near_duplicates
+
+    def remove_near_duplicates(
+        self, posts: List[Dict[str, Any]], threshold: float = None, task_id: int = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Удаляет почти-дубликаты (MinHash/LSH по шинглам текста)
+
+        Остаётся первый пост каждого кластера; кластеры записываются во все
+        посты (см. assign_near_duplicate_clusters).
 
         Args:
             posts: Список постов для дедупликации
-            method: Метод дедупликации
+            threshold: Порог сходства (по умолчанию near_duplicate_threshold)
+            task_id: ID задачи для проверки против сохранённых публикаций
 
         Returns:
             Список уникальных постов
@@ -205,47 +344,120 @@ class DeduplicationPlugin(BasePlugin):
         if not posts:
             return []
 
-        if method is None:
-            method = self.config.get("deduplication_method", "post_id")
+        duplicates_count = self.assign_near_duplicate_clusters(posts, threshold, task_id)
+        unique = [post for post in posts if not post["is_near_duplicate"]]
 
-        self.log_info(f"🚀 Параллельная дедупликация {len(posts)} постов методом: {method}")
+        self.log_info(f"Дедупликация почти-дубликатов: {len(posts)} -> {len(unique)} (удалено {duplicates_count})")
+        return unique
 
-        # Для небольших списков используем синхронную обработку
-        if len(posts) < 1000:
-            return self.remove_duplicates(posts, method)
+    @staticmethod
+    def _near_duplicate_key(post: Dict[str, Any]) -> str:
+        """Ключ поста в индексе почти-дубликатов: ссылка или owner_id_id"""
+        return post.get("link") or f"{post.get('owner_id', 0)}_{post.get('id', id(post))}"
 
-        # Для больших списков используем параллельную обработку
-        batch_size = self.config.get("batch_size", 1000)
-        tasks = []
+    async def remove_duplicates_parallel(
+        self, posts: List[Dict[str, Any]], method: str = None, max_workers: int = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Асинхронная шардированная дедупликация в пуле процессов
 
-        for i in range(0, len(posts), batch_size):
-            batch = posts[i : i + batch_size]
-            task = self._process_batch_parallel(batch, method)
-            tasks.append(task)
+        Воркеры вычисляют ключи непрерывных чанков и раскладывают посты по
+        шардам по хэшу ключа, затем каждый шард дедуплицируется отдельно.
+        Одинаковые ключи всегда в одном шарде, поэтому уцелевшие индексы
+        шардов сливаются в итог без второго прохода. Результат совпадает с
+        remove_duplicates(); распределение по шардам - в last_parallel_stats.
 
-        # Выполняем все задачи параллельно
-        results = await asyncio.gather(*tasks)
+        Небольшие списки (меньше parallel_min_posts) и near_duplicate
+        обрабатываются синхронно.
 
-        # Объединяем результаты
-        all_unique_posts = []
-        for result in results:
-            all_unique_posts.extend(result)
+        Args:
+            posts: Список постов для дедупликации
+            method: Метод дедупликации
+            max_workers: Число процессов (по умолчанию parallel_workers или число ядер)
 
-        # Финальная дедупликация объединенных результатов
-        final_unique = self.remove_duplicates(all_unique_posts, method)
+        Returns:
+            Список уникальных постов
+        """
+        if not posts:
+            return []
 
-        self.log_info(f"✅ Параллельная дедупликация завершена: {len(posts)} -> {len(final_unique)}")
-        return final_unique
+        if method is None:
+            method = self.config.get("deduplication_method", "post_id")
+
+        if len(posts) < self.config.get("parallel_min_posts", 1000) or method not in SHARDABLE_METHODS:
+            return self.remove_duplicates(posts, method)
 
-    async def _process_batch_parallel(self, batch: List[Dict[str, Any]], method: str) -> List[Dict[str, Any]]:
+        start_time = time.perf_counter()
+        workers = max_workers or self.config.get("parallel_workers") or os.cpu_count() or 1
+        shards = self.config.get("parallel_shards") or workers
+        self.log_info(f"🚀 Параллельная дедупликация {len(posts)} постов методом {method}: {workers} процессов, {shards} шардов")
+
+        records, missing = self._pack_dedup_records(posts, method)
+        executor = self._get_process_pool(workers)
+        loop = asyncio.get_running_loop()
+
+        chunk_size = -(-len(records) // workers)
+        partitioned = await asyncio.gather(
+            *(
+                loop.run_in_executor(executor, shard_chunk, method, records[start:start + chunk_size], start, shards)
+                for start in range(0, len(records), chunk_size)
+            )
+        )
+        shard_entries = [combine_shard([chunk[shard] for chunk in partitioned]) for shard in range(shards)]
+        shard_unique = await asyncio.gather(
+            *(loop.run_in_executor(executor, dedup_shard, indexes, keys) for indexes, keys in shard_entries)
+        )
+
+        unique = [posts[index] for index in merge_shards([*shard_unique, missing]).tolist()]
+
+        self.last_parallel_stats = {
+            "method": method,
+            "workers": workers,
+            "shards": shards,
+            "shard_sizes": [len(indexes) for indexes, _ in shard_entries],
+            "shard_unique": [len(indexes) for indexes in shard_unique],
+            "without_key": len(posts) - sum(len(indexes) for indexes, _ in shard_entries),
+            "duplicates_removed": len(posts) - len(unique),
+            "elapsed_time": round(time.perf_counter() - start_time, 3),
+        }
+        self.log_info(f"✅ Параллельная дедупликация завершена: {len(posts)} -> {len(unique)}")
+        return unique
+
+    def _pack_dedup_records(self, posts: List[Dict[str, Any]], method: str) -> Tuple[List[Any], np.ndarray]:
         """
-        Параллельная обработка батча постов
+        Компактные записи для воркеров и индексы постов, сохраняемых без проверки
+
+        Воркер получает только поля, из которых строится ключ метода.
         """
-        try:
-            return self.remove_duplicates(batch, method)
-        except Exception as e:
-            self.log_error(f"Ошибка обработки батча: {e}")
-            return batch
+        missing = np.empty(0, dtype=np.int64)
+        if method == "post_id":
+            keys = identity_keys(posts)
+            missing = np.flatnonzero(keys == MISSING_IDENTITY)
+            records = [None if key == MISSING_IDENTITY else key for key in keys.tolist()]
+        elif method == "link_hash":
+            records = [post.get("link") for post in posts]
+        elif method == "text":
+            records = [self._extract_post_text(post) for post in posts]
+        else:
+            records = [(self._extract_post_text(post), post.get("owner_id", 0), post.get("date", 0)) for post in posts]
+        return records, missing
+
+    def _get_process_pool(self, workers: int) -> ProcessPoolExecutor:
+        """Пул процессов дедупликации (пересоздаётся при смене числа процессов)"""
+        if self.process_pool is not None and self.process_pool_workers == workers:
+            return self.process_pool
+
+        self._close_process_pool()
+        context = multiprocessing.get_context(self.config.get("process_start_method", "spawn"))
+        self.process_pool = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+        self.process_pool_workers = workers
+        return self.process_pool
+
+    def _close_process_pool(self) -> None:
+        if self.process_pool is not None:
+            self.process_pool.shutdown(wait=True, cancel_futures=True)
+        self.process_pool = None
+        self.process_pool_workers = 0
 
     def _extract_post_text(self, post: Dict[str, Any]) -> str:
         """
@@ -263,36 +475,40 @@ class DeduplicationPlugin(BasePlugin):
         """
         Возвращает статистику дубликатов в списке постов
 
+        Ключи всех методов собираются за один проход по постам (результат
+        совпадает с отдельными прогонами remove_duplicates_by_*).
+
         Args:
             posts: Список постов для анализа
 
         Returns:
             Словарь со статистикой
         """
-        if not posts:
-            return {
-                "total": 0,
-                "unique_by_link_hash": 0,
-                "unique_by_text": 0,
-                "unique_by_content_hash": 0,
-                "duplicates_by_link_hash": 0,
-                "duplicates_by_text": 0,
-                "duplicates_by_content_hash": 0,
-            }
-
-        total = len(posts)
-        unique_by_link_hash = len(self.remove_duplicates_by_link_hash(posts))
-        unique_by_text = len(self.remove_duplicates_by_text(posts))
-        unique_by_content_hash = len(self.remove_duplicates_by_content_hash(posts))
+        total = len(posts) if posts else 0
+        links, texts, contents = set(), set(), set()
+
+        for post in posts or []:
+            link = post.get("link")
+            if link:
+                links.add(link)
+
+            text = self._extract_post_text(post)
+            if text:
+                texts.add(text.lower().strip())
+            contents.add(f"{text}_{post.get('owner_id', 0)}_{post.get('date', 0)}".lower().strip())
+
+        unique_by_post_id = int(first_occurrence_mask(identity_keys(posts)).sum()) if total else 0
 
         return {
             "total": total,
-            "unique_by_link_hash": unique_by_link_hash,
-            "unique_by_text": unique_by_text,
-            "unique_by_content_hash": unique_by_content_hash,
-            "duplicates_by_link_hash": total - unique_by_link_hash,
-            "duplicates_by_text": total - unique_by_text,
-            "duplicates_by_content_hash": total - unique_by_content_hash,
+            "unique_by_link_hash": len(links),
+            "unique_by_post_id": unique_by_post_id,
+            "unique_by_text": len(texts),
+            "unique_by_content_hash": len(contents),
+            "duplicates_by_link_hash": total - len(links),
+            "duplicates_by_post_id": total - unique_by_post_id,
+            "duplicates_by_text": total - len(texts),
+            "duplicates_by_content_hash": total - len(contents),
         }
 
     def set_database_plugin(self, database_plugin):
@@ -315,30 +531,13 @@ class DeduplicationPlugin(BasePlugin):
             return 0
 
         try:
-            # Находим дубликаты
-            duplicates = self.database_plugin.find_duplicates(task_id)
+            # Один DELETE по номеру поста в группе link_hash (первый остаётся)
+            removed_count = self.database_plugin.delete_duplicates(task_id)
 
-            if not duplicates:
+            if not removed_count:
                 self.log_info("Дубликаты не найдены")
                 return 0
 
-            # Удаляем дубликаты (оставляем только первый)
-            removed_count = 0
-            cursor = self.database_plugin.connection.cursor()
-
-            for duplicate_group in duplicates:
-                if len(duplicate_group) > 1:
-                    # Оставляем первый пост, удаляем остальные
-                    for duplicate in duplicate_group[1:]:
-                        cursor.execute("DELETE FROM posts WHERE id = ?", (duplicate["id"],))
-                        removed_count += 1
-
-            self.database_plugin.connection.commit()
-
-            # Обновляем статистику задачи
-            if task_id:
-                self.database_plugin._update_task_statistics(task_id)
-
             self.log_info(f"Удалено {removed_count} дубликатов из БД")
             return removed_count
 
@@ -361,17 +560,9 @@ class DeduplicationPlugin(BasePlugin):
             return {}
 
         try:
-            duplicates = self.database_plugin.find_duplicates(task_id)
-
-            total_duplicates = 0
-            duplicate_groups = 0
-
-            for duplicate_group in duplicates:
-                if len(duplicate_group) > 1:
-                    duplicate_groups += 1
-                    total_duplicates += len(duplicate_group) - 1  # -1 потому что один оставляем
-
-            return {"duplicate_groups": duplicate_groups, "total_duplicates": total_duplicates, "method": "link_hash"}
+            # Считаем группы в БД, не загружая сами посты
+            statistics = self.database_plugin.count_duplicates(task_id)
+            return {**statistics, "method": "link_hash"}
 
         except Exception as e:
             self.log_error(f"Ошибка получения статистики дубликатов: {e}")
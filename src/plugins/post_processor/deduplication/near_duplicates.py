@@ -0,0 +1,171 @@
+"""
+Поиск почти-дубликатов: шинглы + MinHash + LSH
+
+Текст нормализуется (нижний регистр, только слова), разбивается на
+символьные шинглы, и по ним строится MinHash-подпись - оценка коэффициента
+Жаккара двух текстов равна доле совпавших позиций подписей. Подписи
+раскладываются по корзинам LSH (полосы по rows позиций), поэтому кандидаты
+на сравнение - только тексты с хотя бы одной общей полосой, и поиск остаётся
+близким к линейному вместо попарного сравнения.
+"""
+
+import re
+import zlib
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+_WORD = re.compile(r"\w+")
+# Хэш-функции вида ((a * x + b) mod 2^64) >> 32
+_HASH_SHIFT = np.uint64(32)
+
+
+def normalize_text(text: str) -> str:
+    """Текст в нижнем регистре из одних слов через пробел"""
+    return " ".join(_WORD.findall(text.lower())) if text else ""
+
+
+def shingle_hashes(text: str, shingle_size: int = 5) -> np.ndarray:
+    """32-битные хэши уникальных символьных шинглов нормализованного текста"""
+    normalized = normalize_text(text)
+    if not normalized:
+        return np.empty(0, dtype=np.uint64)
+    if len(normalized) <= shingle_size:
+        shingles = {normalized}
+    else:
+        shingles = {normalized[i:i + shingle_size] for i in range(len(normalized) - shingle_size + 1)}
+    return np.fromiter((zlib.crc32(shingle.encode("utf-8")) for shingle in shingles), dtype=np.uint64, count=len(shingles))
+
+
+def lsh_parameters(num_perm: int, threshold: float) -> Tuple[int, int]:
+    """
+    Число полос и строк в полосе для порога сходства
+
+    Порог LSH примерно равен (1 / bands) ** (1 / rows). Берётся самая длинная
+    полоса, порог которой не выше заданного: пары на пороге почти наверняка
+    станут кандидатами, а лишние кандидаты отсеются проверкой подписей.
+    """
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        if (1 / bands) ** (1 / rows) <= threshold:
+            best = (bands, rows)
+    return best
+
+
+class MinHasher:
+    """Подписи MinHash из num_perm универсальных хэш-функций"""
+
+    def __init__(self, num_perm: int = 128, seed: int = 1):
+        self.num_perm = num_perm
+        generator = np.random.default_rng(seed)
+        # Нечётные множители - хэш-функции вида multiply-shift
+        self.a = generator.integers(1, 2**63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self.b = generator.integers(0, 2**63, size=num_perm, dtype=np.uint64)
+
+    def signature(self, hashes: np.ndarray) -> Optional[np.ndarray]:
+        """Подпись набора хэшей шинглов; None для пустого набора"""
+        if hashes.size == 0:
+            return None
+        with np.errstate(over="ignore"):
+            values = (self.a[:, None] * hashes[None, :] + self.b[:, None]) >> _HASH_SHIFT
+        return values.min(axis=1).astype(np.uint32)
+
+
+class NearDuplicateIndex:
+    """
+    Инкрементальный LSH-индекс почти-дубликатов с кластерами
+
+    Каждый добавленный текст попадает в кластер самого похожего из уже
+    добавленных (если сходство не ниже threshold) или открывает новый
+    кластер. Идентификатор кластера - ключ его первого текста, поэтому текст
+    - почти-дубликат, если его кластер отличается от его собственного ключа.
+    """
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 128, shingle_size: int = 5, seed: int = 1):
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.hasher = MinHasher(num_perm, seed)
+        self.bands, self.rows = lsh_parameters(num_perm, threshold)
+
+        self.buckets: List[Dict[bytes, List[str]]] = [{} for _ in range(self.bands)]
+        self.signatures: Dict[str, np.ndarray] = {}
+        self.clusters: Dict[str, str] = {}
+        self.similarities: Dict[str, float] = {}
+        self.stats = {"added": 0, "near_duplicates": 0, "candidates_checked": 0}
+
+    def __len__(self) -> int:
+        return len(self.clusters)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.clusters
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+
+    def _best_match(self, signature: np.ndarray, band_keys: List[bytes]) -> Tuple[Optional[str], float]:
+        candidates: Set[str] = set()
+        for band, band_key in enumerate(band_keys):
+            candidates.update(self.buckets[band].get(band_key, ()))
+
+        best_key, best_similarity = None, 0.0
+        for candidate in candidates:
+            similarity = float(np.count_nonzero(self.signatures[candidate] == signature)) / signature.size
+            if similarity > best_similarity:
+                best_key, best_similarity = candidate, similarity
+        self.stats["candidates_checked"] += len(candidates)
+        return best_key, best_similarity
+
+    def query(self, text: str) -> Tuple[Optional[str], float]:
+        """Ключ самого похожего текста индекса не ниже порога и оценка сходства"""
+        signature = self.hasher.signature(shingle_hashes(text, self.shingle_size))
+        if signature is None:
+            return None, 0.0
+        best_key, similarity = self._best_match(signature, self._band_keys(signature))
+        return (best_key, similarity) if similarity >= self.threshold else (None, 0.0)
+
+    def add(self, key: str, text: str) -> Tuple[str, float]:
+        """
+        Добавляет текст и возвращает (кластер, сходство с ближайшим текстом)
+
+        Повторно добавленный ключ сохраняет прежний кластер. Пустой текст
+        образует собственный кластер и в корзины не попадает.
+        """
+        if key in self.clusters:
+            return self.clusters[key], self.similarities[key]
+
+        self.stats["added"] += 1
+        signature = self.hasher.signature(shingle_hashes(text, self.shingle_size))
+        if signature is None:
+            self.clusters[key] = key
+            self.similarities[key] = 0.0
+            return key, 0.0
+
+        band_keys = self._band_keys(signature)
+        best_key, similarity = self._best_match(signature, band_keys)
+        if best_key is not None and similarity >= self.threshold:
+            cluster = self.clusters[best_key]
+            self.stats["near_duplicates"] += 1
+        else:
+            cluster = key
+
+        self.clusters[key] = cluster
+        self.similarities[key] = similarity
+        self.signatures[key] = signature
+        for band, band_key in enumerate(band_keys):
+            self.buckets[band].setdefault(band_key, []).append(key)
+        return cluster, similarity
+
+    def is_near_duplicate(self, key: str) -> bool:
+        """Входит ли ключ в чужой кластер"""
+        return self.clusters.get(key, key) != key
+
+    def get_statistics(self) -> Dict[str, float]:
+        return {
+            **self.stats,
+            "size": len(self.clusters),
+            "clusters": len(set(self.clusters.values())),
+            "threshold": self.threshold,
+            "bands": self.bands,
+            "rows": self.rows,
+        }
@@ -0,0 +1,88 @@
+"""
+Целочисленные идентификаторы постов VK для векторной дедупликации
+
+Пост VK однозначно задаётся парой (owner_id, id): owner_id помещается в
+32 бита со знаком, id - в 32 бита без знака, поэтому пара упаковывается в
+одно int64. Дубликаты ищутся через numpy.unique по массиву ключей, без
+строк ссылок и MD5 на каждый пост.
+"""
+
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+# Ключ постов без идентичности (недостижим для упакованных пар)
+MISSING_IDENTITY = np.iinfo(np.int64).min
+
+_OWNER_MIN, _OWNER_MAX = -(2**31) + 1, 2**31 - 1
+_POST_MAX = 2**32 - 1
+
+
+def pack_identity(owner_id: int, post_id: int) -> Optional[int]:
+    """(owner_id, id) -> int64; None, если пара не помещается в 64 бита"""
+    if not (_OWNER_MIN <= owner_id <= _OWNER_MAX and 0 <= post_id <= _POST_MAX):
+        return None
+    return (owner_id << 32) | post_id
+
+
+def post_identity(post: Dict[str, Any]) -> Optional[int]:
+    """
+    Упакованная идентичность поста
+
+    Посты из ответа API содержат owner_id и id, посты из БД - vk_id вида
+    "owner_id_post_id" (id там - номер строки таблицы).
+    """
+    vk_id = post.get("vk_id")
+    try:
+        if vk_id:
+            owner_id, post_id = str(vk_id).rsplit("_", 1)
+            return pack_identity(int(owner_id), int(post_id))
+        owner_id, post_id = post.get("owner_id"), post.get("id")
+        if owner_id is None or post_id is None:
+            return None
+        return pack_identity(int(owner_id), int(post_id))
+    except (TypeError, ValueError):
+        return None
+
+
+def identity_keys(posts: Sequence[Dict[str, Any]]) -> np.ndarray:
+    """
+    Массив int64 идентичностей постов; MISSING_IDENTITY для постов без неё
+
+    Для постов из ответа API пары упаковываются векторно, посты с vk_id или
+    без целочисленных owner_id/id разбираются по одному.
+    """
+    if not any("vk_id" in post for post in posts):
+        try:
+            owners = np.fromiter((post["owner_id"] for post in posts), dtype=np.int64, count=len(posts))
+            post_ids = np.fromiter((post["id"] for post in posts), dtype=np.int64, count=len(posts))
+        except (KeyError, TypeError, ValueError, OverflowError):
+            pass
+        else:
+            valid = (owners >= _OWNER_MIN) & (owners <= _OWNER_MAX) & (post_ids >= 0) & (post_ids <= _POST_MAX)
+            keys = (owners << 32) | post_ids
+            keys[~valid] = MISSING_IDENTITY
+            return keys
+
+    keys = (post_identity(post) for post in posts)
+    return np.fromiter((MISSING_IDENTITY if key is None else key for key in keys), dtype=np.int64, count=len(posts))
+
+
+def first_occurrence_mask(keys: np.ndarray, keep_missing: bool = True) -> np.ndarray:
+    """
+    Маска первых вхождений ключей в исходном порядке
+
+    Ключи MISSING_IDENTITY не считаются дубликатами друг друга: они
+    сохраняются при keep_missing=True и отбрасываются иначе.
+    """
+    mask = np.zeros(keys.size, dtype=bool)
+    if keys.size == 0:
+        return mask
+    _, first_index = np.unique(keys, return_index=True)
+    mask[first_index] = True
+    missing = keys == MISSING_IDENTITY
+    if keep_missing:
+        mask |= missing
+    else:
+        mask &= ~missing
+    return mask
@@ -0,0 +1,84 @@
+"""
+Шардированная дедупликация в пуле процессов
+
+Работа делится на два шага, оба выполняются в процессах-воркерах:
+
+1. shard_chunk(): непрерывный чанк компактных записей превращается в ключи
+   метода дедупликации (нормализация текста, 64-битный дайджест), и записи
+   раскладываются по шардам по ключу;
+2. dedup_shard(): в каждом шарде остаётся первое вхождение каждого ключа.
+
+Одинаковые ключи всегда попадают в один шард, поэтому объединение
+уцелевших индексов всех шардов - уже итоговый результат, второй проход по
+всему набору не нужен. Между процессами передаются только массивы int64
+(индексы и ключи), которые сериализуются как сплошные буферы.
+"""
+
+import hashlib
+from typing import Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Методы, для которых ключ поста точный и шардирование по ключу корректно
+SHARDABLE_METHODS = ("link_hash", "post_id", "text", "content_hash")
+
+# (индексы постов по возрастанию, ключи int64)
+Shard = Tuple[np.ndarray, np.ndarray]
+
+
+def _digest(key: str) -> int:
+    # 64 бита, как у hash() в последовательных методах, но одинаково во всех процессах
+    digest = hashlib.blake2b(key.encode("utf-8", "surrogatepass"), digest_size=8).digest()
+    return int.from_bytes(digest, "little", signed=True)
+
+
+def dedup_key(method: str, record: Any) -> Optional[int]:
+    """
+    Ключ записи по правилам remove_duplicates_by_<method>
+
+    None - пост не попадает ни в один шард (нет ссылки, текста или
+    идентичности). Посты без идентичности для post_id родитель сохраняет сам.
+    """
+    if method == "post_id":
+        return record
+    if method == "link_hash":
+        return _digest(record) if record else None
+    if method == "text":
+        return _digest(record.lower().strip()) if record else None
+    text, owner_id, date = record
+    return _digest(f"{text}_{owner_id}_{date}".lower().strip())
+
+
+def shard_chunk(method: str, records: Sequence[Any], start: int, shards: int) -> List[Shard]:
+    """Раскладывает записи чанка (индексы с start) по шардам по ключу"""
+    indexes, keys = [], []
+    for offset, record in enumerate(records):
+        key = dedup_key(method, record)
+        if key is not None:
+            indexes.append(start + offset)
+            keys.append(key)
+
+    index_array = np.array(indexes, dtype=np.int64)
+    key_array = np.array(keys, dtype=np.int64)
+    shard_ids = key_array % shards
+    return [(index_array[shard_ids == shard], key_array[shard_ids == shard]) for shard in range(shards)]
+
+
+def combine_shard(parts: Sequence[Shard]) -> Shard:
+    """Склеивает части одного шарда из чанков (в порядке чанков)"""
+    if not parts:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    return np.concatenate([part[0] for part in parts]), np.concatenate([part[1] for part in parts])
+
+
+def dedup_shard(indexes: np.ndarray, keys: np.ndarray) -> np.ndarray:
+    """Индексы первых вхождений ключей шарда (indexes идут по возрастанию)"""
+    _, first = np.unique(keys, return_index=True)
+    return indexes[np.sort(first)]
+
+
+def merge_shards(shard_indexes: Sequence[np.ndarray]) -> np.ndarray:
+    """Сливает индексы шардов в исходном порядке постов"""
+    if not shard_indexes:
+        return np.empty(0, dtype=np.int64)
+    return np.sort(np.concatenate(shard_indexes))
@@ -3,5 +3,6 @@
 """
 
 from .filter_plugin import FilterPlugin
+from .keyword_matcher import KeywordMatcher, get_keyword_matcher
 
-__all__ = ["FilterPlugin"]
+__all__ = ["FilterPlugin", "KeywordMatcher", "get_keyword_matcher"]
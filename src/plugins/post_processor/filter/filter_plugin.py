@@ -3,10 +3,11 @@
 """
 
 import asyncio
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from src.core.event_system import EventType
 from src.plugins.base_plugin import BasePlugin
+from src.plugins.post_processor.filter.keyword_matcher import get_keyword_matcher, get_matcher_cache_statistics
 
 
 class FilterPlugin(BasePlugin):
@@ -58,7 +59,11 @@ class FilterPlugin(BasePlugin):
 
     def get_statistics(self) -> Dict[str, Any]:
         """Возвращает статистику плагина"""
-        return {"enabled": self.is_enabled(), "config": self.get_config()}
+        return {
+            "enabled": self.is_enabled(),
+            "config": self.get_config(),
+            "keyword_matchers": get_matcher_cache_statistics(),
+        }
 
     def filter_posts_by_keyword(
         self, posts: List[Dict[str, Any]], keyword: str, exact_match: bool = True
@@ -161,25 +166,56 @@ class FilterPlugin(BasePlugin):
         if not posts or not keywords:
             return []
 
-        filtered = []
+        filtered = [post for post, _ in self.match_posts_by_keywords(posts, keywords, exact_match, use_text_cleaning)]
+
+        self.log_info(f"Фильтрация по {len(keywords)} ключам: {len(posts)} -> {len(filtered)}")
+        return filtered
 
+    def match_posts_by_keywords(
+        self, posts: List[Dict[str, Any]], keywords: List[str], exact_match: bool = True, use_text_cleaning: bool = True
+    ) -> List[Tuple[Dict[str, Any], List[str]]]:
+        """
+        Находит все совпавшие ключевые слова для каждого поста
+
+        Набор ключей компилируется в автомат Ахо-Корасик (с кэшем по отпечатку
+        набора), и текст каждого поста просматривается один раз. Правила
+        совпадения те же, что у filter_posts_by_keyword_with_text_cleaning
+        (подстрока) и filter_posts_by_keyword (при exact_match=False - целое слово).
+
+        Returns:
+            Список пар (пост, найденные ключи) только для постов с совпадениями
+        """
+        if not posts or not keywords:
+            return []
+
+        match_post = self.build_post_matcher(keywords, exact_match, use_text_cleaning)
+
+        matched_posts = []
         for post in posts:
-            str(post.get("text", "") or post.get("post_text", ""))
+            matched = match_post(post)
+            if matched:
+                matched_posts.append((post, matched))
 
-            for keyword in keywords:
-                if use_text_cleaning:
-                    # Используем фильтрацию с очисткой текста
-                    temp_filtered = self.filter_posts_by_keyword_with_text_cleaning([post], keyword, exact_match)
-                else:
-                    # Используем простую фильтрацию
-                    temp_filtered = self.filter_posts_by_keyword([post], keyword, exact_match)
+        return matched_posts
 
-                if temp_filtered:
-                    filtered.append(post)
-                    break  # Нашли совпадение, переходим к следующему посту
+    def build_post_matcher(
+        self, keywords: List[str], exact_match: bool = True, use_text_cleaning: bool = True
+    ) -> Callable[[Dict[str, Any]], List[str]]:
+        """
+        Компилирует набор ключей в функцию пост -> найденные ключи
 
-        self.log_info(f"Фильтрация по {len(keywords)} ключам: {len(posts)} -> {len(filtered)}")
-        return filtered
+        Правила те же, что у match_posts_by_keywords; функция подходит для
+        поштучной проверки постов в общем цикле обработки.
+        """
+        matcher = get_keyword_matcher(keywords, whole_words=not use_text_cleaning and not exact_match)
+        post_text = self.post_text_getter(use_text_cleaning)
+        return lambda post: matcher.find_all(post_text(post))
+
+    def post_text_getter(self, use_text_cleaning: bool = True) -> Callable[[Dict[str, Any]], str]:
+        """Функция пост -> текст, который проверяет build_post_matcher()"""
+        if use_text_cleaning:
+            return self._extract_post_text
+        return lambda post: str(post.get("text", "") or post.get("post_text", ""))
 
     def filter_posts_comprehensive(
         self,
@@ -436,6 +472,10 @@ class FilterPlugin(BasePlugin):
         """
         Фильтрация постов напрямую из базы данных
 
+        Совпадения ищет полнотекстовый индекс DatabasePlugin.search_posts() по
+        каждому ключу, из базы загружаются только подошедшие посты. Правила те же,
+        что у filter_posts_by_keywords_fast (по исходному тексту поста, без учёта регистра).
+
         Args:
             task_id: ID задачи
             keywords: Список ключевых слов
@@ -449,27 +489,50 @@ class FilterPlugin(BasePlugin):
             return []
 
         try:
-            # Получаем посты из БД
-            posts = self.database_plugin.get_task_posts(task_id)
+            if not keywords:
+                return self.database_plugin.get_task_posts(task_id)
+
+            # Первый совпавший ключ для каждого поста (в порядке списка ключей)
+            first_keyword: Dict[int, str] = {}
+            for keyword in keywords:
+                terms = self._database_search_terms([keyword], exact_match)
+                for post_id in self.database_plugin.search_posts(task_id, terms):
+                    first_keyword.setdefault(post_id, keyword)
 
-            if not posts:
-                self.log_warning(f"Нет постов для задачи {task_id}")
+            if not first_keyword:
+                self.log_info(f"Фильтрация из БД: нет постов задачи {task_id}, подходящих под ключи")
                 return []
 
-            # Фильтруем посты
-            filtered_posts = self.filter_posts_by_keywords_fast(posts, keywords, exact_match)
+            filtered_posts = self.database_plugin.get_posts_by_ids(first_keyword)
+            for post in filtered_posts:
+                post["keywords_matched"] = post.get("keywords_matched", []) + [first_keyword[post["id"]]]
 
-            self.log_info(f"Фильтрация из БД: {len(posts)} -> {len(filtered_posts)}")
+            self.log_info(f"Фильтрация из БД: найдено {len(filtered_posts)} постов задачи {task_id}")
             return filtered_posts
 
         except Exception as e:
             self.log_error(f"Ошибка фильтрации из БД: {e}")
             return []
 
+    @staticmethod
+    def _database_search_terms(keywords: List[str], exact_match: bool) -> List[str]:
+        """
+        Фразы для DatabasePlugin.search_posts(exact_match=True) по правилам _check_keyword_match
+
+        Без exact_match ключ совпадает по любому своему слову, поэтому каждое слово
+        становится отдельной фразой.
+        """
+        if exact_match:
+            return list(keywords)
+        return [word for keyword in keywords for word in keyword.split()]
+
     def clean_by_parsing_parameters(self, task_id: int, keywords: List[str], exact_match: bool = True) -> int:
         """
         Очистка постов, не соответствующих параметрам парсинга
 
+        Посты отбираются полнотекстовым индексом и удаляются одним запросом,
+        в память задача не загружается.
+
         Args:
             task_id: ID задачи
             keywords: Ключевые слова для проверки
@@ -483,36 +546,13 @@ class FilterPlugin(BasePlugin):
             return 0
 
         try:
-            # Получаем все посты задачи
-            posts = self.database_plugin.get_task_posts(task_id)
-
-            if not posts:
-                return 0
-
-            # Фильтруем посты по параметрам
-            valid_posts = self.filter_posts_by_keywords_fast(posts, keywords, exact_match)
+            terms = self._database_search_terms(keywords or [], exact_match)
+            removed_count = self.database_plugin.delete_posts_not_matching(task_id, terms)
 
-            # Находим посты для удаления
-            valid_ids = {post["id"] for post in valid_posts}
-            posts_to_remove = [post for post in posts if post["id"] not in valid_ids]
-
-            if not posts_to_remove:
+            if not removed_count:
                 self.log_info("Нет постов для удаления")
                 return 0
 
-            # Удаляем несоответствующие посты
-            cursor = self.database_plugin.connection.cursor()
-            removed_count = 0
-
-            for post in posts_to_remove:
-                cursor.execute("DELETE FROM posts WHERE id = ?", (post["id"],))
-                removed_count += 1
-
-            self.database_plugin.connection.commit()
-
-            # Обновляем статистику задачи
-            self.database_plugin._update_task_statistics(task_id)
-
             self.log_info(f"Удалено {removed_count} постов, не соответствующих параметрам")
             return removed_count
 
@@ -0,0 +1,159 @@
+"""
+Скомпилированный матчер набора ключевых фраз
+
+Автомат Ахо-Корасик строится один раз на набор ключевых фраз и за один
+проход по тексту находит все вхождения всех фраз. Готовые автоматы
+кэшируются по отпечатку набора, поэтому повторные фильтрации с теми же
+ключами не перестраивают автомат.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict, deque
+from typing import Dict, Iterable, List, Set
+
+# Сколько скомпилированных наборов держать в кэше
+MATCHER_CACHE_SIZE = 32
+
+
+def normalize_keyword(keyword: str) -> str:
+    """Нормализация ключа для сравнения без учёта регистра"""
+    return keyword.strip().lower() if keyword else ""
+
+
+class AhoCorasickAutomaton:
+    """Бор фраз с суффиксными ссылками; выходы - номера фраз в patterns"""
+
+    def __init__(self, patterns: List[str]):
+        self.patterns = patterns
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.output: List[tuple] = [()]
+
+        for pattern_id, pattern in enumerate(patterns):
+            state = 0
+            for char in pattern:
+                next_state = self.goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto[state][char] = next_state
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append(())
+                state = next_state
+            self.output[state] += (pattern_id,)
+
+        # Суффиксные ссылки строятся обходом в ширину
+        queue = deque()
+        for state in self.goto[0].values():
+            queue.append(state)
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(char, 0) if state else 0
+                self.output[next_state] += self.output[self.fail[next_state]]
+
+    def search(self, text: str) -> Set[int]:
+        """Номера всех фраз, встречающихся в тексте"""
+        goto, fail, output = self.goto, self.fail, self.output
+        found = set()
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+        return found
+
+
+class KeywordMatcher:
+    """
+    Поиск всех ключевых фраз в тексте за один проход
+
+    Режим по умолчанию ищет фразы как подстроки без учёта регистра,
+    whole_words - как отдельные слова текста после split(). Найденные
+    ключи возвращаются в исходном написании и порядке.
+    """
+
+    def __init__(self, keywords: Iterable[str], whole_words: bool = False, automaton: AhoCorasickAutomaton = None):
+        self.keywords = list(keywords)
+        self.whole_words = whole_words
+
+        # Нормализованная фраза -> индексы исходных ключей (дубли после lower() допустимы)
+        self.keyword_indexes: Dict[str, List[int]] = {}
+        for index, keyword in enumerate(self.keywords):
+            pattern = normalize_keyword(keyword)
+            if pattern:
+                self.keyword_indexes.setdefault(pattern, []).append(index)
+
+        self.automaton = None
+        if not whole_words:
+            self.automaton = automaton or AhoCorasickAutomaton(sorted(self.keyword_indexes))
+
+    def find_all(self, text: str) -> List[str]:
+        """Возвращает все ключи, найденные в тексте, в порядке исходного списка"""
+        if not text or not self.keyword_indexes:
+            return []
+
+        text_lower = text.lower()
+        if self.whole_words:
+            patterns = [word for word in set(text_lower.split()) if word in self.keyword_indexes]
+        else:
+            patterns = [self.automaton.patterns[pattern_id] for pattern_id in self.automaton.search(text_lower)]
+
+        indexes = sorted(index for pattern in patterns for index in self.keyword_indexes[pattern])
+        return [self.keywords[index] for index in indexes]
+
+    def matches(self, text: str) -> bool:
+        """Есть ли в тексте хотя бы один ключ"""
+        return bool(self.find_all(text))
+
+
+def keyword_fingerprint(keywords: Iterable[str]) -> str:
+    """Отпечаток набора ключей: не зависит от порядка, регистра и повторов"""
+    normalized = sorted({normalize_keyword(keyword) for keyword in keywords} - {""})
+    return hashlib.blake2b("\n".join(normalized).encode("utf-8"), digest_size=16).hexdigest()
+
+
+_automata: "OrderedDict[str, AhoCorasickAutomaton]" = OrderedDict()
+_cache_lock = threading.Lock()
+_cache_stats = {"hits": 0, "misses": 0}
+
+
+def get_keyword_matcher(keywords: Iterable[str], whole_words: bool = False) -> KeywordMatcher:
+    """
+    Возвращает матчер для набора ключей, автомат берётся из LRU-кэша по отпечатку
+
+    Для переупорядоченного набора с тем же отпечатком используется уже
+    построенный автомат; меняется только дешёвое отображение на исходные ключи.
+    """
+    keywords = list(keywords)
+    if whole_words:
+        return KeywordMatcher(keywords, whole_words=True)
+
+    fingerprint = keyword_fingerprint(keywords)
+    with _cache_lock:
+        automaton = _automata.get(fingerprint)
+        if automaton is not None:
+            _automata.move_to_end(fingerprint)
+            _cache_stats["hits"] += 1
+            return KeywordMatcher(keywords, automaton=automaton)
+        _cache_stats["misses"] += 1
+
+    matcher = KeywordMatcher(keywords)
+    with _cache_lock:
+        _automata[fingerprint] = matcher.automaton
+        while len(_automata) > MATCHER_CACHE_SIZE:
+            _automata.popitem(last=False)
+    return matcher
+
+
+def get_matcher_cache_statistics() -> Dict[str, int]:
+    """Статистика кэша скомпилированных автоматов"""
+    with _cache_lock:
+        return {**_cache_stats, "size": len(_automata), "max_size": MATCHER_CACHE_SIZE}
@@ -0,0 +1,271 @@
+"""
+Однопроходный конвейер обработки публикаций
+
+Этапы (дедупликация, очистка текста, фильтрация, исключение по минус-словам)
+не строят промежуточных списков: каждый пост один раз проходит цепочку
+этапов, и первый отказавший этап отбрасывает его. Каждый этап ведёт свои
+счётчики, поэтому статистика по этапам сохраняется.
+"""
+
+import hashlib
+from typing import Any, Callable, Dict, List, Optional
+
+from src.plugins.post_processor.filter.keyword_matcher import get_keyword_matcher
+from src.plugins.post_processor.process_pool import LAZY_PRECHECK_KEYWORDS
+from src.plugins.post_processor.processing_cache import content_digest
+
+
+def link_hash_key(post: Dict[str, Any]) -> Any:
+    """Ключ дедупликации оптимизированных методов: link_hash или ссылка"""
+    return post.get("link_hash", post.get("link", ""))
+
+
+def link_md5_key(post: Dict[str, Any]) -> Optional[str]:
+    """Ключ DeduplicationPlugin.remove_duplicates_by_link_hash: посты без ссылки отбрасываются"""
+    link = post.get("link")
+    if not link:
+        return None
+    return hashlib.md5(link.encode("utf-8"), usedforsecurity=False).hexdigest()
+
+
+class Stage:
+    """Этап конвейера: process(post) возвращает False, если пост отброшен"""
+
+    name = "stage"
+    # Может ли этап остановить весь проход (ранний выход)
+    can_stop = False
+
+    def __init__(self):
+        self.passed = 0
+        self.dropped = 0
+        self.exhausted = False
+
+    def process(self, post: Dict[str, Any]) -> bool:
+        raise NotImplementedError
+
+    def get_counters(self) -> Dict[str, Any]:
+        return {"passed": self.passed, "dropped": self.dropped}
+
+
+class DeduplicationStage(Stage):
+    """
+    Пропускает первое вхождение ключа
+
+    seen можно передать снаружи, чтобы помнить ключи между вызовами;
+    limit останавливает проход после limit уникальных постов;
+    drop_missing отбрасывает посты, для которых ключ равен None.
+    """
+
+    name = "deduplication"
+    can_stop = True
+
+    def __init__(
+        self,
+        key: Callable[[Dict[str, Any]], Any] = link_hash_key,
+        seen: set = None,
+        limit: int = None,
+        drop_missing: bool = False,
+    ):
+        super().__init__()
+        self.key = key
+        self.seen = set() if seen is None else seen
+        self.limit = limit
+        self.drop_missing = drop_missing
+
+    def process(self, post):
+        key = self.key(post)
+        if key in self.seen or (key is None and self.drop_missing):
+            self.dropped += 1
+            return False
+        self.seen.add(key)
+        self.passed += 1
+        if self.limit is not None and self.passed >= self.limit:
+            self.exhausted = True
+        return True
+
+
+class LazyPrecheckStage(Stage):
+    """
+    Ленивая предварительная проверка перед очисткой текста
+
+    При exact_match пост без первых ключей в сыром тексте отбрасывается
+    до дорогой очистки.
+    """
+
+    name = "lazy_precheck"
+
+    def __init__(self, keywords: List[str], exact_match: bool = True):
+        super().__init__()
+        self.precheck = [keyword.lower() for keyword in keywords[:LAZY_PRECHECK_KEYWORDS]]
+        self.exact_match = exact_match
+
+    def process(self, post):
+        if not self.exact_match:
+            self.passed += 1
+            return True
+        text = (post.get("text") or "").lower()
+        if any(keyword in text for keyword in self.precheck):
+            self.passed += 1
+            return True
+        self.dropped += 1
+        return False
+
+
+class TextCleaningStage(Stage):
+    """
+    Записывает в post["cleaned_text"] полностью очищенный текст
+
+    cache - ProcessingCache; очищенный текст хранится по дайджесту исходного
+    текста в пространстве namespace (дайджест конфигурации очистки).
+    """
+
+    name = "text_processing"
+
+    def __init__(self, text_processing_plugin, cache=None, store: bool = True, namespace: str = "clean"):
+        super().__init__()
+        self.clean = text_processing_plugin.clean_text_completely
+        self.cache = cache
+        self.store = store
+        self.namespace = namespace
+        self.cache_hits = 0
+
+    def process(self, post):
+        text = post.get("text") or ""
+        if self.cache is None:
+            post["cleaned_text"] = self.clean(text)
+        else:
+            digest = content_digest(text)
+            cleaned_text = self.cache.get(self.namespace, digest)
+            if cleaned_text is None:
+                cleaned_text = self.clean(text)
+                if self.store:
+                    self.cache.set(self.namespace, digest, cleaned_text)
+            else:
+                self.cache_hits += 1
+            post["cleaned_text"] = cleaned_text
+        self.passed += 1
+        return True
+
+    def get_counters(self):
+        return {**super().get_counters(), "cache_hits": self.cache_hits}
+
+
+class KeywordFilterStage(Stage):
+    """
+    Пропускает посты хотя бы с одним ключом
+
+    match_post - функция FilterPlugin.build_post_matcher(); cache - ProcessingCache,
+    решение хранится по дайджесту текста, который проверяет match_post
+    (его возвращает post_text), в пространстве набора ключей.
+    """
+
+    name = "filtering"
+
+    def __init__(
+        self,
+        match_post: Callable[[Dict[str, Any]], List[str]],
+        cache=None,
+        cache_namespace: str = "match",
+        store: bool = True,
+        post_text: Callable[[Dict[str, Any]], str] = None,
+    ):
+        super().__init__()
+        self.match_post = match_post
+        self.cache = cache
+        self.cache_namespace = cache_namespace
+        self.store = store
+        self.post_text = post_text or (lambda post: str(post.get("text") or ""))
+        self.cache_hits = 0
+
+    def process(self, post):
+        if self.cache is None:
+            matches = bool(self.match_post(post))
+        else:
+            digest = content_digest(self.post_text(post))
+            matches = self.cache.get(self.cache_namespace, digest)
+            if matches is None:
+                matches = bool(self.match_post(post))
+                if self.store:
+                    self.cache.set(self.cache_namespace, digest, matches)
+            else:
+                self.cache_hits += 1
+
+        if matches:
+            self.passed += 1
+            return True
+        self.dropped += 1
+        return False
+
+    def get_counters(self):
+        return {**super().get_counters(), "cache_hits": self.cache_hits}
+
+
+class MinusWordStage(Stage):
+    """Отбрасывает посты, содержащие любое из минус-слов (подстрока без учёта регистра)"""
+
+    name = "minus_words"
+
+    def __init__(self, minus_words: List[str]):
+        super().__init__()
+        self.matcher = get_keyword_matcher(minus_words)
+
+    def process(self, post):
+        if self.matcher.matches(post.get("text") or ""):
+            self.dropped += 1
+            return False
+        self.passed += 1
+        return True
+
+
+class PostPipeline:
+    """Прогоняет посты через цепочку этапов за один проход"""
+
+    def __init__(self, stages: List[Stage]):
+        self.stages = stages
+
+    def run(self, posts: List[Dict[str, Any]], output: List[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Обрабатывает посты и возвращает прошедшие все этапы
+
+        output - список, в который дописываются результаты (например,
+        общий для нескольких батчей).
+        """
+        output = [] if output is None else output
+        stages = self.stages
+        stoppers = [stage for stage in stages if stage.can_stop]
+
+        for post in posts:
+            for stage in stages:
+                if not stage.process(post):
+                    break
+            else:
+                output.append(post)
+
+            if stoppers and any(stage.exhausted for stage in stoppers):
+                break
+
+        return output
+
+    def get_stage(self, name: str) -> Optional[Stage]:
+        """Первый этап с данным именем"""
+        return next((stage for stage in self.stages if stage.name == name), None)
+
+    def dropped(self, name: str) -> int:
+        """Сколько постов отбросили этапы с данным именем"""
+        return sum(stage.dropped for stage in self.stages if stage.name == name)
+
+    def passed(self, name: str) -> int:
+        """Сколько постов прошли этапы с данным именем"""
+        return sum(stage.passed for stage in self.stages if stage.name == name)
+
+    def get_stage_counters(self) -> Dict[str, Dict[str, Any]]:
+        """Счётчики по этапам в порядке цепочки"""
+        counters = {}
+        for stage in self.stages:
+            name = stage.name
+            suffix = 2
+            while name in counters:
+                name = f"{stage.name}_{suffix}"
+                suffix += 1
+            counters[name] = stage.get_counters()
+        return counters
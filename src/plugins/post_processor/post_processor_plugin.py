@@ -4,10 +4,29 @@
 """
 
 from datetime import datetime
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, List
 
 from src.core.event_system import EventType
 from src.plugins.base_plugin import BasePlugin
+from src.plugins.post_processor.pipeline import (
+    DeduplicationStage,
+    KeywordFilterStage,
+    LazyPrecheckStage,
+    MinusWordStage,
+    PostPipeline,
+    TextCleaningStage,
+    link_hash_key,
+    link_md5_key,
+)
+from src.plugins.post_processor.process_pool import PostProcessPool, default_worker_count, pack_post
+from src.plugins.post_processor.processing_cache import ProcessingCache, config_namespace, keyword_namespace
+from src.plugins.post_processor.text_processing.cleaning_engine import ENGINE_CONFIG_KEYS
+
+# Этапы process_posts() в порядке выполнения
+PROCESSING_STAGES = ("deduplication", "text_processing", "filtering")
+
+# Ранний выход process_posts_optimized(): столько уникальных постов достаточно
+OPTIMIZED_UNIQUE_LIMIT = 5000
 
 
 class PostProcessorPlugin(BasePlugin):
@@ -28,6 +47,14 @@ class PostProcessorPlugin(BasePlugin):
             "processing_order": ["deduplication", "filtering"],  # Порядок обработки
             "batch_size": 1000,
             "enable_logging": True,
+            "parallel_mode": "thread",  # thread, process - режим process_posts_parallel()
+            "process_workers": None,  # Число процессов (None - по числу ядер)
+            "process_chunk_size": 5000,  # Постов в одном чанке для процесса
+            "process_start_method": "spawn",  # spawn, forkserver, fork
+            "cache_max_entries": 100000,  # Записей кэша обработки в памяти
+            "cache_max_memory_mb": 64,  # Объём кэша обработки в памяти
+            "cache_path": None,  # SQLite-файл кэша между запусками (None - только память)
+            "cache_max_disk_mb": 256,  # Лимит файла кэша
         }
 
         # Связи с другими плагинами
@@ -36,6 +63,14 @@ class PostProcessorPlugin(BasePlugin):
         self.text_processing_plugin = None
         self.database_plugin = None
 
+        # Пул процессов создаётся при первом вызове многопроцессной обработки
+        self.process_pool = None
+
+        # Кэш очистки текста и решений фильтра создаётся при первом обращении;
+        # ссылки, уже встреченные process_posts_with_cache()
+        self.processing_cache = None
+        self._seen_links = set()
+
     def initialize(self) -> None:
         """Инициализация плагина"""
         self.log_info("Инициализация плагина PostProcessor")
@@ -51,6 +86,14 @@ class PostProcessorPlugin(BasePlugin):
         """Завершение работы плагина"""
         self.log_info("Завершение работы плагина PostProcessor")
 
+        if self.process_pool is not None:
+            self.process_pool.close()
+            self.process_pool = None
+
+        if self.processing_cache is not None:
+            self.processing_cache.close()
+            self.processing_cache = None
+
         self.emit_event(EventType.PLUGIN_UNLOADED, {"status": "shutdown"})
         self.log_info("Плагин PostProcessor завершен")
 
@@ -73,6 +116,8 @@ class PostProcessorPlugin(BasePlugin):
                 "text_processing": self.text_processing_plugin is not None,
                 "database": self.database_plugin is not None,
             },
+            "process_pool": self.process_pool.get_statistics() if self.process_pool else {"running": False},
+            "processing_cache": self.get_cache_stats(),
         }
 
     def set_filter_plugin(self, filter_plugin):
@@ -95,6 +140,79 @@ class PostProcessorPlugin(BasePlugin):
         self.database_plugin = database_plugin
         self.log_info("DatabasePlugin подключен к PostProcessorPlugin")
 
+    def build_pipeline(
+        self,
+        stages: List[str],
+        keywords: List[str] = None,
+        exact_match: bool = True,
+        minus_words: List[str] = None,
+        dedup_key: Callable[[Dict[str, Any]], Any] = link_hash_key,
+        dedup_seen: set = None,
+        dedup_limit: int = None,
+        dedup_drop_missing: bool = False,
+        use_cache: bool = False,
+        cache_results: bool = True,
+    ) -> PostPipeline:
+        """
+        Собирает однопроходный конвейер из именованных этапов
+
+        Args:
+            stages: Этапы в порядке применения: deduplication, lazy_precheck,
+                text_processing, filtering, minus_words
+            dedup_key: Ключ дедупликации (по умолчанию link_hash или ссылка)
+            dedup_seen: Внешнее множество уже встреченных ключей
+            dedup_limit: Ранний выход после стольких уникальных постов
+            dedup_drop_missing: Отбрасывать посты, для которых dedup_key вернул None
+            use_cache: Кэшировать очистку текста и решения фильтра в processing_cache
+            cache_results: Сохранять ли новые результаты в кэш
+
+        Returns:
+            PostPipeline; этапы без нужного плагина или ключей пропускаются
+        """
+        cache = self._get_processing_cache() if use_cache else None
+        built = []
+
+        for name in stages:
+            if name == "deduplication":
+                built.append(DeduplicationStage(dedup_key, dedup_seen, dedup_limit, dedup_drop_missing))
+            elif name == "lazy_precheck" and keywords:
+                built.append(LazyPrecheckStage(keywords, exact_match))
+            elif name == "text_processing" and self.text_processing_plugin:
+                text_config = self.text_processing_plugin.config
+                built.append(
+                    TextCleaningStage(
+                        self.text_processing_plugin,
+                        cache,
+                        cache_results,
+                        config_namespace("clean", {key: text_config.get(key) for key in ENGINE_CONFIG_KEYS}),
+                    )
+                )
+            elif name == "filtering" and keywords and self.filter_plugin:
+                built.append(
+                    KeywordFilterStage(
+                        self.filter_plugin.build_post_matcher(keywords, exact_match),
+                        cache,
+                        keyword_namespace("match", keywords, exact_match),
+                        cache_results,
+                        self.filter_plugin.post_text_getter(),
+                    )
+                )
+            elif name == "minus_words" and minus_words:
+                built.append(MinusWordStage(minus_words))
+
+        return PostPipeline(built)
+
+    def _get_processing_cache(self) -> ProcessingCache:
+        """Кэш обработки, создаётся при первом обращении по настройкам cache_*"""
+        if self.processing_cache is None:
+            self.processing_cache = ProcessingCache(
+                max_entries=self.config["cache_max_entries"],
+                max_memory_mb=self.config["cache_max_memory_mb"],
+                db_path=self.config["cache_path"],
+                max_disk_mb=self.config["cache_max_disk_mb"],
+            )
+        return self.processing_cache
+
     def process_posts(
         self,
         posts: List[Dict[str, Any]],
@@ -102,6 +220,8 @@ class PostProcessorPlugin(BasePlugin):
         exact_match: bool = True,
         remove_duplicates: bool = True,
         processing_order: List[str] = None,
+        minus_words: List[str] = None,
+        use_cache: bool = False,
     ) -> Dict[str, Any]:
         """
         Централизованная обработка публикаций
@@ -112,6 +232,8 @@ class PostProcessorPlugin(BasePlugin):
             exact_match: Точное совпадение для фильтрации
             remove_duplicates: Удалять ли дубликаты
             processing_order: Порядок обработки ['deduplication', 'filtering']
+            minus_words: Исключать публикации с этими словами (этап перед фильтрацией)
+            use_cache: Брать очищенный текст и решения фильтра из кэша обработки
 
         Returns:
             Словарь с результатами обработки
@@ -128,7 +250,6 @@ class PostProcessorPlugin(BasePlugin):
 
         start_time = datetime.now()
         original_count = len(posts)
-        current_posts = posts.copy()
 
         # Определяем порядок обработки (правильный: deduplication → text_processing → filtering)
         if processing_order is None:
@@ -137,40 +258,49 @@ class PostProcessorPlugin(BasePlugin):
         self.log_info(f"🚀 Начало обработки {original_count} публикаций")
         self.log_info(f"📋 Порядок обработки: {processing_order}")
 
-        # Этап 1: Удаление дубликатов
-        duplicates_removed = 0
-        if remove_duplicates and "deduplication" in processing_order:
-            if self.deduplication_plugin:
-                before_count = len(current_posts)
-                current_posts = self.deduplication_plugin.remove_duplicates_by_link_hash(current_posts)
-                duplicates_removed = before_count - len(current_posts)
-                self.log_info(f"🗑️ Этап 1: Удалено {duplicates_removed} дубликатов")
-            else:
-                self.log_warning("DeduplicationPlugin не подключен")
-
-        # Этап 2: Обработка текста (только если нужна фильтрация)
-        text_processed = 0
-        if keywords and "text_processing" in processing_order:
-            if self.text_processing_plugin:
-                before_count = len(current_posts)
-                current_posts = self.text_processing_plugin.process_posts_text(current_posts)
-                text_processed = before_count  # Количество обработанных текстов
-                self.log_info(f"📝 Этап 2: Обработано {text_processed} текстов")
-            else:
-                self.log_warning("TextProcessingPlugin не подключен")
-
-        # Этап 3: Фильтрация по ключевым словам
-        filtered_count = 0
-        if keywords and "filtering" in processing_order:
-            if self.filter_plugin:
-                before_count = len(current_posts)
-                current_posts = self.filter_plugin.filter_posts_by_multiple_keywords(
-                    current_posts, keywords, exact_match
-                )
-                filtered_count = before_count - len(current_posts)
-                self.log_info(f"🔍 Этап 3: Отфильтровано {filtered_count} публикаций")
-            else:
-                self.log_warning("FilterPlugin не подключен")
+        # Этапы всегда выполняются в порядке deduplication → text_processing → filtering,
+        # processing_order только включает их
+        stages = []
+        for name in PROCESSING_STAGES:
+            if name not in processing_order:
+                continue
+            if name == "deduplication" and remove_duplicates:
+                if self.deduplication_plugin:
+                    stages.append(name)
+                else:
+                    self.log_warning("DeduplicationPlugin не подключен")
+            elif name == "text_processing" and keywords:
+                if self.text_processing_plugin:
+                    stages.append(name)
+                else:
+                    self.log_warning("TextProcessingPlugin не подключен")
+            elif name == "filtering" and keywords:
+                if self.filter_plugin:
+                    stages.append(name)
+                else:
+                    self.log_warning("FilterPlugin не подключен")
+        if minus_words:
+            position = stages.index("filtering") if "filtering" in stages else len(stages)
+            stages.insert(position, "minus_words")
+
+        # Ключ как в DeduplicationPlugin.remove_duplicates_by_link_hash
+        pipeline = self.build_pipeline(
+            stages,
+            keywords,
+            exact_match,
+            minus_words,
+            dedup_key=link_md5_key,
+            dedup_drop_missing=True,
+            use_cache=use_cache,
+        )
+        current_posts = pipeline.run(posts)
+        if use_cache:
+            self.processing_cache.flush()
+
+        duplicates_removed = pipeline.dropped("deduplication")
+        text_processed = pipeline.passed("text_processing")
+        filtered_count = pipeline.dropped("filtering")
+        minus_words_excluded = pipeline.dropped("minus_words")
 
         # Вычисляем время обработки
         processing_time = (datetime.now() - start_time).total_seconds()
@@ -181,29 +311,41 @@ class PostProcessorPlugin(BasePlugin):
             "filtered_count": filtered_count,
             "duplicates_removed": duplicates_removed,
             "text_processed": text_processed,
+            "minus_words_excluded": minus_words_excluded,
             "processing_time": processing_time,
             "final_posts": current_posts,
             "processing_order": processing_order,
+            "stage_counters": pipeline.get_stage_counters(),
         }
 
         self.log_info(
             f"✅ Обработка завершена: {original_count} → {len(current_posts)} "
-            f"(дубликатов: {duplicates_removed}, текстов: {text_processed}, отфильтровано: {filtered_count})"
+            f"(дубликатов: {duplicates_removed}, текстов: {text_processed}, отфильтровано: {filtered_count}, "
+            f"минус-слова: {minus_words_excluded})"
         )
 
         return result
 
     def process_posts_from_database(
-        self, task_id: int, keywords: List[str] = None, exact_match: bool = True, remove_duplicates: bool = True
+        self,
+        task_id: int,
+        keywords: List[str] = None,
+        exact_match: bool = True,
+        remove_duplicates: bool = True,
+        use_cache: bool = True,
     ) -> Dict[str, Any]:
         """
         Обработка публикаций из базы данных
 
+        Повторная обработка той же задачи с теми же ключами берёт очищенный
+        текст и решения фильтра из кэша обработки.
+
         Args:
             task_id: ID задачи
             keywords: Ключевые слова для фильтрации
             exact_match: Точное совпадение
             remove_duplicates: Удалять ли дубликаты
+            use_cache: Использовать кэш обработки
 
         Returns:
             Словарь с результатами обработки
@@ -221,7 +363,7 @@ class PostProcessorPlugin(BasePlugin):
                 return {"task_id": task_id, "posts_count": 0}
 
             # Обрабатываем публикации
-            result = self.process_posts(posts, keywords, exact_match, remove_duplicates)
+            result = self.process_posts(posts, keywords, exact_match, remove_duplicates, use_cache=use_cache)
             result["task_id"] = task_id
 
             return result
@@ -317,75 +459,26 @@ class PostProcessorPlugin(BasePlugin):
         start_time = datetime.now()
         self.log_info(f"🚀 Запуск оптимизированной обработки {len(posts)} публикаций")
 
-        current_posts = posts.copy()
         original_count = len(posts)
+        pipeline = self.build_pipeline(
+            self._optimized_stages(keywords, lazy_processing),
+            keywords,
+            exact_match,
+            dedup_limit=OPTIMIZED_UNIQUE_LIMIT if early_termination else None,
+        )
+        current_posts = pipeline.run(posts)
+
+        dedup_stage = pipeline.get_stage("deduplication")
         stats = {
             "original_count": original_count,
-            "duplicates_removed": 0,
-            "text_processed": 0,
-            "filtered_count": 0,
-            "early_exit": False,
-            "lazy_skips": 0
+            "duplicates_removed": pipeline.dropped("deduplication"),
+            "text_processed": pipeline.passed("text_processing"),
+            "filtered_count": pipeline.dropped("filtering"),
+            "early_exit": bool(dedup_stage and dedup_stage.exhausted),
+            "lazy_skips": pipeline.dropped("lazy_precheck")
         }
-
-        # Этап 1: Быстрая дедупликация по хэшам ссылок
-        if self.config.get("enable_deduplication", True):
-            before_count = len(current_posts)
-            seen_links = set()
-            unique_posts = []
-
-            for post in current_posts:
-                link_hash = post.get('link_hash', post.get('link', ''))
-                if link_hash not in seen_links:
-                    seen_links.add(link_hash)
-                    unique_posts.append(post)
-
-                # Ранний выход если достигли разумного лимита
-                if early_termination and len(unique_posts) >= 5000:
-                    stats["early_exit"] = True
-                    self.log_info("⚡ Ранний выход: достигнут лимит 5000 уникальных постов")
-                    break
-
-            current_posts = unique_posts
-            stats["duplicates_removed"] = before_count - len(current_posts)
-            self.log_info(f"🔗 Дедупликация: удалено {stats['duplicates_removed']} дубликатов")
-
-        # Этап 2: Ленивая обработка текста (только если есть фильтрация)
-        if keywords and lazy_processing:
-            # Обрабатываем текст только для постов, которые потенциально пройдут фильтрацию
-            if self.text_processing_plugin:
-                processed_posts = []
-                for post in current_posts:
-                    # Быстрая предварительная проверка
-                    text = post.get('text', '').lower()
-                    has_keywords = any(kw.lower() in text for kw in keywords[:3])  # Проверяем только первые 3
-
-                    if has_keywords or not exact_match:
-                        # Обрабатываем текст только у потенциально подходящих постов
-                        processed_text = self.text_processing_plugin.clean_text_completely(post.get('text', ''))
-                        post['cleaned_text'] = processed_text
-                        processed_posts.append(post)
-                        stats["text_processed"] += 1
-                    else:
-                        # Пропускаем обработку заведомо не подходящих постов
-                        stats["lazy_skips"] += 1
-
-                current_posts = processed_posts
-                self.log_info(f"📝 Ленивая обработка: {stats['text_processed']} текстов, пропущено {stats['lazy_skips']}")
-
-        # Этап 3: Оптимизированная фильтрация
-        if keywords and self.filter_plugin:
-            before_count = len(current_posts)
-            # Используем cleaned_text если доступен, иначе обычный text
-            for post in current_posts:
-                if 'cleaned_text' not in post and self.text_processing_plugin:
-                    post['cleaned_text'] = self.text_processing_plugin.clean_text_completely(post.get('text', ''))
-
-            current_posts = self.filter_plugin.filter_posts_by_multiple_keywords(
-                current_posts, keywords, exact_match
-            )
-            stats["filtered_count"] = before_count - len(current_posts)
-            self.log_info(f"🔍 Фильтрация: отфильтровано {stats['filtered_count']} публикаций")
+        if stats["early_exit"]:
+            self.log_info(f"⚡ Ранний выход: достигнут лимит {OPTIMIZED_UNIQUE_LIMIT} уникальных постов")
 
         # Финальная статистика
         processing_time = (datetime.now() - start_time).total_seconds()
@@ -394,6 +487,7 @@ class PostProcessorPlugin(BasePlugin):
             "final_count": len(current_posts),
             "processing_time": processing_time,
             "final_posts": current_posts,
+            "stage_counters": pipeline.get_stage_counters(),
             "optimization_level": "high"
         }
 
@@ -404,6 +498,24 @@ class PostProcessorPlugin(BasePlugin):
 
         return result
 
+    def _optimized_stages(self, keywords: List[str], lazy_processing: bool) -> List[str]:
+        """
+        Этапы process_posts_optimized()
+
+        Ленивый режим проверяет первые ключи в сыром тексте до очистки;
+        без него очищается текст всех постов, дошедших до фильтрации.
+        """
+        stages = []
+        if self.config.get("enable_deduplication", True):
+            stages.append("deduplication")
+        if keywords and lazy_processing and self.text_processing_plugin:
+            stages += ["lazy_precheck", "text_processing"]
+        if keywords and self.filter_plugin:
+            if not lazy_processing:
+                stages.append("text_processing")
+            stages.append("filtering")
+        return stages
+
     def process_posts_in_batches(
         self,
         posts: List[Dict],
@@ -414,6 +526,9 @@ class PostProcessorPlugin(BasePlugin):
         """
         Батчевая обработка больших объёмов данных
 
+        Дедупликация идёт внутри батча, а завершающий этап конвейера убирает
+        дубликаты между батчами - без отдельного прохода по результатам.
+
         Args:
             posts: Список публикаций
             keywords: Ключевые слова
@@ -427,54 +542,33 @@ class PostProcessorPlugin(BasePlugin):
         total_posts = len(posts)
         self.log_info(f"📦 Батчевая обработка {total_posts} публикаций (батч: {batch_size})")
 
-        all_results = []
-        total_stats = {
-            "original_count": total_posts,
-            "batches_processed": 0,
-            "duplicates_removed": 0,
-            "text_processed": 0,
-            "filtered_count": 0
-        }
+        pipeline = self.build_pipeline(self._optimized_stages(keywords, True), keywords, exact_match)
+        batch_dedup = pipeline.get_stage("deduplication")
+        cross_batch_dedup = DeduplicationStage()
+        pipeline.stages.append(cross_batch_dedup)
 
-        # Обрабатываем батчами
+        final_unique = []
+        total_batches = (total_posts + batch_size - 1) // batch_size
         for i in range(0, total_posts, batch_size):
-            batch = posts[i:i + batch_size]
             batch_num = (i // batch_size) + 1
-            total_batches = (total_posts + batch_size - 1) // batch_size
-
-            self.log_info(f"📦 Обработка батча {batch_num}/{total_batches} ({len(batch)} постов)")
-
-            # Обрабатываем текущий батч
-            batch_result = self.process_posts_optimized(
-                batch, keywords, exact_match,
-                early_termination=False,  # Не прерываем батчи досрочно
-                lazy_processing=True
-            )
+            if batch_dedup is not None:
+                batch_dedup.seen = set()
 
-            # Собираем результаты
-            all_results.extend(batch_result["final_posts"])
-            total_stats["duplicates_removed"] += batch_result["duplicates_removed"]
-            total_stats["text_processed"] += batch_result["text_processed"]
-            total_stats["filtered_count"] += batch_result["filtered_count"]
-            total_stats["batches_processed"] += 1
+            pipeline.run(posts[i:i + batch_size], output=final_unique)
 
             # Прогресс
             if batch_num % 5 == 0 or batch_num == total_batches:
                 progress = (batch_num / total_batches) * 100
                 self.log_info(f"📊 Прогресс: {progress:.1f}% ({batch_num}/{total_batches} батчей)")
 
-        # Финальная дедупликация между батчами
-        self.log_info("🔗 Финальная дедупликация между батчами...")
-        seen_links = set()
-        final_unique = []
-        for post in all_results:
-            link_hash = post.get('link_hash', post.get('link', ''))
-            if link_hash not in seen_links:
-                seen_links.add(link_hash)
-                final_unique.append(post)
-
-        cross_batch_duplicates = len(all_results) - len(final_unique)
-        total_stats["duplicates_removed"] += cross_batch_duplicates
+        cross_batch_duplicates = cross_batch_dedup.dropped
+        total_stats = {
+            "original_count": total_posts,
+            "batches_processed": total_batches,
+            "duplicates_removed": pipeline.dropped("deduplication"),
+            "text_processed": pipeline.passed("text_processing"),
+            "filtered_count": pipeline.dropped("filtering")
+        }
 
         processing_time = (datetime.now() - start_time).total_seconds()
         result = {
@@ -484,6 +578,7 @@ class PostProcessorPlugin(BasePlugin):
             "processing_time": processing_time,
             "batch_size": batch_size,
             "final_posts": final_unique,
+            "stage_counters": pipeline.get_stage_counters(),
             "optimization_level": "batch"
         }
 
@@ -513,93 +608,33 @@ class PostProcessorPlugin(BasePlugin):
         start_time = datetime.now()
         self.log_info(f"💾 Обработка с кэшированием {len(posts)} публикаций")
 
-        # Инициализация кэша (простая реализация в памяти)
-        if not hasattr(self, '_processing_cache'):
-            self._processing_cache = {
-                'text_processing': {},  # hash -> cleaned_text
-                'filtering': {},        # (text_hash, keywords_hash) -> bool
-                'duplicates': set()     # link_hashes
-            }
-
-        current_posts = posts.copy()
         original_count = len(posts)
-        cache_hits = {"text": 0, "filter": 0, "dedup": 0}
-
-        # Этап 1: Дедупликация с кэшем
-        if self.config.get("enable_deduplication", True):
-            before_count = len(current_posts)
-            unique_posts = []
-
-            for post in current_posts:
-                link_hash = post.get('link_hash', post.get('link', ''))
-
-                if link_hash in self._processing_cache['duplicates']:
-                    cache_hits["dedup"] += 1
-                    continue  # Пропускаем известный дубликат
-                else:
-                    self._processing_cache['duplicates'].add(link_hash)
-                    unique_posts.append(post)
-
-            current_posts = unique_posts
-            duplicates_removed = before_count - len(current_posts)
-            self.log_info(f"🔗 Дедупликация: удалено {duplicates_removed} дубликатов (кэш: {cache_hits['dedup']})")
-
-        # Этап 2: Обработка текста с кэшем
-        text_processed = 0
-        if keywords and self.text_processing_plugin:
-            for post in current_posts:
-                text = post.get('text', '')
-                text_hash = str(hash(text))
-
-                if text_hash in self._processing_cache['text_processing']:
-                    # Используем кэшированный результат
-                    post['cleaned_text'] = self._processing_cache['text_processing'][text_hash]
-                    cache_hits["text"] += 1
-                else:
-                    # Обрабатываем и кэшируем
-                    cleaned_text = self.text_processing_plugin.clean_text_completely(text)
-                    post['cleaned_text'] = cleaned_text
-                    if cache_results:
-                        self._processing_cache['text_processing'][text_hash] = cleaned_text
-
-                text_processed += 1
-
-            self.log_info(f"📝 Обработка текста: {text_processed} текстов (кэш: {cache_hits['text']})")
-
-        # Этап 3: Фильтрация с кэшем
-        filtered_count = 0
-        if keywords and self.filter_plugin:
-            before_count = len(current_posts)
-            keywords_hash = str(hash(tuple(sorted(keywords)) + (exact_match,)))
-
-            filtered_posts = []
-            for post in current_posts:
-                text_to_check = post.get('cleaned_text', post.get('text', ''))
-                text_hash = str(hash(text_to_check))
-                cache_key = (text_hash, keywords_hash)
-
-                if cache_key in self._processing_cache['filtering']:
-                    # Используем кэшированный результат
-                    if self._processing_cache['filtering'][cache_key]:
-                        filtered_posts.append(post)
-                    cache_hits["filter"] += 1
-                else:
-                    # Проверяем и кэшируем результат
-                    # Используем стандартный метод фильтрации для одного поста
-                    single_post_result = self.filter_plugin.filter_posts_by_multiple_keywords(
-                        [post], keywords, exact_match
-                    )
-                    matches = len(single_post_result) > 0
-
-                    if cache_results:
-                        self._processing_cache['filtering'][cache_key] = matches
-
-                    if matches:
-                        filtered_posts.append(post)
-
-            current_posts = filtered_posts
-            filtered_count = before_count - len(current_posts)
-            self.log_info(f"🔍 Фильтрация: отфильтровано {filtered_count} публикаций (кэш: {cache_hits['filter']})")
+        stages = ["deduplication"] if self.config.get("enable_deduplication", True) else []
+        if keywords:
+            stages += ["text_processing", "filtering"]
+
+        pipeline = self.build_pipeline(
+            stages,
+            keywords,
+            exact_match,
+            dedup_seen=self._seen_links,
+            use_cache=True,
+            cache_results=cache_results,
+        )
+        current_posts = pipeline.run(posts)
+        self.processing_cache.flush()
+
+        text_stage = pipeline.get_stage("text_processing")
+        filter_stage = pipeline.get_stage("filtering")
+        duplicates_removed = pipeline.dropped("deduplication")
+        text_processed = pipeline.passed("text_processing")
+        filtered_count = pipeline.dropped("filtering")
+        cache_hits = {
+            "text": text_stage.cache_hits if text_stage else 0,
+            "filter": filter_stage.cache_hits if filter_stage else 0,
+            # Каждый отброшенный дубликат - попадание в кэш известных ссылок
+            "dedup": duplicates_removed,
+        }
 
         processing_time = (datetime.now() - start_time).total_seconds()
         cache_efficiency = sum(cache_hits.values()) / max(original_count, 1) * 100
@@ -614,6 +649,7 @@ class PostProcessorPlugin(BasePlugin):
             "cache_efficiency": cache_efficiency,
             "processing_time": processing_time,
             "final_posts": current_posts,
+            "stage_counters": pipeline.get_stage_counters(),
             "optimization_level": "cached"
         }
 
@@ -629,7 +665,8 @@ class PostProcessorPlugin(BasePlugin):
         posts: List[Dict],
         keywords: List[str] = None,
         exact_match: bool = True,
-        max_workers: int = None
+        max_workers: int = None,
+        mode: str = None
     ) -> Dict[str, Any]:
         """
         Параллельная обработка с использованием ThreadPoolExecutor
@@ -639,7 +676,12 @@ class PostProcessorPlugin(BasePlugin):
             keywords: Ключевые слова
             exact_match: Точное совпадение
             max_workers: Количество потоков
+            mode: "thread" или "process" (по умолчанию parallel_mode из конфига);
+                "process" выполняет process_posts_multiprocess()
         """
+        if (mode or self.config.get("parallel_mode", "thread")) == "process":
+            return self.process_posts_multiprocess(posts, keywords, exact_match, max_workers)
+
         start_time = datetime.now()
 
         try:
@@ -728,6 +770,110 @@ class PostProcessorPlugin(BasePlugin):
 
         return result
 
+    def process_posts_multiprocess(
+        self,
+        posts: List[Dict],
+        keywords: List[str] = None,
+        exact_match: bool = True,
+        max_workers: int = None,
+        chunk_size: int = None
+    ) -> Dict[str, Any]:
+        """
+        Многоядерная обработка в долгоживущем пуле процессов
+
+        Результат совпадает с process_posts_optimized() без раннего выхода.
+        Дедупликация по link_hash выполняется по всему набору в родительском
+        процессе, ленивая очистка текста и фильтрация - по чанкам в процессах
+        пула; результаты чанков объединяются в исходном порядке.
+
+        Args:
+            posts: Список публикаций
+            keywords: Ключевые слова
+            exact_match: Точное совпадение
+            max_workers: Количество процессов (по умолчанию process_workers или число ядер)
+            chunk_size: Постов в чанке (по умолчанию process_chunk_size)
+        """
+        start_time = datetime.now()
+
+        if max_workers is None:
+            max_workers = self.config.get("process_workers") or default_worker_count()
+        if chunk_size is None:
+            chunk_size = self.config.get("process_chunk_size", 5000)
+
+        total_posts = len(posts)
+        self.log_info(f"⚡ Многопроцессная обработка {total_posts} публикаций ({max_workers} процессов)")
+
+        if self.process_pool is None:
+            self.process_pool = PostProcessPool(self.config.get("process_start_method", "spawn"))
+
+        # Дедупликация по всему набору до отправки: в процессы уходят только уникальные посты
+        unique_posts = posts
+        if self.config.get("enable_deduplication", True):
+            seen_links = set()
+            unique_posts = []
+            for post in posts:
+                link_hash = post.get('link_hash', post.get('link', ''))
+                if link_hash not in seen_links:
+                    seen_links.add(link_hash)
+                    unique_posts.append(post)
+
+        options = {
+            "clean_text": self.text_processing_plugin is not None,
+            "filter": self.filter_plugin is not None,
+        }
+        text_config = self.text_processing_plugin.config if self.text_processing_plugin else {}
+
+        chunk_starts = range(0, len(unique_posts), chunk_size)
+        chunks = [[pack_post(post) for post in unique_posts[start:start + chunk_size]] for start in chunk_starts]
+
+        total_stats = {
+            "original_count": total_posts,
+            "processes_used": min(max_workers, len(chunks)),
+            "chunks_processed": len(chunks),
+            "duplicates_removed": total_posts - len(unique_posts),
+            "text_processed": 0,
+            "lazy_skips": 0,
+            "filtered_count": 0
+        }
+
+        final_posts = []
+        try:
+            chunk_results = self.process_pool.map_chunks(
+                chunks, keywords, exact_match, options, max_workers, text_config
+            ) if chunks else []
+            for start, (kept, chunk_stats) in zip(chunk_starts, chunk_results):
+                for name, value in chunk_stats.items():
+                    total_stats[name] += value
+
+                for index, cleaned_text in kept:
+                    post = unique_posts[start + index]
+                    if cleaned_text is not None:
+                        post['cleaned_text'] = cleaned_text
+                    final_posts.append(post)
+        except Exception as e:
+            # Упавший пул непригоден для следующих вызовов
+            self.log_error(f"❌ Ошибка многопроцессной обработки: {e}")
+            self.process_pool.close()
+            raise
+
+        processing_time = (datetime.now() - start_time).total_seconds()
+        result = {
+            **total_stats,
+            "final_count": len(final_posts),
+            "processing_time": processing_time,
+            "max_workers": max_workers,
+            "chunk_size": chunk_size,
+            "final_posts": final_posts,
+            "optimization_level": "multiprocess"
+        }
+
+        self.log_info(
+            f"✅ Многопроцессная обработка завершена за {processing_time:.2f}с: "
+            f"{total_posts} → {len(final_posts)} ({len(chunks)} чанков, {max_workers} процессов)"
+        )
+
+        return result
+
     def _process_chunk_thread_safe(
         self,
         chunk: List[Dict],
@@ -748,31 +894,27 @@ class PostProcessorPlugin(BasePlugin):
         )
 
     def clear_cache(self):
-        """Очистка кэша обработки"""
-        if hasattr(self, '_processing_cache'):
-            self._processing_cache = {
-                'text_processing': {},
-                'filtering': {},
-                'duplicates': set()
-            }
+        """Очистка кэша обработки (в памяти и в файле cache_path)"""
+        self._seen_links = set()
+        if self.processing_cache is not None:
+            self.processing_cache.clear()
             self.log_info("💾 Кэш обработки очищен")
 
     def get_cache_stats(self) -> Dict[str, Any]:
         """Получение статистики кэша"""
-        if not hasattr(self, '_processing_cache'):
+        if self.processing_cache is None:
             return {"cache_enabled": False}
 
-        cache = self._processing_cache
+        cache = self.processing_cache
+        text_cache_size = cache.count("clean")
+        filter_cache_size = cache.count("match")
         return {
             "cache_enabled": True,
-            "text_cache_size": len(cache['text_processing']),
-            "filter_cache_size": len(cache['filtering']),
-            "duplicates_cache_size": len(cache['duplicates']),
-            "total_memory_items": (
-                len(cache['text_processing']) +
-                len(cache['filtering']) +
-                len(cache['duplicates'])
-            )
+            "text_cache_size": text_cache_size,
+            "filter_cache_size": filter_cache_size,
+            "duplicates_cache_size": len(self._seen_links),
+            "total_memory_items": text_cache_size + filter_cache_size + len(self._seen_links),
+            **cache.get_statistics(),
         }
 
     # === КОНЕЦ ОПТИМИЗИРОВАННЫХ МЕТОДОВ ===
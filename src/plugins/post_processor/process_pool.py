@@ -0,0 +1,164 @@
+"""
+Пул процессов для многоядерной обработки публикаций
+
+Очистка текста и фильтрация - чистый Python, поэтому потоки упираются в GIL.
+Пул процессов живёт между вызовами: каждый воркер один раз получает
+конфигурацию очистки текста и заранее компилирует матчеры ключевых слов.
+В воркер уходят не словари постов, а компактные кортежи (текст, текст для
+фильтра); обратно возвращаются только индексы прошедших постов и их
+очищенный текст. Сами словари постов остаются в родительском процессе
+и меняются только им.
+"""
+
+import hashlib
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from src.plugins.post_processor.filter.keyword_matcher import get_keyword_matcher
+
+# Поля поста, из которых FilterPlugin берёт текст (в том же порядке)
+FILTER_TEXT_KEYS = ("text", "message", "content", "body")
+
+# Сколько первых ключей проверяется при ленивой предварительной проверке
+LAZY_PRECHECK_KEYWORDS = 3
+
+# Состояние процесса-воркера, заполняется в init_worker()
+_worker_state: Dict[str, Any] = {}
+
+
+def pack_post(post: Dict[str, Any]) -> Tuple[str, Optional[str]]:
+    """Компактное представление поста для передачи в воркер"""
+    text = post.get("text") or ""
+    filter_text = ""
+    for key in FILTER_TEXT_KEYS:
+        if post.get(key):
+            filter_text = str(post[key])
+            break
+    # Текст для фильтра обычно совпадает с text - не передаём его дважды
+    return text, None if filter_text == text else filter_text
+
+
+def init_worker(text_config: Dict[str, Any], keyword_sets: List[List[str]]) -> None:
+    """Инициализация воркера: очистка текста по конфигурации и прогрев матчеров"""
+    from src.plugins.post_processor.text_processing.text_processing_plugin import TextProcessingPlugin
+
+    text_plugin = TextProcessingPlugin()
+    text_plugin.config.update(text_config)
+    _worker_state["text_plugin"] = text_plugin
+
+    for keywords in keyword_sets:
+        get_keyword_matcher(keywords)
+
+
+def process_chunk(
+    records: List[Tuple[str, Optional[str]]], keywords: List[str], exact_match: bool, options: Dict[str, bool]
+) -> Tuple[List[Tuple[int, Optional[str]]], Dict[str, int]]:
+    """
+    Обрабатывает чанк в воркере по правилам process_posts_optimized()
+
+    Этапы: ленивая очистка текста и фильтрация; дедупликацию по всему
+    набору выполняет родительский процесс до разбиения на чанки.
+
+    Returns:
+        ([(индекс в чанке, очищенный текст или None)], статистика чанка)
+    """
+    stats = {"text_processed": 0, "lazy_skips": 0, "filtered_count": 0}
+    text_plugin = _worker_state.get("text_plugin") if options["clean_text"] else None
+    indexes = range(len(records))
+
+    cleaned: Dict[int, str] = {}
+    if keywords and text_plugin is not None:
+        precheck = [keyword.lower() for keyword in keywords[:LAZY_PRECHECK_KEYWORDS]]
+        processed = []
+        for index in indexes:
+            text_lower = records[index][0].lower()
+            if not exact_match or any(keyword in text_lower for keyword in precheck):
+                processed.append(index)
+            else:
+                stats["lazy_skips"] += 1
+        # Прошедшие проверку тексты очищаются одной пачкой
+        cleaned = dict(zip(processed, text_plugin.clean_many([records[index][0] for index in processed])))
+        stats["text_processed"] = len(processed)
+        indexes = processed
+
+    if keywords and options["filter"]:
+        matcher = get_keyword_matcher(keywords)
+        before_count = len(indexes)
+        indexes = [
+            index
+            for index in indexes
+            if matcher.matches(records[index][0] if records[index][1] is None else records[index][1])
+        ]
+        stats["filtered_count"] = before_count - len(indexes)
+
+    return [(index, cleaned.get(index)) for index in indexes], stats
+
+
+class PostProcessPool:
+    """Долгоживущий ProcessPoolExecutor, пересоздаётся только при смене настроек"""
+
+    def __init__(self, start_method: str = "spawn"):
+        self.start_method = start_method
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.workers = 0
+        self.config_key: Optional[str] = None
+        self.stats = {"pools_created": 0, "chunks_processed": 0, "posts_sent": 0}
+
+    def get_executor(
+        self, workers: int, text_config: Dict[str, Any], keyword_sets: Iterable[List[str]] = ()
+    ) -> ProcessPoolExecutor:
+        """Возвращает пул на workers процессов с данной конфигурацией очистки текста"""
+        config_key = hashlib.blake2b(
+            json.dumps(text_config, sort_keys=True, default=str).encode("utf-8"), digest_size=8
+        ).hexdigest()
+        if self.executor is not None and self.workers == workers and self.config_key == config_key:
+            return self.executor
+
+        self.close()
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context(self.start_method),
+            initializer=init_worker,
+            initargs=(dict(text_config), [list(keywords) for keywords in keyword_sets]),
+        )
+        self.workers = workers
+        self.config_key = config_key
+        self.stats["pools_created"] += 1
+        return self.executor
+
+    def map_chunks(
+        self,
+        chunks: List[List[Tuple[str, Optional[str]]]],
+        keywords: List[str],
+        exact_match: bool,
+        options: Dict[str, bool],
+        workers: int,
+        text_config: Dict[str, Any],
+    ):
+        """Обрабатывает чанки в пуле; результаты возвращаются в порядке чанков"""
+        executor = self.get_executor(workers, text_config, [keywords] if keywords else [])
+        self.stats["chunks_processed"] += len(chunks)
+        self.stats["posts_sent"] += sum(len(chunk) for chunk in chunks)
+
+        count = len(chunks)
+        return executor.map(process_chunk, chunks, [keywords] * count, [exact_match] * count, [options] * count)
+
+    def close(self) -> None:
+        """Останавливает процессы пула"""
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+        self.executor = None
+        self.workers = 0
+        self.config_key = None
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Статистика пула процессов"""
+        return {**self.stats, "running": self.executor is not None, "workers": self.workers}
+
+
+def default_worker_count() -> int:
+    """Число процессов по умолчанию - по числу ядер"""
+    return os.cpu_count() or 1
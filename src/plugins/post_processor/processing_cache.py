@@ -0,0 +1,258 @@
+"""
+Кэш результатов обработки публикаций с ключами по содержимому
+
+Ключ записи - (пространство, дайджест текста). Дайджест - blake2b от самого
+текста, пространство - дайджест конфигурации очистки или набора ключевых
+слов, поэтому ключи одинаковы в любом процессе и после перезапуска (в отличие
+от hash(), который солится в каждом процессе). В памяти записи хранятся
+в LRU с лимитом по числу и по объёму; при заданном db_path они дублируются
+в SQLite-файл и переживают перезапуск.
+"""
+
+import hashlib
+import json
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from loguru import logger
+
+from src.plugins.post_processor.filter.keyword_matcher import keyword_fingerprint
+
+# Сколько отложенных записей накапливается до сброса на диск
+DISK_FLUSH_EVERY = 1000
+
+
+def content_digest(text: str) -> str:
+    """Стабильный дайджест текста"""
+    return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).hexdigest()
+
+
+def config_namespace(kind: str, config: Dict[str, Any]) -> str:
+    """Пространство ключей для результатов, зависящих от конфигурации"""
+    serialized = json.dumps(config, sort_keys=True, default=str)
+    return f"{kind}:{hashlib.blake2b(serialized.encode('utf-8'), digest_size=8).hexdigest()}"
+
+
+def keyword_namespace(kind: str, keywords: Iterable[str], *options: Any) -> str:
+    """Пространство ключей для результатов проверки набора ключевых слов с опциями"""
+    options_part = ",".join(str(option) for option in options)
+    return f"{kind}:{keyword_fingerprint(keywords)}:{options_part}"
+
+
+def _entry_size(digest: str, value: Any) -> int:
+    return sys.getsizeof(digest) + sys.getsizeof(value)
+
+
+class ProcessingCache:
+    """
+    LRU-кэш (очищенный текст, решения фильтра) с необязательным SQLite-файлом
+
+    Вытесняются давно не использованные записи, когда превышен max_entries
+    или max_memory_mb. Записи на диск откладываются и сбрасываются пачкой
+    (каждые DISK_FLUSH_EVERY записей и в flush()); файл ограничен max_disk_mb.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 100_000,
+        max_memory_mb: float = 64,
+        db_path: Optional[str] = None,
+        max_disk_mb: float = 256,
+    ):
+        self.max_entries = max_entries
+        self.max_memory_bytes = int(max_memory_mb * 1024 * 1024)
+        self.db_path = db_path
+        self.max_disk_bytes = int(max_disk_mb * 1024 * 1024)
+
+        self.lock = threading.Lock()
+        self.entries: "OrderedDict[Tuple[str, str], Any]" = OrderedDict()
+        self.memory_bytes = 0
+        # Число записей в памяти по виду пространства ("clean", "match", ...)
+        self.kind_counts: Counter = Counter()
+
+        self.connection: Optional[sqlite3.Connection] = None
+        self.pending: Dict[Tuple[str, str], Any] = {}
+
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "disk_hits": 0,
+            "writes": 0,
+            "evictions": 0,
+            "disk_evictions": 0,
+        }
+
+        if db_path:
+            self._open_disk()
+
+    def _open_disk(self) -> None:
+        try:
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+            self.connection = sqlite3.connect(self.db_path, check_same_thread=False)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            self.connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS entries (
+                    namespace TEXT NOT NULL,
+                    digest TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    last_access REAL NOT NULL,
+                    PRIMARY KEY (namespace, digest)
+                ) WITHOUT ROWID
+                """
+            )
+            self.connection.execute("CREATE INDEX IF NOT EXISTS idx_entries_last_access ON entries(last_access)")
+            self.connection.commit()
+        except sqlite3.Error as e:
+            logger.error(f"[ProcessingCache] Не удалось открыть кэш {self.db_path}: {e}")
+            self.connection = None
+
+    def get(self, namespace: str, digest: str) -> Optional[Any]:
+        """Значение записи или None"""
+        key = (namespace, digest)
+        with self.lock:
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return value
+
+            if self.connection is not None:
+                value = self.pending.get(key)
+                if value is None:
+                    row = self.connection.execute(
+                        "SELECT value FROM entries WHERE namespace = ? AND digest = ?", key
+                    ).fetchone()
+                    value = json.loads(row[0]) if row else None
+                if value is not None:
+                    self.stats["hits"] += 1
+                    self.stats["disk_hits"] += 1
+                    self._store_locked(key, value)
+                    return value
+
+            self.stats["misses"] += 1
+            return None
+
+    def set(self, namespace: str, digest: str, value: Any) -> None:
+        """Сохраняет запись (None не сохраняется)"""
+        if value is None:
+            return
+        key = (namespace, digest)
+        with self.lock:
+            self._store_locked(key, value)
+            self.stats["writes"] += 1
+            if self.connection is not None:
+                self.pending[key] = value
+                if len(self.pending) >= DISK_FLUSH_EVERY:
+                    self._flush_locked()
+
+    def _store_locked(self, key: Tuple[str, str], value: Any) -> None:
+        previous = self.entries.pop(key, None)
+        if previous is not None:
+            self.memory_bytes -= _entry_size(key[1], previous)
+            self.kind_counts[key[0].split(":", 1)[0]] -= 1
+
+        self.entries[key] = value
+        self.memory_bytes += _entry_size(key[1], value)
+        self.kind_counts[key[0].split(":", 1)[0]] += 1
+
+        while self.entries and (len(self.entries) > self.max_entries or self.memory_bytes > self.max_memory_bytes):
+            (namespace, digest), evicted = self.entries.popitem(last=False)
+            self.memory_bytes -= _entry_size(digest, evicted)
+            self.kind_counts[namespace.split(":", 1)[0]] -= 1
+            self.stats["evictions"] += 1
+
+    def flush(self) -> None:
+        """Сбрасывает отложенные записи в файл кэша"""
+        with self.lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        if self.connection is None or not self.pending:
+            return
+
+        now = time.time()
+        rows = []
+        for (namespace, digest), value in self.pending.items():
+            payload = json.dumps(value, ensure_ascii=False)
+            rows.append((namespace, digest, payload, len(payload) + len(digest), now))
+        self.pending.clear()
+
+        try:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO entries (namespace, digest, value, size, last_access) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._evict_disk_locked()
+            self.connection.commit()
+        except sqlite3.Error as e:
+            logger.error(f"[ProcessingCache] Ошибка записи в кэш {self.db_path}: {e}")
+
+    def _evict_disk_locked(self) -> None:
+        """Удаляет давно записанные записи, пока файл больше лимита"""
+        total_size = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total_size <= self.max_disk_bytes:
+            return
+
+        # Освобождаем до 90% лимита, чтобы не вытеснять на каждом сбросе
+        target = int(self.max_disk_bytes * 0.9)
+        rows = self.connection.execute("SELECT namespace, digest, size FROM entries ORDER BY last_access").fetchall()
+        to_delete = []
+        for namespace, digest, size in rows:
+            if total_size <= target:
+                break
+            to_delete.append((namespace, digest))
+            total_size -= size
+
+        self.connection.executemany("DELETE FROM entries WHERE namespace = ? AND digest = ?", to_delete)
+        self.stats["disk_evictions"] += len(to_delete)
+
+    def count(self, kind: str) -> int:
+        """Число записей в памяти данного вида"""
+        return self.kind_counts[kind]
+
+    def clear(self) -> None:
+        """Очищает кэш в памяти и файл кэша"""
+        with self.lock:
+            self.entries.clear()
+            self.memory_bytes = 0
+            self.kind_counts.clear()
+            self.pending.clear()
+            if self.connection is not None:
+                self.connection.execute("DELETE FROM entries")
+                self.connection.commit()
+
+    def close(self) -> None:
+        """Сбрасывает отложенные записи и закрывает файл кэша"""
+        with self.lock:
+            self._flush_locked()
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Метрики кэша"""
+        disk_entries = 0
+        with self.lock:
+            if self.connection is not None:
+                disk_entries = self.connection.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else 0,
+                "entries": len(self.entries),
+                "memory_bytes": self.memory_bytes,
+                "max_entries": self.max_entries,
+                "max_memory_bytes": self.max_memory_bytes,
+                "disk_enabled": self.connection is not None,
+                "disk_entries": disk_entries,
+                "pending_writes": len(self.pending),
+                "db_path": self.db_path,
+            }
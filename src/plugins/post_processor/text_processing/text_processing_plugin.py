@@ -7,6 +7,7 @@ from typing import Any, Dict, List
 
 from src.core.event_system import EventType
 from src.plugins.base_plugin import BasePlugin
+from src.plugins.post_processor.text_processing.cleaning_engine import ENGINE_CONFIG_KEYS, TextCleaningEngine
 
 
 class TextProcessingPlugin(BasePlugin):
@@ -29,6 +30,10 @@ class TextProcessingPlugin(BasePlugin):
             "max_text_length": 10000,
         }
 
+        # Скомпилированный движок очистки и конфигурация, для которой он собран
+        self._engine = None
+        self._engine_key = None
+
     def initialize(self) -> None:
         """Инициализация плагина"""
         self.log_info("Инициализация плагина Text Processing")
@@ -46,40 +51,15 @@ class TextProcessingPlugin(BasePlugin):
         self.emit_event(EventType.PLUGIN_UNLOADED, {"status": "shutdown"})
         self.log_info("Плагин Text Processing завершен")
 
-    def _remove_emojis(self, text: str) -> str:
-        """Удаляет эмодзи из текста"""
-        if not self.config["remove_emojis"]:
-            return text
-
-        try:
-            import emoji
-            text = emoji.demojize(text)
-        except ImportError:
-            self.log_warning("Модуль emoji не установлен, эмодзи не будут удалены")
-
-        # Удаляем коды эмодзи в формате :code:
-        return re.sub(r":[a-zA-Z_]+:", "", text)
-
-    def _remove_social_elements(self, text: str) -> str:
-        """Удаляет хэштеги, упоминания и URL"""
-        if self.config["remove_hashtags"]:
-            text = re.sub(r"#\w+", "", text)
-
-        if self.config["remove_mentions"]:
-            text = re.sub(r"@\w+", "", text)
-
-        if self.config["remove_urls"]:
-            text = re.sub(r"https?://[^\s]+", "", text)
-            text = re.sub(r"www\.[^\s]+", "", text)
-
-        return text
-
-    def _normalize_whitespace(self, text: str) -> str:
-        """Нормализует пробелы в тексте"""
-        if self.config["normalize_whitespace"]:
-            text = re.sub(r"\s+", " ", text)
-            text = text.strip()
-        return text
+    def _get_engine(self) -> TextCleaningEngine:
+        """Движок очистки для текущей конфигурации (пересобирается при её изменении)"""
+        engine_key = tuple(bool(self.config.get(key, False)) for key in ENGINE_CONFIG_KEYS)
+        if self._engine is None or self._engine_key != engine_key:
+            self._engine = TextCleaningEngine.from_config(self.config)
+            self._engine_key = engine_key
+            if not self._engine.emoji_available:
+                self.log_warning("Модуль emoji не установлен, эмодзи не будут удалены")
+        return self._engine
 
     def clean_text_completely(self, text: str) -> str:
         """Полностью очищает текст от кодов эмодзи, хэштегов и лишних символов"""
@@ -87,17 +67,25 @@ class TextProcessingPlugin(BasePlugin):
             if not text:
                 return ""
 
-            # Последовательная очистка
-            cleaned_text = self._remove_emojis(text)
-            cleaned_text = self._remove_social_elements(cleaned_text)
-            cleaned_text = self._normalize_whitespace(cleaned_text)
-
-            return cleaned_text
+            return self._get_engine().clean(text)
 
         except Exception as e:
             self.log_error(f"Ошибка очистки текста: {e}")
             return text
 
+    def clean_many(self, texts: List[str]) -> List[str]:
+        """
+        Очищает список текстов за один проход движка
+
+        Результат совпадает с [clean_text_completely(text) for text in texts].
+        """
+        try:
+            return self._get_engine().clean_many(texts)
+
+        except Exception as e:
+            self.log_error(f"Ошибка пакетной очистки текстов: {e}")
+            return [self.clean_text_completely(text) for text in texts]
+
     def clean_emojis_from_text(self, text: str) -> str:
         """Очищает эмодзи, коды эмодзи и хэштеги из текста"""
         return self.clean_text_completely(text)
@@ -105,11 +93,11 @@ class TextProcessingPlugin(BasePlugin):
     def clean_multiple_texts(self, texts: List[str]) -> List[str]:
         """Очищает список текстов от эмодзи, кодов эмодзи и хэштегов"""
         try:
-            cleaned_texts = []
-            for text in texts:
-                cleaned_text = self.clean_text_completely(text)
-                if cleaned_text and len(cleaned_text) >= self.config["min_text_length"]:
-                    cleaned_texts.append(cleaned_text)
+            cleaned_texts = [
+                cleaned_text
+                for cleaned_text in self.clean_many(texts)
+                if cleaned_text and len(cleaned_text) >= self.config["min_text_length"]
+            ]
 
             self.log_info(f"Очищено {len(cleaned_texts)} из {len(texts)} текстов")
             return cleaned_texts
@@ -179,10 +167,11 @@ class TextProcessingPlugin(BasePlugin):
             if not text:
                 return {"error": "Пустой текст"}
 
+            cleaned_text = self.clean_text_completely(text)
             analysis = {
                 "original_length": len(text),
-                "cleaned_text": self.clean_text_completely(text),
-                "cleaned_length": len(self.clean_text_completely(text)),
+                "cleaned_text": cleaned_text,
+                "cleaned_length": len(cleaned_text),
                 "links": self.extract_links_from_text(text),
                 "hashtags": self.extract_hashtags_from_text(text),
                 "mentions": self.extract_mentions_from_text(text),
@@ -1,28 +1,86 @@
+import asyncio
 import threading
 import time
 
 
+class TokenBucket:
+    """Token bucket одного токена: rate запросов в секунду, всплеск до capacity"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.level = capacity
+        self.updated = time.monotonic()
+
+    def reserve(self, now):
+        """Резервирует слот и возвращает, сколько секунд нужно подождать"""
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+        self.level -= 1
+        if self.level >= 0:
+            return 0.0
+        return -self.level / self.rate
+
+
 class TokenLimiter:
-    def __init__(self, tokens, cooldown_seconds=60):
+    def __init__(self, tokens=(), cooldown_seconds=60, rate_per_second=3.0, burst=3):
         self.tokens = list(tokens)
         self.cooldown = cooldown_seconds
         self.blocked = {}  # token: timestamp_until
+        self.revoked = set()  # Недействительные токены, в ротацию не возвращаются
         self.lock = threading.Lock()
 
+        # Отдельная полоса (bucket) на каждый токен: лимиты VK действуют на токен
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.buckets = {}
+        self.lane_stats = {}  # token: {"requests": int, "waited": float}
+
     def get_token(self):
         now = time.time()
         with self.lock:
             for _ in range(len(self.tokens)):
                 token = self.tokens.pop(0)
+                if token in self.revoked:
+                    self.tokens.append(token)
+                    continue
                 if token not in self.blocked or self.blocked[token] < now:
                     self.tokens.append(token)
                     return token
                 self.tokens.append(token)
         return None  # Все токены на cooldown
 
-    def block_token(self, token):
+    def add_tokens(self, tokens):
+        with self.lock:
+            for token in tokens:
+                if token and token not in self.tokens:
+                    self.tokens.append(token)
+
+    def configure(self, rate_per_second=None, burst=None):
+        with self.lock:
+            if rate_per_second:
+                self.rate_per_second = rate_per_second
+            if burst:
+                self.burst = burst
+            for bucket in self.buckets.values():
+                bucket.rate = self.rate_per_second
+                bucket.capacity = self.burst
+
+    def block_token(self, token, seconds=None):
+        with self.lock:
+            self.blocked[token] = time.time() + (seconds or self.cooldown)
+
+    def revoke_token(self, token):
+        """Убирает недействительный токен из ротации навсегда, без ожидания cooldown"""
+        with self.lock:
+            self.revoked.add(token)
+            self.blocked.pop(token, None)
+
+    def is_blocked(self, token):
         with self.lock:
-            self.blocked[token] = time.time() + self.cooldown
+            if token in self.revoked:
+                return True
+            return token in self.blocked and self.blocked[token] > time.time()
 
     def unblock_expired(self):
         now = time.time()
@@ -30,3 +88,70 @@ class TokenLimiter:
             expired = [t for t, until in self.blocked.items() if until < now]
             for t in expired:
                 del self.blocked[t]
+
+    def reserve(self, token):
+        """
+        Резервирует запрос в полосе токена и возвращает время ожидания в секундах
+
+        Резерв делается под блокировкой потока, а ожидание - снаружи, поэтому
+        одну полосу могут делить поиски из разных потоков и event loop'ов.
+        """
+        with self.lock:
+            bucket = self.buckets.get(token)
+            if bucket is None:
+                bucket = self.buckets[token] = TokenBucket(self.rate_per_second, self.burst)
+
+            wait = bucket.reserve(time.monotonic())
+
+            # Заблокированный токен ждёт окончания cooldown; отозванный не ждёт -
+            # запрос с ним сразу вернёт ошибку и не задержит поиск
+            blocked_until = self.blocked.get(token)
+            if blocked_until:
+                wait = max(wait, blocked_until - time.time())
+
+            stats = self.lane_stats.setdefault(token, {"requests": 0, "waited": 0.0})
+            stats["requests"] += 1
+            stats["waited"] += wait
+            return wait
+
+    async def acquire(self, token):
+        wait = self.reserve(token)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def get_statistics(self):
+        with self.lock:
+            lanes = {
+                mask_token(token): {
+                    "requests": stats["requests"],
+                    "waited_seconds": round(stats["waited"], 3),
+                    "blocked": token in self.revoked or (token in self.blocked and self.blocked[token] > time.time()),
+                    "revoked": token in self.revoked,
+                }
+                for token, stats in self.lane_stats.items()
+            }
+            return {
+                "rate_per_token": self.rate_per_second,
+                "burst": self.burst,
+                "lanes": lanes,
+                "aggregate_rate": self.rate_per_second * max(1, len(self.buckets)),
+            }
+
+
+def mask_token(token):
+    if not token:
+        return "<none>"
+    return f"{token[:6]}…{token[-4:]}" if len(token) > 12 else "***"
+
+
+_shared_limiter = None
+_shared_limiter_lock = threading.Lock()
+
+
+def get_token_limiter():
+    """Общий для процесса лимитер: все поиски во всех потоках делят полосы токенов"""
+    global _shared_limiter
+    with _shared_limiter_lock:
+        if _shared_limiter is None:
+            _shared_limiter = TokenLimiter()
+        return _shared_limiter
@@ -10,6 +10,7 @@ from typing import Any, Dict, List, Optional
 
 from src.core.event_system import EventType
 from src.plugins.base_plugin import BasePlugin
+from src.plugins.token_manager.token_limiter import get_token_limiter
 
 
 class TokenManagerPlugin(BasePlugin):
@@ -46,6 +47,9 @@ class TokenManagerPlugin(BasePlugin):
         self._load_tokens()
         self._load_vk_tokens_from_txt()
 
+        # Регистрируем VK токены в общем лимитере: у каждого токена своя полоса запросов
+        get_token_limiter().add_tokens(self.list_vk_tokens())
+
         self.log_info("Плагин Token Manager инициализирован")
         self.emit_event(EventType.PLUGIN_LOADED, {"status": "initialized"})
 
@@ -0,0 +1,164 @@
+"""
+Пакетирование вызовов VK API через метод execute
+
+Несколько ожидающих вызовов одного метода с одним токеном упаковываются
+в один VKScript (до 25 вызовов на execute) и отправляются одним HTTP-запросом.
+Результаты и ошибки каждого вызова возвращаются ожидающим корутинам.
+"""
+
+import asyncio
+import json
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+EXECUTE_URL = "https://api.vk.com/method/execute"
+MAX_CALLS_PER_EXECUTE = 25
+
+# Параметры, которые передаются самому execute, а не вложенным вызовам
+_TRANSPORT_PARAMS = ("access_token", "v")
+
+
+class VKExecuteError(Exception):
+    """Ошибка транспортного уровня при выполнении execute"""
+
+
+class VKExecuteBatcher:
+    """Собирает вызовы в пачки и выполняет их одним запросом execute"""
+
+    def __init__(
+        self,
+        method: str = "newsfeed.search",
+        max_calls: int = MAX_CALLS_PER_EXECUTE,
+        flush_interval: float = 0.02,
+        throttle: Optional[Callable[[str], Awaitable[None]]] = None,
+    ):
+        self.method = method
+        self.max_calls = max_calls
+        self.flush_interval = flush_interval
+        self.throttle = throttle
+
+        # (session, token) -> [(params, future), ...]
+        self._pending: Dict[Tuple[Any, str], List[Tuple[dict, asyncio.Future]]] = {}
+        self._flush_handles: Dict[Tuple[Any, str], asyncio.TimerHandle] = {}
+        self._flush_tasks = set()
+
+        self.stats = {
+            "execute_requests": 0,
+            "packed_calls": 0,
+            "failed_calls": 0,
+            "transport_errors": 0,
+        }
+
+    async def call(self, session, params: dict) -> Dict[str, Any]:
+        """
+        Ставит вызов в очередь и ждёт его результат
+
+        Returns:
+            Словарь в формате ответа VK API: {"response": ...} или {"error": ...}
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        key = (session, params.get("access_token"))
+
+        queue = self._pending.setdefault(key, [])
+        queue.append((params, future))
+
+        if len(queue) >= min(self.max_calls, MAX_CALLS_PER_EXECUTE):
+            self._start_flush(key)
+        elif key not in self._flush_handles:
+            self._flush_handles[key] = loop.call_later(self.flush_interval, self._start_flush, key)
+
+        return await future
+
+    def _start_flush(self, key: Tuple[Any, str]) -> None:
+        """Забирает накопленные вызовы и запускает их отправку"""
+        handle = self._flush_handles.pop(key, None)
+        if handle:
+            handle.cancel()
+
+        calls = self._pending.pop(key, [])
+        if not calls:
+            return
+
+        session, token = key
+        task = asyncio.ensure_future(self._flush(session, token, calls))
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+
+    async def _flush(self, session, token: str, calls: List[Tuple[dict, asyncio.Future]]) -> None:
+        """Выполняет один запрос execute и раздаёт результаты"""
+        try:
+            if self.throttle:
+                await self.throttle(token)
+
+            payload = {
+                "code": self.build_code([params for params, _ in calls]),
+                "access_token": token,
+                "v": calls[0][0].get("v"),
+            }
+
+            async with session.post(EXECUTE_URL, data=payload) as response:
+                self.stats["execute_requests"] += 1
+                if response.status != 200:
+                    raise VKExecuteError(f"HTTP ошибка {response.status} при выполнении execute")
+                data = await response.json()
+
+        except Exception as e:
+            self.stats["transport_errors"] += 1
+            logger.error(f"[VKExecuteBatcher] Ошибка execute для {len(calls)} вызовов: {e}")
+            for _, future in calls:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.stats["packed_calls"] += len(calls)
+        for (_, future), result in zip(calls, self.unpack(data, len(calls))):
+            if "error" in result:
+                self.stats["failed_calls"] += 1
+            if not future.done():
+                future.set_result(result)
+
+    def build_code(self, params_list: List[dict]) -> str:
+        """Собирает VKScript, возвращающий массив результатов вызовов"""
+        calls = []
+        for params in params_list:
+            call_params = {k: v for k, v in params.items() if k not in _TRANSPORT_PARAMS and v is not None}
+            calls.append(f"API.{self.method}({json.dumps(call_params, ensure_ascii=False)})")
+        return f"return [{','.join(calls)}];"
+
+    @staticmethod
+    def unpack(data: Dict[str, Any], calls_count: int) -> List[Dict[str, Any]]:
+        """
+        Раскладывает ответ execute по вызовам
+
+        Неудачные вызовы возвращаются VK как false в массиве response,
+        а их ошибки перечислены по порядку в execute_errors.
+        """
+        if "error" in data:
+            return [{"error": data["error"]} for _ in range(calls_count)]
+
+        results = data.get("response") or []
+        errors = iter(data.get("execute_errors") or [])
+        unpacked = []
+
+        for index in range(calls_count):
+            result = results[index] if index < len(results) else None
+            if result is False or result is None:
+                error = next(errors, {"error_code": None, "error_msg": "Пустой результат вызова в execute"})
+                unpacked.append({"error": error})
+            else:
+                unpacked.append({"response": result})
+
+        return unpacked
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Возвращает статистику пакетирования"""
+        execute_requests = self.stats["execute_requests"]
+        return {
+            **self.stats,
+            "average_calls_per_request": (
+                round(self.stats["packed_calls"] / execute_requests, 2) if execute_requests else 0
+            ),
+            "pending_calls": sum(len(queue) for queue in self._pending.values()),
+        }
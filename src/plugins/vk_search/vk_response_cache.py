@@ -0,0 +1,194 @@
+"""
+Персистентный кэш ответов newsfeed.search
+
+Ответы хранятся в SQLite-файле под data/ и переживают перезапуск.
+Ключ строится из нормализованного запроса, минус-слов, временного окна
+и позиции страницы (offset/start_from) без access_token, поэтому ротация
+токенов не приводит к промахам для одинаковых запросов.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from loguru import logger
+
+# Параметры, влияющие на содержимое выдачи (access_token сюда не входит)
+_KEY_PARAMS = ("start_time", "end_time", "offset", "start_from", "count", "extended", "v")
+
+
+def build_cache_key(params: Dict[str, Any]) -> str:
+    """
+    Строит ключ кэша, не зависящий от токена
+
+    Запрос приводится к нижнему регистру с нормализованными пробелами,
+    минус-слова (-слово в q) выделяются и сортируются.
+    """
+    words = str(params.get("q", "")).lower().split()
+    query_words = [word for word in words if not (word.startswith("-") and len(word) > 1)]
+    minus_words = sorted({word[1:] for word in words if word.startswith("-") and len(word) > 1})
+
+    key_data = {
+        "q": " ".join(query_words),
+        "minus_words": minus_words,
+        **{name: params[name] for name in _KEY_PARAMS if params.get(name) is not None},
+    }
+    serialized = json.dumps(key_data, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+
+class VKResponseCache:
+    """SQLite-кэш страниц выдачи с TTL, вытеснением по размеру и метриками"""
+
+    def __init__(self, db_path: str = "data/vk_search_cache.db", max_size_mb: float = 256):
+        self.db_path = db_path
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+        self.lock = threading.Lock()
+        self.connection: Optional[sqlite3.Connection] = None
+
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "expired": 0,
+            "writes": 0,
+            "evictions": 0,
+        }
+
+    def open(self) -> None:
+        """Открывает файл кэша и создаёт таблицу при необходимости"""
+        with self.lock:
+            if self.connection is not None:
+                return
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+            self.connection = sqlite3.connect(self.db_path, check_same_thread=False)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            self.connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS responses (
+                    cache_key TEXT PRIMARY KEY,
+                    payload TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    expires_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+                """
+            )
+            self.connection.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses(last_access)")
+            self.connection.commit()
+
+    def close(self) -> None:
+        """Закрывает соединение с файлом кэша"""
+        with self.lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+
+    def get(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """Возвращает сохранённую страницу или None (промах или истёкший TTL)"""
+        if self.connection is None:
+            return None
+
+        now = time.time()
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT payload, expires_at FROM responses WHERE cache_key = ?", (cache_key,)
+            ).fetchone()
+
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+
+            payload, expires_at = row
+            if expires_at < now:
+                self.connection.execute("DELETE FROM responses WHERE cache_key = ?", (cache_key,))
+                self.connection.commit()
+                self.stats["expired"] += 1
+                self.stats["misses"] += 1
+                return None
+
+            self.connection.execute("UPDATE responses SET last_access = ? WHERE cache_key = ?", (now, cache_key))
+            self.connection.commit()
+            self.stats["hits"] += 1
+
+        return json.loads(payload)
+
+    def set(self, cache_key: str, page: Dict[str, Any], ttl: float) -> None:
+        """Сохраняет страницу с заданным временем жизни"""
+        if self.connection is None:
+            return
+
+        payload = json.dumps(page, ensure_ascii=False)
+        now = time.time()
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO responses (cache_key, payload, size, expires_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (cache_key, payload, len(payload), now + ttl, now),
+            )
+            self.stats["writes"] += 1
+            self._evict_locked()
+            self.connection.commit()
+
+    def _evict_locked(self) -> None:
+        """Удаляет истёкшие записи и давно не используемые, пока кэш больше лимита"""
+        self.connection.execute("DELETE FROM responses WHERE expires_at < ?", (time.time(),))
+
+        total_size = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total_size <= self.max_size_bytes:
+            return
+
+        # Освобождаем до 90% лимита, чтобы не вытеснять на каждой записи
+        target = int(self.max_size_bytes * 0.9)
+        rows = self.connection.execute("SELECT cache_key, size FROM responses ORDER BY last_access").fetchall()
+        to_delete = []
+        for cache_key, size in rows:
+            if total_size <= target:
+                break
+            to_delete.append((cache_key,))
+            total_size -= size
+
+        self.connection.executemany("DELETE FROM responses WHERE cache_key = ?", to_delete)
+        self.stats["evictions"] += len(to_delete)
+
+    def clear(self) -> None:
+        """Полностью очищает кэш"""
+        if self.connection is None:
+            return
+        with self.lock:
+            self.connection.execute("DELETE FROM responses")
+            self.connection.commit()
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Возвращает метрики кэша"""
+        entries, size = 0, 0
+        if self.connection is not None:
+            with self.lock:
+                entries, size = self.connection.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+                ).fetchone()
+
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else 0,
+            "entries": entries,
+            "size_bytes": size,
+            "max_size_bytes": self.max_size_bytes,
+            "db_path": self.db_path,
+        }
+
+
+def open_response_cache(db_path: str, max_size_mb: float) -> Optional[VKResponseCache]:
+    """Открывает кэш, при ошибке файловой системы работаем без него"""
+    cache = VKResponseCache(db_path, max_size_mb)
+    try:
+        cache.open()
+    except sqlite3.Error as e:
+        logger.error(f"[VKResponseCache] Не удалось открыть кэш {db_path}: {e}")
+        return None
+    return cache
@@ -0,0 +1,155 @@
+"""
+Политика повторов запросов к VK API
+
+Каждый код ошибки VK получает свою стратегию: повтор с экспоненциальной
+задержкой и jitter, карантин токена (повтор уже другим токеном) или отказ.
+Общий бюджет повторов на поиск не даёт массовому сбою превратиться в шторм
+повторных запросов.
+"""
+
+import asyncio
+import random
+import threading
+from typing import Any, Dict, Optional
+
+import aiohttp
+
+RETRY = "retry"
+QUARANTINE = "quarantine"
+FAIL = "fail"
+
+# Код ошибки VK -> (действие, базовая задержка в секундах)
+DEFAULT_STRATEGIES = {
+    1: (RETRY, 1.0),  # Unknown error
+    5: (QUARANTINE, 0.0),  # User authorization failed: токен недействителен или истёк
+    6: (RETRY, 0.5),  # Too many requests per second
+    9: (RETRY, 5.0),  # Flood control
+    10: (RETRY, 1.0),  # Internal server error
+    29: (QUARANTINE, 0.0),  # Rate limit reached: исчерпан суточный лимит метода
+}
+
+# Ошибки, после которых токен не восстановится сам: его убирают из ротации навсегда
+PERMANENT_ERROR_CODES = {5}
+
+# Транспортные ошибки и ответы 5xx/429 повторяются с этой базовой задержкой
+TRANSIENT_DELAY = 1.0
+
+
+class VKAPIError(Exception):
+    """Ошибка, возвращённая VK API или HTTP-слоем"""
+
+    def __init__(self, error_code: Optional[int] = None, message: str = "", http_status: Optional[int] = None):
+        super().__init__(message or f"VK API error {error_code}")
+        self.error_code = error_code
+        self.http_status = http_status
+
+    @classmethod
+    def from_response(cls, error: Dict[str, Any]) -> "VKAPIError":
+        return cls(error.get("error_code"), error.get("error_msg", ""))
+
+
+class VKRetryPolicy:
+    """Выбирает стратегию по ошибке и считает бюджет повторов"""
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        max_delay: float = 30.0,
+        retry_budget: int = 100,
+        strategies: Optional[Dict[int, tuple]] = None,
+    ):
+        self.max_attempts = max_attempts
+        self.max_delay = max_delay
+        self.retry_budget = retry_budget
+        self.strategies = {**DEFAULT_STRATEGIES, **(strategies or {})}
+
+        self.lock = threading.Lock()
+        self.budget_left = retry_budget
+        self.stats = {
+            "retries": 0,
+            "quarantined": 0,
+            "failed": 0,
+            "budget_exhausted": 0,
+            "errors_by_code": {},
+        }
+
+    def reset_budget(self) -> None:
+        """Восстанавливает бюджет повторов (в начале каждого поиска)"""
+        with self.lock:
+            self.budget_left = self.retry_budget
+
+    def classify(self, error: Exception) -> tuple:
+        """Возвращает (действие, базовая задержка) для ошибки"""
+        if isinstance(error, VKAPIError):
+            if error.error_code is not None:
+                return self.strategies.get(error.error_code, (FAIL, 0.0))
+            if error.http_status is not None and (error.http_status >= 500 or error.http_status == 429):
+                return RETRY, TRANSIENT_DELAY
+            return FAIL, 0.0
+        if isinstance(error, (aiohttp.ClientError, asyncio.TimeoutError)):
+            return RETRY, TRANSIENT_DELAY
+        return FAIL, 0.0
+
+    def requires_quarantine(self, error: Exception) -> bool:
+        """Ошибка означает, что токен нужно убрать из ротации"""
+        return self.classify(error)[0] == QUARANTINE
+
+    def is_permanent(self, error: Exception) -> bool:
+        """Токен недействителен: ждать окончания карантина бессмысленно"""
+        return isinstance(error, VKAPIError) and error.error_code in PERMANENT_ERROR_CODES
+
+    def decide(self, error: Exception, attempt: int, max_attempts: Optional[int] = None) -> tuple:
+        """
+        Решает, что делать после неудачной попытки
+
+        Args:
+            attempt: Номер неудачной попытки, начиная с 0
+            max_attempts: Переопределяет max_attempts политики для этого запроса
+
+        Returns:
+            (действие, задержка перед следующей попыткой)
+        """
+        action, base_delay = self.classify(error)
+        self._count_error(error)
+
+        if action == FAIL or attempt + 1 >= (max_attempts or self.max_attempts):
+            self.stats["failed"] += 1
+            return FAIL, 0.0
+
+        with self.lock:
+            if self.budget_left <= 0:
+                self.stats["budget_exhausted"] += 1
+                self.stats["failed"] += 1
+                return FAIL, 0.0
+            self.budget_left -= 1
+
+        if action == QUARANTINE:
+            self.stats["quarantined"] += 1
+            # Повтор сразу другим токеном, ждать нечего
+            return QUARANTINE, 0.0
+
+        self.stats["retries"] += 1
+        return RETRY, self.backoff(base_delay, attempt)
+
+    def backoff(self, base_delay: float, attempt: int) -> float:
+        """Экспоненциальная задержка с jitter: половина фиксирована, половина случайна"""
+        delay = min(self.max_delay, base_delay * (2 ** attempt))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def _count_error(self, error: Exception) -> None:
+        if isinstance(error, VKAPIError):
+            key = str(error.error_code) if error.error_code is not None else f"http_{error.http_status}"
+        else:
+            key = type(error).__name__
+        errors = self.stats["errors_by_code"]
+        errors[key] = errors.get(key, 0) + 1
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Статистика повторов"""
+        return {
+            **self.stats,
+            "errors_by_code": dict(self.stats["errors_by_code"]),
+            "max_attempts": self.max_attempts,
+            "retry_budget": self.retry_budget,
+            "budget_left": self.budget_left,
+        }
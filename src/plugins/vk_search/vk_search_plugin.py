@@ -3,13 +3,19 @@
 """
 
 import asyncio
+import contextlib
 import time
-from typing import Any, Dict, List
-
-import aiohttp
+from typing import Any, AsyncIterator, Dict, List
 
 from src.core.event_system import EventType
 from src.plugins.base_plugin import BasePlugin
+from src.plugins.token_manager.token_limiter import get_token_limiter, mask_token
+from src.plugins.vk_search.vk_execute_batcher import MAX_CALLS_PER_EXECUTE, VKExecuteBatcher
+from src.plugins.vk_search.vk_response_cache import build_cache_key, open_response_cache
+from src.plugins.vk_search.vk_retry_policy import QUARANTINE, RETRY, VKAPIError, VKRetryPolicy
+from src.plugins.vk_search.vk_search_scheduler import VKSearchScheduler
+from src.plugins.vk_search.vk_session_manager import VKSessionManager
+from src.plugins.vk_search.vk_strict_filter import VKStrictFilter, normalize_search_text
 from src.plugins.vk_search.vk_time_utils import to_vk_timestamp
 
 
@@ -30,28 +36,80 @@ class VKSearchPlugin(BasePlugin):
             "access_token": None,
             "api_version": "5.131",
             "request_delay": 0.05,  # Уменьшено с 0.1 до 0.05 (агрессивнее)
-            "max_requests_per_second": 12,  # Увеличено с 8 до 12
+            "max_requests_per_second": 3,  # На один токен (лимит VK API), полосы токенов независимы
+            "token_burst": 3,  # Допустимый всплеск запросов на один токен
             "timeout": 10,  # Уменьшено с 15 до 10
-            "max_retries": 3,
-            "batch_size": 12,  # Увеличено с 8 до 12
-            "max_batches": 15,  # Увеличено с 10 до 15
+            "max_retries": 3,  # Попыток на один запрос (включая первую)
+            "retry_max_delay": 30,  # Потолок экспоненциальной задержки (сек)
+            "retry_budget": 100,  # Общий бюджет повторов на один поиск
+            "token_quarantine_seconds": 600,  # Карантин токена при ошибках 5 и 29
+            "batch_size": 12,  # Число воркеров планировщика страниц
+            "max_batches": 15,  # Максимум страниц на ключевое слово (курсорная пагинация)
             "use_connection_pooling": True,
             "enable_caching": True,
             "cache_ttl": 600,  # Увеличено до 10 минут
-            "adaptive_rate_limiting": True,
-            "min_delay": 0.03,  # Еще меньше минимальная задержка
-            "max_delay": 0.8,  # Уменьшена максимальная задержка
+            "persistent_cache": True,  # Дисковый кэш ответов (переживает перезапуск)
+            "persistent_cache_path": "data/vk_search_cache.db",
+            "persistent_cache_ttl": 86400,  # Для закрытых окон (end_time в прошлом)
+            "persistent_cache_max_mb": 256,  # Предел размера файла кэша
+            "split_saturated_windows": False,  # Бисекция временного окна при насыщении выдачи
+            "saturation_limit": 1000,  # Потолок выдачи newsfeed.search на один запрос
+            "saturation_tolerance": 200,  # Допустимый разрыв между total_count и полученными постами
+            "min_window_seconds": 600,  # Минимальная ширина подокна при бисекции
+            "max_split_depth": 10,  # Максимальная глубина рекурсивного деления окна
+            "use_execute_batching": True,  # Упаковка вызовов newsfeed.search в execute
+            "execute_batch_size": 25,  # Вызовов на один execute (лимит VK - 25)
+            "execute_flush_interval": 0.02,  # Ожидание добора пачки перед отправкой (сек)
+            "stream_max_pending_pages": 32,  # Очередь готовых страниц в iter_search (backpressure)
+            "connection_limit": 150,  # Размер общего пула соединений
+            "connection_limit_per_host": 30,
+            "keepalive_timeout": 30,  # Сколько держать простаивающее соединение (сек)
         }
 
         # Статистика и метрики производительности
         self.requests_made = 0
-        self.session = None
+        self.session_manager = VKSessionManager()
         self.cache = {}
+        self.persistent_cache = None
         self.token_usage = {}
         self.rate_limit_hits = 0
         self.response_times = []
         self.last_request_time = 0
 
+        # Общий для процесса лимитер: отдельная полоса на каждый токен
+        self.rate_limiter = get_token_limiter()
+
+        # Пакетирование запросов через execute (до 25 вызовов на HTTP-запрос)
+        self.execute_batcher = VKExecuteBatcher(
+            max_calls=self.config["execute_batch_size"],
+            flush_interval=self.config["execute_flush_interval"],
+            throttle=self._rate_limit,
+        )
+
+        # Статистика курсорной пагинации (страниц на ключевое слово)
+        self.pagination_stats = {
+            "pages_per_keyword": {},
+            "total_pages": 0,
+            "follow_up_pages": 0,
+            "short_page_stops": 0,
+        }
+
+        # Статистика бисекции временных окон (сколько делений потребовал ключ)
+        self.window_split_stats = {
+            "splits_per_keyword": {},
+            "saturated_windows": 0,
+            "unresolved_windows": 0,
+        }
+
+        # Повторы по кодам ошибок VK и карантин токенов
+        self.retry_policy = VKRetryPolicy()
+
+        # Занятость воркеров последнего запуска планировщика
+        self.scheduler_stats = {}
+
+        # Итог последнего потокового поиска: сколько страниц загружено и сколько не удалось
+        self.last_search_stats = {"pages_loaded": 0, "pages_failed": 0}
+
         # Интеллектуальное кэширование
         self.cache_stats = {
             "hits": 0,
@@ -84,20 +142,42 @@ class VKSearchPlugin(BasePlugin):
             self.log_error("Некорректная конфигурация плагина")
             return
 
+        self.rate_limiter.configure(self.config["max_requests_per_second"], self.config["token_burst"])
+
+        if self.config["persistent_cache"] and self.persistent_cache is None:
+            self.persistent_cache = open_response_cache(
+                self.config["persistent_cache_path"], self.config["persistent_cache_max_mb"]
+            )
+        self.execute_batcher.max_calls = min(self.config["execute_batch_size"], MAX_CALLS_PER_EXECUTE)
+        self.execute_batcher.flush_interval = self.config["execute_flush_interval"]
+        self.retry_policy.max_attempts = self.config["max_retries"]
+        self.retry_policy.max_delay = self.config["retry_max_delay"]
+        self.retry_policy.retry_budget = self.config["retry_budget"]
+        self.session_manager.configure(
+            timeout=self.config["timeout"],
+            limit=self.config["connection_limit"],
+            limit_per_host=self.config["connection_limit_per_host"],
+            keepalive_timeout=self.config["keepalive_timeout"],
+        )
+
         self.log_info("Плагин VK Search инициализирован")
         self.emit_event(EventType.PLUGIN_LOADED, {"status": "initialized"})
 
     def set_token_manager(self, token_manager):
         """Устанавливает связь с TokenManagerPlugin"""
         self.token_manager = token_manager
+        self.rate_limiter.add_tokens(token_manager.list_vk_tokens())
         self.log_info("TokenManager подключен к VKSearchPlugin")
 
     def shutdown(self) -> None:
         """Завершение работы плагина"""
         self.log_info("Завершение работы плагина VK Search")
 
-        if self.session:
-            asyncio.create_task(self.session.close())
+        self.session_manager.close()
+
+        if self.persistent_cache:
+            self.persistent_cache.close()
+            self.persistent_cache = None
 
         self.emit_event(EventType.PLUGIN_UNLOADED, {"status": "shutdown"})
         self.log_info("Плагин VK Search завершен")
@@ -113,42 +193,10 @@ class VKSearchPlugin(BasePlugin):
         """Возвращает список обязательных ключей конфигурации"""
         return ["access_token"]
 
-    async def _rate_limit(self) -> None:
-        """Адаптивный Rate limiting для VK API"""
-        current_time = time.time()
-
-        # Адаптивная регулировка задержки
-        if self.config["adaptive_rate_limiting"]:
-            # Если недавно был rate limit, увеличиваем задержку
-            if self.rate_limit_hits > 0:
-                delay = min(self.config["max_delay"], self.config["request_delay"] * (1.5**self.rate_limit_hits))
-            else:
-                # Если все хорошо, постепенно уменьшаем задержку
-                delay = max(self.config["min_delay"], self.config["request_delay"] * 0.95)
-
-            # Ограничиваем задержку в заданных пределах
-            delay = max(self.config["min_delay"], min(self.config["max_delay"], delay))
-        else:
-            delay = self.config["request_delay"]
-
-        if delay > 0:
-            await asyncio.sleep(delay)
-
-        self.last_request_time = current_time
-
-    def _get_best_token(self, available_tokens: List[str]) -> str:
-        """Выбирает токен с наименьшей нагрузкой"""
-        if not self.token_usage:
-            return available_tokens[0]
-
-        # Находим токен с наименьшим количеством запросов
-        best_token = min(self.token_usage.items(), key=lambda x: x[1])[0]
-
-        # Если токен не в списке доступных, берем первый
-        if best_token not in available_tokens:
-            return available_tokens[0]
-
-        return best_token
+    async def _rate_limit(self, token: str = None) -> None:
+        """Ожидание слота в полосе токена (token bucket, общий для всего процесса)"""
+        await self.rate_limiter.acquire(token)
+        self.last_request_time = time.time()
 
     def _update_token_usage(self, token: str):
         """Обновляет статистику использования токена"""
@@ -221,11 +269,15 @@ class VKSearchPlugin(BasePlugin):
         self.log_info(f"🧹 Удалено {to_remove} записей из кэша")
 
     def _get_cache_key(self, params: dict) -> str:
-        """Генерирует ключ кэша для параметров запроса"""
-        import hashlib
+        """Генерирует ключ кэша для параметров запроса (без access_token)"""
+        return build_cache_key(params)
 
-        key_data = str(sorted(params.items()))
-        return hashlib.md5(key_data.encode(), usedforsecurity=False).hexdigest()
+    def _persistent_ttl(self, params: dict) -> float:
+        """TTL дискового кэша: закрытые окна живут долго, открытые - как память"""
+        end_time = params.get("end_time")
+        if end_time is not None and end_time < time.time() - self.config["cache_ttl"]:
+            return self.config["persistent_cache_ttl"]
+        return self.config["cache_ttl"]
 
     def get_statistics(self) -> Dict[str, Any]:
         """Возвращает расширенную статистику плагина с интеллектуальными метриками"""
@@ -269,6 +321,35 @@ class VKSearchPlugin(BasePlugin):
                 "cache_size_limit": self.cache_stats["cache_size_limit"],
                 "preload_enabled": self.cache_stats["preload_enabled"],
             },
+            "pagination": {
+                "pages_per_keyword": dict(self.pagination_stats["pages_per_keyword"]),
+                "total_pages": self.pagination_stats["total_pages"],
+                "follow_up_pages": self.pagination_stats["follow_up_pages"],
+                "short_page_stops": self.pagination_stats["short_page_stops"],
+                "keywords_with_more_pages": sum(
+                    1 for pages in self.pagination_stats["pages_per_keyword"].values() if pages > 1
+                ),
+            },
+            "last_search": dict(self.last_search_stats),
+            "rate_limiting": self.rate_limiter.get_statistics(),
+            "persistent_cache": (
+                {"enabled": True, **self.persistent_cache.get_statistics()}
+                if self.persistent_cache
+                else {"enabled": False}
+            ),
+            "execute_batching": {
+                "enabled": self.config["use_execute_batching"],
+                **self.execute_batcher.get_statistics(),
+            },
+            "connection_pool": self.session_manager.get_statistics(),
+            "scheduler": self.scheduler_stats,
+            "retries": self.retry_policy.get_statistics(),
+            "window_splitting": {
+                "enabled": self.config["split_saturated_windows"],
+                "splits_per_keyword": dict(self.window_split_stats["splits_per_keyword"]),
+                "saturated_windows": self.window_split_stats["saturated_windows"],
+                "unresolved_windows": self.window_split_stats["unresolved_windows"],
+            },
         }
 
     async def search_multiple_queries(
@@ -290,7 +371,12 @@ class VKSearchPlugin(BasePlugin):
 
         # Вызываем массовый поиск
         return await self.mass_search_with_tokens(
-            keyword_token_pairs, start_date, end_date, exact_match, minus_words, batch_size
+            keyword_token_pairs,
+            start_date=start_date,
+            end_date=end_date,
+            exact_match=exact_match,
+            minus_words=minus_words,
+            batch_size=batch_size,
         )
 
     async def _search_single_query(
@@ -334,32 +420,41 @@ class VKSearchPlugin(BasePlugin):
             self._update_cache_stats(cache_key, True)
             return self.cache[cache_key]["data"]
 
+        # Второй уровень - дисковый кэш, общий для перезапусков и токенов
+        if self.persistent_cache and self.config["enable_caching"]:
+            page = self.persistent_cache.get(cache_key)
+            if page is not None:
+                self.cache[cache_key] = {"data": page, "timestamp": time.time(), "query": query, "params": params}
+                self._update_cache_stats(cache_key, True)
+                return page
+
         self._update_cache_stats(cache_key, False)
         return None
 
     async def _handle_vk_api_response(self, response, query, start_time, params, cache_key):
         """Обрабатывает ответ от VK API"""
-        import time
-
         if response.status != 200:
-            if self.requests_made < 50:
-                self.log_error(f"HTTP ошибка {response.status} для запроса '{query}'")
-            return []
+            raise VKAPIError(message=f"HTTP ошибка {response.status}", http_status=response.status)
 
         data = await response.json()
+        return await self._handle_vk_api_data(data, query, start_time, params, cache_key)
+
+    async def _handle_vk_api_data(self, data, query, start_time, params, cache_key):
+        """Обрабатывает тело ответа VK API (прямой запрос или элемент execute)"""
+        import time
 
         if "error" in data:
-            return await self._handle_api_error(data["error"], query)
+            raise VKAPIError.from_response(data["error"])
 
         if "response" not in data:
             if self.requests_made < 50:
                 self.log_error(f"Неожиданный ответ VK API для запроса '{query}': {data}")
-            return []
+            return self._empty_page()
 
-        items = data["response"].get("items", [])
+        page = self._build_page(data["response"])
 
         # Кэширование результата
-        self._cache_response(cache_key, items, query, params)
+        self._cache_response(cache_key, page, query, params)
 
         # Записываем время ответа
         response_time = time.time() - start_time
@@ -369,30 +464,29 @@ class VKSearchPlugin(BasePlugin):
         if self.rate_limit_hits > 0:
             self.rate_limit_hits = max(0, self.rate_limit_hits - 1)
 
-        return items
+        return page
 
-    async def _handle_api_error(self, error, query):
-        """Обрабатывает ошибки VK API"""
-        error_code = error.get("error_code")
+    def _build_page(self, response: dict) -> Dict[str, Any]:
+        """Приводит ответ newsfeed.search к странице с курсором"""
+        items = response.get("items", [])
+        return {
+            "items": items,
+            "next_from": response.get("next_from") or None,
+            "total_count": response.get("total_count", response.get("count", len(items))),
+        }
 
-        if error_code == 6:  # Too many requests per second
-            if self.rate_limit_hits < 10:
-                self.log_warning(f"Rate limit для запроса '{query}', ожидание...")
-            self.rate_limit_hits += 1
-            await asyncio.sleep(1)
-            return "retry"  # Специальный код для повтора
-        else:
-            if self.requests_made < 100:
-                self.log_error(f"Ошибка VK API для запроса '{query}': {error}")
-            return []
+    @staticmethod
+    def _empty_page() -> Dict[str, Any]:
+        """Пустая страница результатов (ошибка запроса или нет данных)"""
+        return {"items": [], "next_from": None, "total_count": 0}
 
-    def _cache_response(self, cache_key, items, query, params):
+    def _cache_response(self, cache_key, page, query, params):
         """Сохраняет ответ в кэш"""
         import time
 
         if self.config["enable_caching"]:
             self.cache[cache_key] = {
-                "data": items,
+                "data": page,
                 "timestamp": time.time(),
                 "query": query,
                 "params": params,
@@ -400,12 +494,13 @@ class VKSearchPlugin(BasePlugin):
             # Умная очистка кэша при необходимости
             self._smart_cache_cleanup()
 
+            if self.persistent_cache:
+                self.persistent_cache.set(cache_key, page, self._persistent_ttl(params))
+
     async def _make_vk_request(self, session, params, query, attempt):
         """Выполняет один запрос к VK API"""
         import time
 
-        await self._rate_limit()
-
         # Обновляем статистику использования токена
         token = params.get("access_token")
         if token:
@@ -414,20 +509,33 @@ class VKSearchPlugin(BasePlugin):
         start_time = time.time()
         cache_key = self._get_cache_key(params)
 
-        try:
-            async with session.get("https://api.vk.com/method/newsfeed.search", params=params) as response:
-                self.requests_made += 1
-                return await self._handle_vk_api_response(response, query, start_time, params, cache_key)
+        # Ошибки не перехватываются: решение о повторе принимает _fetch_vk_page
+        if self.config["use_execute_batching"]:
+            # Rate limiting применяется батчером к каждому запросу execute
+            data = await self.execute_batcher.call(session, params)
+            self.requests_made += 1
+            return await self._handle_vk_api_data(data, query, start_time, params, cache_key)
 
-        except Exception as e:
-            if self.requests_made < 100:
-                self.log_error(f"Ошибка запроса для '{query}': {e}")
-            return []
+        await self._rate_limit(token)
+        async with session.get("https://api.vk.com/method/newsfeed.search", params=params) as response:
+            self.requests_made += 1
+            return await self._handle_vk_api_response(response, query, start_time, params, cache_key)
 
-    async def _fetch_vk_batch(self, session, params, query, retry_count=3):
+    async def _fetch_vk_batch(self, session, params, query, retry_count=None):
         """
         Оптимизированное получение одной партии результатов от VK API с интеллектуальным кэшированием
         """
+        page = await self._fetch_vk_page(session, params, query, retry_count)
+        return page["items"]
+
+    async def _fetch_vk_page(self, session, params, query, retry_count=None) -> Dict[str, Any]:
+        """
+        Получение одной страницы newsfeed.search вместе с курсором next_from и total_count
+
+        Неудачные попытки разбираются VKRetryPolicy по коду ошибки: повтор
+        с экспоненциальной задержкой, карантин токена с переносом запроса
+        на здоровый токен или отказ (пустая страница).
+        """
         # Анализируем паттерны запроса
         self._analyze_query_patterns(query)
 
@@ -436,20 +544,50 @@ class VKSearchPlugin(BasePlugin):
         if cached_result is not None:
             return cached_result
 
-        # Попытки запроса с retry логикой
-        for attempt in range(retry_count):
-            result = await self._make_vk_request(session, params, query, attempt)
+        attempts = retry_count or self.config["max_retries"]
+        for attempt in range(attempts):
+            try:
+                return await self._make_vk_request(session, params, query, attempt)
+            except Exception as error:
+                action, delay = self.retry_policy.decide(error, attempt, attempts)
+                last_error = error
+
+            if getattr(last_error, "error_code", None) in (6, 9, 29):
+                self.rate_limit_hits += 1
+
+            # Токен с ошибкой 5/29 уходит на карантин, даже если повторов больше не будет
+            if self.retry_policy.requires_quarantine(last_error):
+                params = self._move_to_healthy_token(params, last_error)
+                if action == QUARANTINE and params is not None:
+                    continue
+            elif action == RETRY:
+                if self.retry_policy.stats["retries"] <= 20:
+                    self.log_warning(f"Повтор запроса '{query}' через {delay:.1f}с: {last_error}")
+                await asyncio.sleep(delay)
+                continue
 
-            if result == "retry":
-                continue  # Повторяем запрос при rate limit
-            elif isinstance(result, list):
-                return result  # Успешный результат
+            if self.requests_made < 100:
+                self.log_error(f"Ошибка запроса для '{query}': {last_error}")
+            break
 
-            # При других ошибках ждём перед повтором
-            if attempt < retry_count - 1:
-                await asyncio.sleep(1)
+        # Все попытки исчерпаны: помечаем страницу, чтобы не сдвигать отметки инкрементального поиска
+        return {**self._empty_page(), "failed": True}
 
-        return []  # Все попытки исчерпаны
+    def _move_to_healthy_token(self, params: dict, error: Exception):
+        """Отправляет токен на карантин и возвращает параметры с другим, здоровым токеном"""
+        token = params.get("access_token")
+        if self.retry_policy.is_permanent(error):
+            self.rate_limiter.revoke_token(token)
+            self.log_warning(f"Токен {mask_token(token)} недействителен и исключён из ротации: {error}")
+        else:
+            self.rate_limiter.block_token(token, self.config["token_quarantine_seconds"])
+            self.log_warning(f"Токен {mask_token(token)} отправлен на карантин: {error}")
+
+        healthy_token = self.rate_limiter.get_token()
+        if not healthy_token or healthy_token == token:
+            self.log_error("Нет здоровых токенов для повтора запроса")
+            return None
+        return {**params, "access_token": healthy_token}
 
     def _parse_datetime(self, datetime_str: str) -> int:
         """
@@ -484,7 +622,7 @@ class VKSearchPlugin(BasePlugin):
                 self.log_info(f"🚀 Массовый поиск: {total_queries} запросов, batch_size={batch_size}")
             else:
                 self.log_info(f"🚀 Оптимизированный массовый поиск для {total_queries} запросов")
-                self.log_info(f"⚙️ Batch size: {batch_size}, Max batches: {self.config['max_batches']}")
+                self.log_info(f"⚙️ Batch size: {batch_size}, Max pages per keyword: {self.config['max_batches']}")
 
         elif progress_type == "batch" and current_index is not None:
             if total_queries > 20 and current_index % (batch_size * 5) == 0:
@@ -518,37 +656,226 @@ class VKSearchPlugin(BasePlugin):
 
         return params
 
-    async def _process_search_batch(self, session, batch, exact_match, start_ts, end_ts, minus_words):
+    async def _process_search_batch(
+        self, session, batch, exact_match, start_ts, end_ts, minus_words, split_windows: bool = False
+    ):
         """Обрабатывает один батч поисковых запросов"""
-        tasks = []
+        jobs = [
+            self._create_search_job(
+                keyword,
+                self._create_search_params(keyword, token, exact_match, start_ts, end_ts, minus_words),
+                split_windows,
+            )
+            for keyword, token in batch
+        ]
+        posts = await self._collect_job_posts(session, jobs, [token for _, token in batch], len(batch))
 
-        for keyword, token in batch:
-            # Умная ротация токенов - выбираем токен с наименьшей нагрузкой
-            available_tokens = [t for _, t in batch]
-            best_token = self._get_best_token(available_tokens)
+        # При бисекции подокна могут повторно вернуть посты родительского окна
+        return self._merge_unique_posts([posts]) if split_windows else posts
 
-            params = self._create_search_params(keyword, best_token, exact_match, start_ts, end_ts, minus_words)
+    async def _paginate_keyword(self, session, params, keyword) -> List[Dict[str, Any]]:
+        """
+        Курсорная пагинация по одному ключевому слову
 
-            # Создаём задачи для разных offset'ов
-            max_batches = self.config["max_batches"]
-            offsets = [j * 200 for j in range(max_batches)]
+        Первая страница определяет total_count и next_from. Следующие страницы
+        запрашиваются по курсору start_from, пока страница полная, курсор есть
+        и не превышен лимит страниц (max_batches или total_count / count).
+        """
+        job = self._create_search_job(keyword, params)
+        return await self._collect_job_posts(session, [job], [params.get("access_token")], 1)
 
-            for offset in offsets:
-                params_copy = params.copy()
-                params_copy["offset"] = offset
-                tasks.append(self._fetch_vk_batch(session, params_copy, keyword))
+    async def _collect_job_posts(self, session, jobs, tokens, workers) -> List[Dict[str, Any]]:
+        """Выполняет задания поиска и собирает все посты в список"""
+        posts = []
 
-        # Выполняем все задачи параллельно
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        batch_posts = []
+        async def emit(items):
+            posts.extend(items)
 
-        for result in results:
-            if isinstance(result, list):
-                batch_posts.extend(result)
-            elif isinstance(result, Exception):
-                self._handle_search_error(result)
+        await self._run_search_jobs(session, jobs, tokens, workers, emit)
+        return posts
 
-        return batch_posts
+    async def _run_search_jobs(self, session, jobs, tokens, workers, emit) -> None:
+        """Прогоняет задания через планировщик: N воркеров по полосам токенов без барьеров"""
+        async def handler(job, token):
+            try:
+                if self.rate_limiter.is_blocked(token):
+                    # Планировщик не нашёл здоровой полосы: отбрасываем задание
+                    # сразу, а не ждём окончания карантина в лимитере
+                    raise VKAPIError(message=f"Нет здоровых токенов, задание '{job['keyword']}' отброшено")
+                return await self._run_page_job(session, job, token, emit)
+            except Exception:
+                # Ключевое слово загружено не полностью - его отметку сдвигать нельзя
+                if job["progress"] is not None:
+                    job["progress"]["failed"].add(job["keyword"])
+                raise
+
+        scheduler = VKSearchScheduler(
+            handler,
+            tokens,
+            workers,
+            token_available=lambda token: not self.rate_limiter.is_blocked(token),
+        )
+        try:
+            await scheduler.run(jobs)
+        finally:
+            self.scheduler_stats = scheduler.get_statistics()
+
+    @staticmethod
+    def _create_search_job(
+        keyword: str, params: dict, split_windows: bool = False, depth: int = 0, progress: dict = None
+    ) -> Dict[str, Any]:
+        """
+        Задание поиска: окно ключевого слова и состояние его пагинации
+
+        progress - общий для поиска словарь отметок {"watermarks": {}, "failed": set()},
+        его получают все задания-продолжения.
+        """
+        return {
+            "keyword": keyword,
+            "params": params,
+            "split_windows": split_windows
+            and params.get("start_time") is not None
+            and params.get("end_time") is not None,
+            "depth": depth,
+            "pages": 0,
+            "retrieved": 0,
+            "total_count": 0,
+            "progress": progress,
+        }
+
+    async def _run_page_job(self, session, job, token, emit) -> List[Dict[str, Any]]:
+        """
+        Загружает одну страницу задания и возвращает задания-продолжения
+
+        Продолжением может быть следующая страница по курсору start_from
+        или два подокна насыщенного временного окна. newsfeed.search отдаёт
+        не больше ~1000 результатов на запрос: если total_count показывает,
+        что в окне постов больше, чем удалось получить, окно делится пополам.
+        Получатель emit отвечает за удаление дублей по (owner_id, id).
+        Каждый пост помечается запросом, которым он получен (search_query).
+        """
+        keyword, params = job["keyword"], job["params"]
+        page_size = params.get("count", 200)
+        request_params = {**params, "access_token": token} if token else params
+        page = await self._fetch_vk_page(session, request_params, keyword)
+        self.last_search_stats["pages_failed" if page.get("failed") else "pages_loaded"] += 1
+        if job["progress"] is not None:
+            self._track_keyword_progress(job["progress"], keyword, page)
+
+        if job["pages"] == 0:
+            job["total_count"] = page["total_count"]
+            # Заведомо насыщенное окно делим сразу, не тратя запросы на его пагинацию;
+            # посты первой страницы будут получены повторно из подокон
+            if (
+                job["split_windows"]
+                and self._can_split_window(params, job["depth"])
+                and page["total_count"] > self.config["saturation_limit"]
+            ):
+                self._record_keyword_pages(keyword, 1)
+                return self._split_window_job(job)
+
+        job["pages"] += 1
+        job["retrieved"] += len(page["items"])
+        for post in page["items"]:
+            post["search_query"] = keyword
+        await emit(page["items"])
+
+        max_pages = self._estimate_page_count(job["total_count"], page_size)
+        if job["pages"] < max_pages and page["next_from"] and len(page["items"]) >= page_size:
+            return [{**job, "params": {**params, "start_from": page["next_from"]}}]
+
+        if job["pages"] < max_pages and len(page["items"]) < page_size:
+            self.pagination_stats["short_page_stops"] += 1
+        self._record_keyword_pages(keyword, job["pages"])
+
+        if not job["split_windows"] or not self._is_window_saturated(job["retrieved"], job["total_count"]):
+            return []
+        if not self._can_split_window(params, job["depth"]):
+            self.window_split_stats["unresolved_windows"] += 1
+            self.log_warning(
+                f"Окно для '{keyword}' насыщено ({job['retrieved']} из {job['total_count']}), "
+                f"но дальнейшее деление невозможно"
+            )
+            return []
+        return self._split_window_job(job)
+
+    def _split_window_job(self, job) -> List[Dict[str, Any]]:
+        """Делит временное окно задания пополам"""
+        keyword, params = job["keyword"], job["params"]
+        self.window_split_stats["saturated_windows"] += 1
+        self._record_keyword_split(keyword)
+
+        start_ts, end_ts = params["start_time"], params["end_time"]
+        middle_ts = start_ts + (end_ts - start_ts) // 2
+
+        base_params = {name: value for name, value in params.items() if name != "start_from"}
+        left_params = {**base_params, "end_time": middle_ts}
+        right_params = {**base_params, "start_time": middle_ts + 1}
+
+        return [
+            self._create_search_job(keyword, left_params, True, job["depth"] + 1, job["progress"]),
+            self._create_search_job(keyword, right_params, True, job["depth"] + 1, job["progress"]),
+        ]
+
+    @staticmethod
+    def _track_keyword_progress(progress: dict, keyword: str, page: Dict[str, Any]) -> None:
+        """Обновляет отметку ключевого слова самым новым постом страницы (по дате, затем id)"""
+        if page.get("failed"):
+            progress["failed"].add(keyword)
+            return
+
+        mark = progress["watermarks"].get(keyword)
+        for post in page["items"]:
+            candidate = (post.get("date", 0), post.get("id", 0))
+            if mark is None or candidate > (mark["date"], mark["id"]):
+                mark = {"date": candidate[0], "owner_id": post.get("owner_id"), "id": candidate[1]}
+        if mark is not None:
+            progress["watermarks"][keyword] = mark
+
+    def _is_window_saturated(self, retrieved: int, total_count: int) -> bool:
+        """Проверяет, что VK сообщает о заметно большем числе постов, чем получено"""
+        return total_count - retrieved > self.config["saturation_tolerance"]
+
+    def _can_split_window(self, params: dict, depth: int) -> bool:
+        """Проверяет, можно ли делить окно дальше"""
+        if "start_time" not in params or "end_time" not in params:
+            return False
+        if depth >= self.config["max_split_depth"]:
+            return False
+        return params["end_time"] - params["start_time"] >= 2 * self.config["min_window_seconds"]
+
+    def _record_keyword_split(self, keyword: str):
+        """Обновляет статистику делений окна по ключевому слову"""
+        splits = self.window_split_stats["splits_per_keyword"]
+        splits[keyword] = splits.get(keyword, 0) + 1
+
+    @staticmethod
+    def _merge_unique_posts(post_lists: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Объединяет списки постов, оставляя первое вхождение (owner_id, id)"""
+        seen = set()
+        merged = []
+        for posts in post_lists:
+            for post in posts:
+                key = (post.get("owner_id"), post.get("id"))
+                if key in seen:
+                    continue
+                seen.add(key)
+                merged.append(post)
+        return merged
+
+    def _estimate_page_count(self, total_count: int, page_size: int) -> int:
+        """Оценивает число страниц по total_count с ограничением max_batches"""
+        if not total_count:
+            return 1
+        pages_needed = -(-total_count // page_size)
+        return max(1, min(self.config["max_batches"], pages_needed))
+
+    def _record_keyword_pages(self, keyword: str, pages: int):
+        """Обновляет статистику страниц по ключевому слову"""
+        pages_per_keyword = self.pagination_stats["pages_per_keyword"]
+        pages_per_keyword[keyword] = pages_per_keyword.get(keyword, 0) + pages
+        self.pagination_stats["total_pages"] += pages
+        self.pagination_stats["follow_up_pages"] += pages - 1
 
     def _handle_search_error(self, error):
         """Обрабатывает ошибки поиска с оптимизацией логирования"""
@@ -564,6 +891,124 @@ class VKSearchPlugin(BasePlugin):
             self.log_info(f"✅ Получено {total_posts} постов от VK API")
             self.log_info(f"📊 Статистика: {self.requests_made} запросов, {len(self.response_times)} измерений времени")
 
+    def _build_keyword_token_pairs(
+        self, keyword_token_pairs: List[tuple] = None, queries: List[str] = None, tokens: List[str] = None
+    ) -> List[tuple]:
+        """Приводит оба формата вызова к парам (keyword, token)"""
+        if keyword_token_pairs:
+            # Старый формат
+            return list(keyword_token_pairs)
+        if queries and tokens:
+            # Новый формат - создаём пары с ротацией токенов
+            return [(query, tokens[i % len(tokens)]) for i, query in enumerate(queries)]
+        raise ValueError("Необходимо передать либо keyword_token_pairs, либо queries+tokens")
+
+    async def iter_search(
+        self,
+        keyword_token_pairs: List[tuple] = None,
+        queries: List[str] = None,
+        tokens: List[str] = None,
+        start_date=None,
+        end_date=None,
+        exact_match: bool = True,
+        minus_words: List[str] = None,
+        batch_size: int = None,
+        split_saturated_windows: bool = None,
+        max_pending_pages: int = None,
+        since: Dict[str, Dict] = None,
+        watermarks: Dict[str, Dict] = None,
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Потоковый поиск: отдаёт пачки постов по мере получения страниц
+
+        Каждая пачка уже очищена от дублей (по всему поиску) и прошла строгую
+        локальную фильтрацию. Очередь страниц ограничена max_pending_pages:
+        если потребитель не успевает, запросы к VK приостанавливаются, поэтому
+        память ограничена страницами «в полёте», а не объёмом результатов.
+
+        Args:
+            batch_size: Число воркеров планировщика (одновременно загружаемых страниц)
+            max_pending_pages: Размер очереди готовых страниц (по умолчанию из конфигурации)
+            since: Отметки прошлого запуска {ключевое слово: {"date", "owner_id", "id"}};
+                ключевое слово с отметкой ищется только начиная с её даты
+            watermarks: Словарь, который по завершении заполняется новыми отметками
+                (только для ключевых слов, все страницы которых загружены без ошибок)
+        """
+        pairs = self._build_keyword_token_pairs(keyword_token_pairs, queries, tokens)
+
+        if batch_size is None:
+            batch_size = self.config["batch_size"]
+        if split_saturated_windows is None:
+            split_saturated_windows = self.config["split_saturated_windows"]
+        if max_pending_pages is None:
+            max_pending_pages = self.config["stream_max_pending_pages"]
+
+        start_ts, end_ts = self._convert_dates_to_timestamps(start_date, end_date)
+        filter_keywords = [keyword for keyword, _ in pairs]
+        strict_filter = VKStrictFilter(filter_keywords, exact_match) if filter_keywords else None
+        self.retry_policy.reset_budget()
+        self.last_search_stats = {"pages_loaded": 0, "pages_failed": 0}
+
+        pages = asyncio.Queue(maxsize=max_pending_pages)
+        finished = object()
+        seen = set()
+
+        since = since or {}
+        progress = {"watermarks": {}, "failed": set()} if watermarks is not None else None
+
+        session = await self.session_manager.get_session()
+        jobs = []
+        for keyword, token in pairs:
+            keyword_start_ts = start_ts
+            if keyword in since:
+                # Инкрементальный режим: от отметки прошлого запуска; пост на границе
+                # вернётся повторно и отсеется дедупликацией при сохранении
+                keyword_start_ts = max(start_ts or 0, since[keyword]["date"])
+            params = self._create_search_params(keyword, token, exact_match, keyword_start_ts, end_ts, minus_words)
+            jobs.append(self._create_search_job(keyword, params, split_saturated_windows, progress=progress))
+
+        async def emit(items):
+            if items:
+                await pages.put(items)
+
+        async def produce():
+            try:
+                await self._run_search_jobs(session, jobs, [token for _, token in pairs], batch_size, emit)
+                if progress is not None:
+                    watermarks.update(
+                        (keyword, mark)
+                        for keyword, mark in progress["watermarks"].items()
+                        if keyword not in progress["failed"]
+                    )
+            finally:
+                await pages.put(finished)
+
+        producer = asyncio.ensure_future(produce())
+        try:
+            while True:
+                items = await pages.get()
+                if items is finished:
+                    break
+
+                batch = []
+                for post in items:
+                    key = (post.get("owner_id"), post.get("id"))
+                    if key not in seen:
+                        seen.add(key)
+                        batch.append(post)
+
+                if batch and filter_keywords:
+                    batch = self._strict_local_filter(
+                        batch, filter_keywords, exact_match, log_result=False, strict_filter=strict_filter
+                    )
+                if batch:
+                    yield batch
+        finally:
+            if not producer.done():
+                producer.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await producer
+
     async def mass_search_with_tokens(
         self,
         keyword_token_pairs: List[tuple] = None,
@@ -574,27 +1019,24 @@ class VKSearchPlugin(BasePlugin):
         exact_match: bool = True,
         minus_words: List[str] = None,
         batch_size: int = None,
+        split_saturated_windows: bool = None,
+        since: Dict[str, Dict] = None,
+        watermarks: Dict[str, Dict] = None,
     ) -> List[Dict[str, Any]]:
         """
         Оптимизированный массовый асинхронный поиск с умной ротацией токенов
 
+        Собирает в список результат iter_search(); для обработки по мере
+        поступления используйте iter_search() напрямую.
+
         Args:
             keyword_token_pairs: Старый формат - пары (keyword, token)
             queries: Новый формат - список запросов
             tokens: Новый формат - список токенов
+            split_saturated_windows: Делить насыщенные временные окна (по умолчанию из конфигурации)
+            since, watermarks: Инкрементальный режим, см. iter_search()
         """
-        # Поддержка обоих форматов вызова
-        if keyword_token_pairs:
-            # Старый формат
-            pairs = keyword_token_pairs
-        elif queries and tokens:
-            # Новый формат - создаём пары с ротацией токенов
-            pairs = []
-            for i, query in enumerate(queries):
-                token = tokens[i % len(tokens)]
-                pairs.append((query, token))
-        else:
-            raise ValueError("Необходимо передать либо keyword_token_pairs, либо queries+tokens")
+        pairs = self._build_keyword_token_pairs(keyword_token_pairs, queries, tokens)
 
         # Используем конфигурационный batch_size если не передан
         if batch_size is None:
@@ -602,60 +1044,26 @@ class VKSearchPlugin(BasePlugin):
 
         total_queries = len(pairs)
 
-        # Конвертация дат
-        start_ts, end_ts = self._convert_dates_to_timestamps(start_date, end_date)
-
         # Логирование начала поиска
         self._log_search_progress(total_queries, batch_size, progress_type="start")
 
         all_posts = []
-
-        # Настройка HTTP клиента
-        timeout = aiohttp.ClientTimeout(total=self.config["timeout"])
-        connector = (
-            aiohttp.TCPConnector(
-                limit=150,  # Увеличено с 100 до 150
-                limit_per_host=30,  # Увеличено с 20 до 30
-                ttl_dns_cache=600,  # Увеличено до 10 минут
-                use_dns_cache=True,
-                keepalive_timeout=30,  # Новый параметр
-                enable_cleanup_closed=True  # Новый параметр
-            )
-        )
-
-        async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
-            # Обрабатываем запросы батчами
-            for i in range(0, len(pairs), batch_size):
-                batch = pairs[i : i + batch_size]
-
-                # Логирование прогресса
-                self._log_search_progress(total_queries, batch_size, i, "batch")
-
-                # Обработка батча
-                batch_posts = await self._process_search_batch(
-                    session, batch, exact_match, start_ts, end_ts, minus_words
-                )
-                all_posts.extend(batch_posts)
-
-                # Логирование результата батча
-                if total_queries > 20:
-                    self._log_search_progress(total_queries, batch_size, i, "batch_result")
+        async for batch in self.iter_search(
+            keyword_token_pairs=pairs,
+            start_date=start_date,
+            end_date=end_date,
+            exact_match=exact_match,
+            minus_words=minus_words,
+            batch_size=batch_size,
+            split_saturated_windows=split_saturated_windows,
+            since=since,
+            watermarks=watermarks,
+        ):
+            all_posts.extend(batch)
 
         # Очистка кэша и финальная статистика
         self._cleanup_cache()
 
-        # Применяем строгую локальную фильтрацию
-        if all_posts:
-            # Извлекаем ключевые слова в зависимости от формата вызова
-            filter_keywords = []
-            if queries:
-                filter_keywords = queries
-            elif keyword_token_pairs:
-                filter_keywords = [pair[0] for pair in keyword_token_pairs]  # Извлекаем только ключевые слова
-
-            if filter_keywords:
-                all_posts = self._strict_local_filter(all_posts, filter_keywords, exact_match)
-
         self._log_final_statistics(total_queries, len(all_posts))
 
         return all_posts
@@ -677,47 +1085,31 @@ class VKSearchPlugin(BasePlugin):
         if expired_keys:
             self.log_info(f"🧹 Очищено {len(expired_keys)} устаревших записей кэша")
 
-    def _strict_local_filter(self, posts: List[Dict], keywords: List[str], exact_match: bool = True) -> List[Dict]:
+    def _strict_local_filter(
+        self,
+        posts: List[Dict],
+        keywords: List[str],
+        exact_match: bool = True,
+        log_result: bool = True,
+        strict_filter: VKStrictFilter = None,
+    ) -> List[Dict]:
         """
         Улучшенная строгая локальная фильтрация постов по ключевым словам
         Исправляет проблемы VK API, который возвращает нерелевантные результаты
+
+        Args:
+            strict_filter: Фильтр, скомпилированный заранее для этих keywords
+                (iter_search строит его один раз на поиск)
         """
         if not posts or not keywords:
             return posts
 
-        filtered_posts = []
-
-        for post in posts:
-            text = post.get('text', '').strip() if post.get('text') else ''
-            if not text:
-                continue
+        if strict_filter is None:
+            strict_filter = VKStrictFilter(keywords, exact_match)
+        filtered_posts = strict_filter.apply(posts)
 
-            # Нормализация текста - убираем лишние символы но сохраняем структуру
-            normalized_text = self._normalize_text_for_search(text)
-            matched_keywords = []
-
-            # Проверяем каждое ключевое слово
-            for keyword in keywords:
-                keyword_normalized = self._normalize_text_for_search(keyword)
-
-                if exact_match:
-                    # Более гибкая проверка: ищем ключевое слово как подстроку
-                    if keyword_normalized.lower() in normalized_text.lower():
-                        matched_keywords.append(keyword)
-                else:
-                    # Менее строгая проверка: все слова должны присутствовать
-                    words = keyword_normalized.lower().split()
-                    if all(word in normalized_text.lower() for word in words):
-                        matched_keywords.append(keyword)
-
-            # Добавляем пост только если есть совпадения
-            if matched_keywords:
-                post['keywords_matched'] = matched_keywords
-                filtered_posts.append(post)
-
-        original_count = len(posts)
-        filtered_count = len(filtered_posts)
-        self.log_info(f"🔍 Улучшенная фильтрация: {original_count} → {filtered_count} постов")
+        if log_result:
+            self.log_info(f"🔍 Улучшенная фильтрация: {len(posts)} → {len(filtered_posts)} постов")
 
         return filtered_posts
 
@@ -726,20 +1118,7 @@ class VKSearchPlugin(BasePlugin):
         Нормализация текста для поиска
         Убирает лишние символы но сохраняет основной смысл
         """
-        if not text:
-            return ""
-
-        # Убираем множественные переносы строк и пробелы
-        normalized = ' '.join(text.split())
-
-        # Убираем некоторые специальные символы но сохраняем пунктуацию
-        import re
-        normalized = re.sub(r'[^\w\s\.\,\!\?\-\—\«\»\"\'\:\;\(\)]', ' ', normalized)
-
-        # Убираем множественные пробелы
-        normalized = re.sub(r'\s+', ' ', normalized)
-
-        return normalized.strip()
+        return normalize_search_text(text)
 
     def _preload_cache_for_keywords(self, keywords: List[str]) -> None:
         """
@@ -0,0 +1,148 @@
+"""
+Планировщик страниц поиска VK
+
+Вместо батчей ключевых слов с барьером asyncio.gather используется общая
+очередь заданий «ключевое слово + страница», которую разбирают N воркеров.
+Каждый воркер закреплён за полосой токена: медленный или повторяемый запрос
+занимает только свой воркер, остальные продолжают работу. Обработчик задания
+может вернуть продолжения (следующую страницу, подокна), они сразу ставятся
+в очередь. Если токен полосы уходит на карантин, её воркеры переходят
+на здоровые полосы.
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from loguru import logger
+
+from src.plugins.token_manager.token_limiter import mask_token
+
+# handler(job, token) -> список заданий-продолжений
+JobHandler = Callable[[Dict[str, Any], str], Awaitable[List[Dict[str, Any]]]]
+
+
+class VKSearchScheduler:
+    """Очередь заданий с ограниченным числом воркеров по полосам токенов"""
+
+    def __init__(
+        self,
+        handler: JobHandler,
+        tokens: Iterable[str],
+        workers: int,
+        token_available: Optional[Callable[[str], bool]] = None,
+    ):
+        self.handler = handler
+        self.token_available = token_available
+        self.tokens = list(dict.fromkeys(token for token in tokens if token)) or [None]
+        # Хотя бы один воркер на полосу, иначе токен простаивает
+        self.workers = max(workers, len(self.tokens))
+
+        self.queue: asyncio.Queue = None
+        self.worker_stats: List[Dict[str, Any]] = []
+        self.stats = {
+            "jobs_done": 0,
+            "jobs_failed": 0,
+            "max_queue_size": 0,
+            "lane_switches": 0,
+            "elapsed_seconds": 0.0,
+        }
+
+    def submit(self, job: Dict[str, Any]) -> None:
+        """Ставит задание в очередь"""
+        self.queue.put_nowait(job)
+        self.stats["max_queue_size"] = max(self.stats["max_queue_size"], self.queue.qsize())
+
+    async def run(self, jobs: Iterable[Dict[str, Any]]) -> None:
+        """Выполняет задания и все их продолжения, возвращается когда очередь пуста"""
+        self.queue = asyncio.Queue()
+        self.worker_stats = [
+            {
+                "lane": mask_token(self.tokens[index % len(self.tokens)]),
+                "jobs": 0,
+                "busy_seconds": 0.0,
+                "idle_seconds": 0.0,
+            }
+            for index in range(self.workers)
+        ]
+
+        for job in jobs:
+            self.submit(job)
+
+        started = time.monotonic()
+        workers = [
+            asyncio.ensure_future(self._worker(index, self.tokens[index % len(self.tokens)]))
+            for index in range(self.workers)
+        ]
+        try:
+            await self.queue.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            self.stats["elapsed_seconds"] = round(time.monotonic() - started, 3)
+
+    async def _worker(self, index: int, token: str) -> None:
+        """Забирает задания из общей очереди и выполняет их в полосе своего токена"""
+        stats = self.worker_stats[index]
+        while True:
+            idle_started = time.monotonic()
+            try:
+                job = await self.queue.get()
+            finally:
+                busy_started = time.monotonic()
+                stats["idle_seconds"] += busy_started - idle_started
+
+            if self.token_available and not self.token_available(token):
+                token = self._switch_lane(index, token)
+
+            try:
+                for follow_up in await self.handler(job, token) or []:
+                    self.submit(follow_up)
+                self.stats["jobs_done"] += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats["jobs_failed"] += 1
+                logger.error(f"[VKSearchScheduler] Ошибка задания '{job.get('keyword')}': {e}")
+            finally:
+                stats["jobs"] += 1
+                stats["busy_seconds"] += time.monotonic() - busy_started
+                self.queue.task_done()
+
+    def _switch_lane(self, index: int, token: str) -> str:
+        """Переводит воркер с карантинной полосы на наименее занятую здоровую"""
+        healthy = [lane for lane in self.tokens if lane != token and self.token_available(lane)]
+        if not healthy:
+            return token  # Здоровых полос нет: обработчик отбросит задание сам
+
+        lanes = [stats["lane"] for stats in self.worker_stats]
+        new_token = min(healthy, key=lambda lane: lanes.count(mask_token(lane)))
+        self.worker_stats[index]["lane"] = mask_token(new_token)
+        self.stats["lane_switches"] += 1
+        logger.info(f"[VKSearchScheduler] Воркер {index} перешёл на полосу {mask_token(new_token)}")
+        return new_token
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Статистика последнего запуска, включая занятость каждого воркера"""
+        workers = []
+        for stats in self.worker_stats:
+            total = stats["busy_seconds"] + stats["idle_seconds"]
+            workers.append(
+                {
+                    **stats,
+                    "busy_seconds": round(stats["busy_seconds"], 3),
+                    "idle_seconds": round(stats["idle_seconds"], 3),
+                    "utilization": round(stats["busy_seconds"] / total, 3) if total else 0,
+                }
+            )
+
+        busy = sum(worker["busy_seconds"] for worker in workers)
+        elapsed = self.stats["elapsed_seconds"]
+        return {
+            **self.stats,
+            "workers": len(workers),
+            "lanes": len(self.tokens),
+            "average_utilization": round(busy / (elapsed * len(workers)), 3) if elapsed and workers else 0,
+            "worker_stats": workers,
+        }
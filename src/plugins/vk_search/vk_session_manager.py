@@ -0,0 +1,188 @@
+"""
+Общий пул HTTP-соединений для VK API
+
+Одна keep-alive сессия aiohttp переиспользуется всеми поисками, задачами
+и перезапусками, поэтому TLS-рукопожатие и DNS оплачиваются один раз.
+Сессия aiohttp привязана к event loop, поэтому менеджер также держит
+собственный долгоживущий loop в фоновом потоке: код, запущенный через
+run(), всегда попадает в один и тот же loop и получает тёплый пул.
+"""
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Dict, Optional
+
+import aiohttp
+from loguru import logger
+
+
+class VKSessionManager:
+    """Владеет сессией aiohttp и её TCPConnector, собирает метрики пула"""
+
+    def __init__(
+        self,
+        timeout: float = 30,
+        limit: int = 150,
+        limit_per_host: int = 30,
+        ttl_dns_cache: int = 600,
+        keepalive_timeout: float = 30,
+    ):
+        self.timeout = timeout
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.ttl_dns_cache = ttl_dns_cache
+        self.keepalive_timeout = keepalive_timeout
+
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.session_loop: Optional[asyncio.AbstractEventLoop] = None
+        self.lock = threading.Lock()
+
+        # Собственный loop для запуска поисков из синхронного кода (GUI-потоки)
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.loop_thread: Optional[threading.Thread] = None
+
+        self.stats = {
+            "sessions_created": 0,
+            "sessions_reused": 0,
+            "connections_created": 0,
+            "connections_reused": 0,
+        }
+
+    def configure(self, **settings) -> None:
+        """Обновляет параметры пула; применяются к следующей создаваемой сессии"""
+        for name, value in settings.items():
+            if value is not None and hasattr(self, name):
+                setattr(self, name, value)
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        """Возвращает общую сессию для текущего event loop, создавая её при необходимости"""
+        loop = asyncio.get_running_loop()
+
+        if self.session is not None and not self.session.closed and self.session_loop is loop:
+            self.stats["sessions_reused"] += 1
+            return self.session
+
+        # Сессия от другого (или закрытого) loop в этом loop непригодна
+        self._close_session()
+
+        self.session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            connector=aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=self.ttl_dns_cache,
+                use_dns_cache=True,
+                keepalive_timeout=self.keepalive_timeout,
+                enable_cleanup_closed=True,
+            ),
+            trace_configs=[self._build_trace_config()],
+        )
+        self.session_loop = loop
+        self.stats["sessions_created"] += 1
+        return self.session
+
+    def _build_trace_config(self) -> aiohttp.TraceConfig:
+        """Счётчики новых и переиспользованных соединений"""
+        trace_config = aiohttp.TraceConfig()
+
+        async def on_connection_create_end(session, context, params):
+            self.stats["connections_created"] += 1
+
+        async def on_connection_reuseconn(session, context, params):
+            self.stats["connections_reused"] += 1
+
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+        return trace_config
+
+    def run(self, coro: Awaitable, timeout: Optional[float] = None) -> Any:
+        """
+        Выполняет корутину в долгоживущем loop менеджера и ждёт результат
+
+        Вызывается из синхронного кода (рабочих потоков), вместо создания
+        нового event loop на каждый поиск.
+        """
+        loop = self._ensure_loop()
+        return asyncio.run_coroutine_threadsafe(coro, loop).result(timeout)
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """Запускает фоновый поток с event loop при первом обращении"""
+        with self.lock:
+            if self.loop is None or self.loop.is_closed():
+                self.loop = asyncio.new_event_loop()
+                self.loop_thread = threading.Thread(
+                    target=self.loop.run_forever, name="vk-session-loop", daemon=True
+                )
+                self.loop_thread.start()
+            return self.loop
+
+    def _close_session(self) -> None:
+        """Закрывает текущую сессию в её собственном loop, если он ещё жив"""
+        session, loop = self.session, self.session_loop
+        self.session, self.session_loop = None, None
+        if session is None or session.closed:
+            return
+
+        if loop is None or loop.is_closed():
+            # Транспорты умерли вместе с loop, остаётся освободить коннектор без await
+            connector = session.connector
+            session.detach()
+            try:
+                connector._close()
+            except Exception as e:
+                logger.debug(f"[VKSessionManager] Коннектор закрытого loop не освобождён: {e}")
+            return
+
+        try:
+            if loop.is_running():
+                if loop is _get_running_loop():
+                    loop.create_task(session.close())
+                else:
+                    asyncio.run_coroutine_threadsafe(session.close(), loop).result(self.timeout)
+            else:
+                loop.run_until_complete(session.close())
+        except Exception as e:
+            logger.warning(f"[VKSessionManager] Ошибка закрытия сессии: {e}")
+
+    def close(self) -> None:
+        """Закрывает сессию и останавливает фоновый loop; безопасно вызывать без loop"""
+        self._close_session()
+
+        with self.lock:
+            loop, thread = self.loop, self.loop_thread
+            self.loop, self.loop_thread = None, None
+
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(loop.stop)
+            if thread is not None:
+                thread.join(timeout=5)
+            if not loop.is_running():
+                loop.close()
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Метрики пула: открытые, простаивающие и переиспользованные соединения"""
+        connector = self.session.connector if self.session is not None and not self.session.closed else None
+
+        # aiohttp не даёт публичного API для состояния пула, читаем его аккуратно
+        idle = sum(len(conns) for conns in getattr(connector, "_conns", {}).values()) if connector else 0
+        active = len(getattr(connector, "_acquired", ())) if connector else 0
+
+        created = self.stats["connections_created"]
+        reused = self.stats["connections_reused"]
+        return {
+            **self.stats,
+            "session_open": connector is not None,
+            "open_connections": idle + active,
+            "active_connections": active,
+            "idle_connections": idle,
+            "reuse_rate": round(reused / (created + reused), 3) if created + reused else 0,
+            "limit": self.limit,
+            "limit_per_host": self.limit_per_host,
+        }
+
+
+def _get_running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
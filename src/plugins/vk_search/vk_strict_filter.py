@@ -0,0 +1,72 @@
+"""
+Строгая локальная фильтрация результатов VK API
+
+VK по запросу возвращает и нерелевантные посты, поэтому каждый пост
+проверяется локально. Регулярные выражения компилируются при импорте,
+ключевые слова нормализуются один раз на поиск, а все термины всех ключей
+ищутся в тексте поста за один проход общим автоматом Ахо-Корасик.
+"""
+
+import re
+from typing import Dict, Iterable, List
+
+from src.plugins.post_processor.filter.keyword_matcher import get_keyword_matcher
+
+# Символы вне набора заменяются пробелом: буквы, цифры и основная пунктуация сохраняются
+_UNSUPPORTED_CHARS = re.compile(r'[^\w\s\.\,\!\?\-\—\«\»\"\'\:\;\(\)]')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_search_text(text: str) -> str:
+    """
+    Нормализация текста для поиска
+    Убирает лишние символы но сохраняет основной смысл
+    """
+    if not text:
+        return ""
+
+    normalized = _UNSUPPORTED_CHARS.sub(' ', ' '.join(text.split()))
+    return _WHITESPACE.sub(' ', normalized).strip()
+
+
+class VKStrictFilter:
+    """
+    Скомпилированный строгий фильтр для набора ключевых слов
+
+    При exact_match ключ должен встретиться в тексте целиком (как подстрока),
+    иначе - каждое его слово по отдельности. Оба режима сводятся к одному:
+    ключ совпал, если найдены все его термины.
+    """
+
+    def __init__(self, keywords: Iterable[str], exact_match: bool = True):
+        self.keywords = list(keywords)
+        self.exact_match = exact_match
+
+        # Термины каждого ключа в нижнем регистре; пустой список совпадает с любым текстом
+        self.keyword_terms: List[frozenset] = []
+        for keyword in self.keywords:
+            normalized = normalize_search_text(keyword).lower()
+            terms = [normalized] if exact_match else normalized.split()
+            self.keyword_terms.append(frozenset(term for term in terms if term))
+
+        all_terms = sorted(set().union(*self.keyword_terms)) if self.keyword_terms else []
+        self.matcher = get_keyword_matcher(all_terms)
+
+    def match(self, text: str) -> List[str]:
+        """Ключи, найденные в тексте поста, в порядке исходного списка"""
+        found = set(self.matcher.find_all(normalize_search_text(text)))
+        return [keyword for keyword, terms in zip(self.keywords, self.keyword_terms) if terms <= found]
+
+    def apply(self, posts: List[Dict]) -> List[Dict]:
+        """Оставляет посты с совпадениями и записывает их в keywords_matched"""
+        filtered_posts = []
+        for post in posts:
+            text = post.get('text', '').strip() if post.get('text') else ''
+            if not text:
+                continue
+
+            matched_keywords = self.match(text)
+            if matched_keywords:
+                post['keywords_matched'] = matched_keywords
+                filtered_posts.append(post)
+        return filtered_posts
@@ -0,0 +1,9 @@
+"""
+Общая настройка pytest: каталог test/ добавляется в sys.path,
+чтобы тесты всех областей импортировали общие помощники из helpers.py
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Юнит-тесты пакетного сохранения постов в DatabasePlugin
+"""
+
+import unittest
+
+import helpers
+from helpers import DatabaseTestCase
+
+
+def make_posts(start, count, keywords=("тестовый",)):
+    return helpers.make_posts(
+        start,
+        count,
+        text="Тестовый пост номер {i}",
+        owner_id=-123456,
+        likes={"count": 10},
+        comments=2,
+        reposts={"count": 1},
+        views=None,
+        keywords_matched=list(keywords),
+    )
+
+
+class TestBulkIngestion(DatabaseTestCase):
+    """Тесты save_posts_bulk"""
+
+    def setUp(self):
+        super().setUp()
+        self.task_id = self.plugin.create_task("Задача", ["тестовый"])
+
+    def test_bulk_save_skips_duplicates_and_empty_texts(self):
+        """Дубликаты по ссылке и посты без текста не сохраняются, статистика задачи пересчитана"""
+        posts = make_posts(0, 50) + make_posts(40, 20) + [{"id": 999, "owner_id": 1, "text": ""}]
+
+        stats = self.plugin.save_posts_bulk(self.task_id, posts, chunk_size=7)
+
+        self.assertEqual((stats["rows"], stats["saved"]), (70, 60))
+        self.assertGreater(stats["rows_per_second"], 0)
+        self.assertEqual(self.plugin.get_statistics()["last_save"], stats)
+        self.assertEqual(self.plugin.save_posts(self.task_id, make_posts(0, 5)), 0)
+
+        task = self.plugin.get_task_statistics(self.task_id)
+        self.assertEqual((task["total_posts"], task["total_likes"], task["total_SI"]), (60, 600, 780))
+
+        stored = self.plugin.get_task_posts(self.task_id, limit=1)[0]
+        self.assertEqual(stored["keywords_matched"], ["тестовый"])
+        self.assertEqual((stored["comments"], stored["views"]), (2, 0))
+        self.assertEqual(stored["link"], f"https://vk.com/wall{stored['vk_id']}")
+
+    def test_connections_use_wal_and_pragmas(self):
+        """Соединения плагина работают в WAL с настроенными параметрами"""
+        with self.plugin.write_connection() as writer:
+            for conn in (self.plugin.connection, writer):
+                self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+                self.assertEqual(conn.execute("PRAGMA synchronous").fetchone()[0], 1)  # NORMAL
+                self.assertEqual(conn.execute("PRAGMA temp_store").fetchone()[0], 2)  # MEMORY
+
+    def test_update_task_posts_replaces_rows(self):
+        """update_task_posts перезаписывает посты пакетно"""
+        self.plugin.save_posts(self.task_id, make_posts(0, 3))
+        updated = make_posts(0, 3, keywords=("пост",))
+
+        self.plugin.update_task_posts(self.task_id, updated)
+
+        posts = self.plugin.get_task_posts(self.task_id)
+        self.assertEqual(len(posts), 3)
+        self.assertEqual({tuple(post["keywords_matched"]) for post in posts}, {("пост",)})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Юнит-тесты ConnectionManager и конкурентного доступа к DatabasePlugin
+"""
+
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+
+from helpers import DatabaseTestCase, make_posts
+from src.plugins.database.connection_manager import ConnectionManager
+
+
+class TestConnectionManager(unittest.TestCase):
+    """Тесты читателей по потокам и сериализованного писателя"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.manager = ConnectionManager(os.path.join(self.temp_dir.name, "test.db"), {"journal_mode": "WAL"})
+        with self.manager.writer() as conn:
+            conn.execute("CREATE TABLE items (value INTEGER)")
+
+    def tearDown(self):
+        self.manager.close()
+        self.temp_dir.cleanup()
+
+    def test_readers_are_reused_per_thread(self):
+        """Поток получает одно и то же соединение, другой поток - своё; соединения завершённых потоков закрываются"""
+        self.assertIs(self.manager.reader(), self.manager.reader())
+
+        other = []
+        thread = threading.Thread(target=lambda: other.append(self.manager.reader()))
+        thread.start()
+        thread.join()
+        self.assertIsNot(other[0], self.manager.reader())
+
+        thread = threading.Thread(target=self.manager.reader)
+        thread.start()
+        thread.join()
+        self.assertEqual(self.manager.get_statistics()["readers_closed"], 1)
+        self.assertEqual(self.manager.get_statistics()["open_readers"], 2)
+
+    def test_nested_writes_commit_once_and_roll_back_on_error(self):
+        """Вложенный writer() не фиксирует транзакцию; исключение откатывает всю запись"""
+        reader = self.manager.reader()
+        with self.manager.writer() as conn:
+            conn.execute("INSERT INTO items VALUES (1)")
+            with self.manager.writer() as nested:
+                self.assertIs(nested, conn)
+                nested.execute("INSERT INTO items VALUES (2)")
+            self.assertEqual(reader.execute("SELECT COUNT(*) FROM items").fetchone()[0], 0)
+        self.assertEqual(reader.execute("SELECT COUNT(*) FROM items").fetchone()[0], 2)
+
+        with self.assertRaises(ValueError):
+            with self.manager.writer() as conn:
+                conn.execute("INSERT INTO items VALUES (3)")
+                raise ValueError("ошибка")
+        self.assertEqual(reader.execute("SELECT COUNT(*) FROM items").fetchone()[0], 2)
+
+        stats = self.manager.get_statistics()
+        self.assertEqual((stats["write_transactions"], stats["write_rollbacks"]), (2, 1))
+
+        self.manager.close()
+        with self.assertRaises(sqlite3.ProgrammingError):
+            self.manager.reader()
+
+
+class TestConcurrentDatabaseAccess(DatabaseTestCase):
+    """Чтения из других потоков во время фоновой записи"""
+
+    def setUp(self):
+        super().setUp()
+        self.task_id = self.plugin.create_task("Задача", ["тестовый"])
+
+    def test_reads_during_background_writes(self):
+        """Читатели видят только зафиксированные пачки и не получают "database is locked" """
+        batches, batch_size = 20, 200
+        errors, seen = [], []
+        done = threading.Event()
+
+        def write():
+            try:
+                for batch in range(batches):
+                    self.plugin.save_posts_bulk(self.task_id, make_posts(batch * batch_size, batch_size))
+                    self.plugin.update_task_status(self.task_id, f"batch {batch}")
+            except Exception as e:
+                errors.append(e)
+            finally:
+                done.set()
+
+        def read():
+            try:
+                while True:
+                    finished = done.is_set()
+                    count = self.plugin.connection.execute(
+                        "SELECT COUNT(*) FROM posts WHERE task_id = ?", (self.task_id,)
+                    ).fetchone()[0]
+                    self.assertEqual(count % batch_size, 0)
+                    seen.append(count)
+                    self.plugin.get_tasks()
+                    if finished:
+                        break
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=write)] + [threading.Thread(target=read) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertTrue(seen)
+        self.assertEqual(self.plugin.get_task_statistics(self.task_id)["total_posts"], batches * batch_size)
+
+        # Соединения открываются один раз на поток и писатель, а не на каждый вызов
+        stats = self.plugin.get_statistics()["connections"]
+        self.assertLessEqual(stats["connections_opened"], 5)
+        self.assertGreaterEqual(stats["write_transactions"], batches * 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
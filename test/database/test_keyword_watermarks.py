@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Юнит-тесты отметок инкрементального поиска в DatabasePlugin
+"""
+
+import unittest
+
+from helpers import DatabaseTestCase
+
+
+class TestKeywordWatermarks(DatabaseTestCase):
+    """Тесты отметок инкрементального поиска"""
+
+    def test_watermarks_only_move_forward(self):
+        """Более старая отметка не перезаписывает новую"""
+        task_id = self.plugin.create_task("Задача", ["новости"], exact_match=True)
+        self.plugin.update_keyword_watermarks(task_id, {"новости": {"date": 200, "owner_id": 1, "id": 5}})
+        self.plugin.update_keyword_watermarks(
+            task_id,
+            {"новости": {"date": 100, "owner_id": 1, "id": 9}, "спорт": {"date": 50, "owner_id": 2, "id": 1}},
+        )
+
+        self.assertEqual(
+            self.plugin.get_keyword_watermarks(task_id),
+            {"новости": {"date": 200, "owner_id": 1, "id": 5}, "спорт": {"date": 50, "owner_id": 2, "id": 1}},
+        )
+
+    def test_incremental_task_requires_same_queries_and_marks(self):
+        """Для дозагрузки выбирается последняя задача с теми же запросами и отметками"""
+        without_marks = self.plugin.create_task("Без отметок", ["новости"], exact_match=True)
+        with_marks = self.plugin.create_task("С отметками", ["новости"], exact_match=True)
+        self.plugin.update_keyword_watermarks(with_marks, {"новости": {"date": 1, "owner_id": 1, "id": 1}})
+
+        self.assertNotEqual(without_marks, with_marks)
+        self.assertEqual(self.plugin.find_incremental_task(["новости"], True), with_marks)
+        self.assertIsNone(self.plugin.find_incremental_task(["новости"], False))
+        self.assertIsNone(self.plugin.find_incremental_task(["спорт"], True))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Юнит-тесты полнотекстового индекса постов (FTS5) и фильтрации из БД через него
+"""
+
+import random
+import sqlite3
+import unittest
+
+import helpers
+from helpers import DatabaseTestCase
+from src.plugins.database.post_search import normalize_search_text
+from src.plugins.post_processor.filter.filter_plugin import FilterPlugin
+
+WORDS = ["новости", "дня", "ок", "Спорт", "футбол", "#новости", "@user", "Москва", "100%", "а_б", "c++"]
+
+
+def make_posts(count, seed=0):
+    rnd = random.Random(seed)
+    posts = helpers.make_posts(0, count)
+    for post in posts:
+        post["text"] = " ".join(rnd.choice(WORDS) for _ in range(rnd.randint(1, 6)))
+    return posts
+
+
+class TestPostSearch(DatabaseTestCase):
+    """Тесты DatabasePlugin.search_posts и синхронизации posts_fts"""
+
+    def setUp(self):
+        super().setUp()
+        self.task_id = self.plugin.create_task("Задача", ["новости"])
+        self.plugin.save_posts_bulk(self.task_id, make_posts(2000), chunk_size=300)
+
+    def expected_ids(self, keywords, exact_match=True, minus_words=()):
+        """Те же правила полным перебором очищенных текстов"""
+        phrases = [phrase for phrase in map(normalize_search_text, keywords) if phrase]
+        minus = [phrase for phrase in map(normalize_search_text, minus_words) if phrase]
+        ids = []
+        for post in self.plugin.get_task_posts(self.task_id):
+            text = normalize_search_text(post["text"])
+            matched = any(phrase in text if exact_match else all(word in text for word in phrase.split()) for phrase in phrases)
+            if matched and not any(word in text for word in minus):
+                ids.append(post["id"])
+        return sorted(ids)
+
+    def test_matches_substring_rules(self):
+        """Фразы, все слова, короткие ключи, спецсимволы LIKE и минус-слова совпадают с перебором"""
+        cases = [
+            (["новости дня"], True, []),
+            (["ок"], True, []),
+            (["дня ок", "спорт"], False, ["москва"]),
+            (["100%", "а_б"], True, ["ок"]),
+            (["C++ ок"], False, []),
+            (["Новости"], True, ["#новости", "футбол"]),
+        ]
+        for keywords, exact_match, minus_words in cases:
+            self.assertEqual(
+                self.plugin.search_posts(self.task_id, keywords, exact_match, minus_words),
+                self.expected_ids(keywords, exact_match, minus_words),
+                (keywords, exact_match, minus_words),
+            )
+
+        # Хэштеги и упоминания остаются в тексте индекса
+        self.assertEqual(self.plugin.search_posts(self.task_id, ["user"]), self.expected_ids(["@user"]))
+        self.assertEqual(self.plugin.search_posts(self.task_id, ["#новости"]), self.expected_ids(["#новости"]))
+
+    def test_index_follows_deletes_and_updates(self):
+        """Удалённые посты пропадают из индекса, изменённый текст переиндексируется"""
+        with self.plugin.write_connection() as conn:
+            conn.execute("DELETE FROM posts WHERE task_id = ? AND text LIKE '%футбол%'", (self.task_id,))
+        self.assertEqual(self.plugin.search_posts(self.task_id, ["футбол"]), [])
+
+        # Посты другой задачи, сохранённые до update_task_posts, тоже попадают в индекс
+        other_task_id = self.plugin.create_task("Другая задача", ["новости"])
+        self.plugin.save_posts_bulk(other_task_id, make_posts(10, seed=1))
+        self.plugin.update_task_posts(self.task_id, [{"id": 1, "owner_id": -1, "text": "Уникальная фраза", "date": 1}])
+        self.assertEqual(self.plugin.connection.execute("SELECT COUNT(*) FROM posts_fts").fetchone()[0], 11)
+        self.assertEqual(len(self.plugin.search_posts(other_task_id, WORDS)), 10)
+
+        post_id = self.plugin.search_posts(self.task_id, ["уникальная фраза"])
+        self.assertEqual(len(post_id), 1)
+        self.assertEqual(self.plugin.get_posts_by_ids(post_id)[0]["vk_id"], "-1_1")
+
+        count = self.plugin.connection.execute("SELECT COUNT(*) FROM posts").fetchone()[0]
+        self.assertEqual(self.plugin.connection.execute("SELECT COUNT(*) FROM posts_fts").fetchone()[0], count)
+        self.assertEqual(self.plugin.rebuild_search_index(), count)
+
+    def test_existing_database_is_indexed_on_start(self):
+        """База без posts_fts получает индекс по всем постам при инициализации"""
+        expected = self.plugin.search_posts(self.task_id, ["спорт"])
+        self.plugin.shutdown()
+
+        conn = sqlite3.connect(self.plugin.db_path)
+        conn.execute("DROP TABLE posts_fts")
+        conn.commit()
+        conn.close()
+
+        self.plugin.initialize()
+        self.assertEqual(self.plugin.search_posts(self.task_id, ["спорт"]), expected)
+
+    def test_existing_index_of_cleaned_text_is_rebuilt(self):
+        """Индекс прежнего формата (очищенный текст) перестраивается при инициализации"""
+        expected = self.plugin.search_posts(self.task_id, ["@user"])
+        self.assertTrue(expected)
+        self.plugin.shutdown()
+
+        conn = sqlite3.connect(self.plugin.db_path)
+        conn.execute("UPDATE posts_fts SET text = replace(text, '@user', '')")
+        conn.execute("PRAGMA user_version = 0")
+        conn.commit()
+        conn.close()
+
+        self.plugin.initialize()
+        self.assertEqual(self.plugin.search_posts(self.task_id, ["@user"]), expected)
+
+    def test_hashtags_and_mentions_match_like_raw_text(self):
+        """Очистка по параметрам не удаляет посты, где ключ есть только в хэштеге или упоминании"""
+        task_id = self.plugin.create_task("Москва", ["москва"])
+        texts = ["Едем в #москва летом", "Привет @москва_club", "москва!", "Москва-река", "MOSCOW москва", "ничего", "Я ❤️ Москву"]
+        self.plugin.save_posts_bulk(task_id, [{"id": i, "owner_id": -2, "text": text, "date": i} for i, text in enumerate(texts)])
+
+        filter_plugin = FilterPlugin()
+        filter_plugin.set_database_plugin(self.plugin)
+        expected = filter_plugin.filter_posts_by_keywords_fast(self.plugin.get_task_posts(task_id), ["москва"])
+        self.assertEqual(len(expected), 5)
+        self.assertEqual(
+            sorted(post["id"] for post in filter_plugin.filter_posts_from_database(task_id, ["москва"])),
+            sorted(post["id"] for post in expected),
+        )
+
+        self.assertEqual(filter_plugin.clean_by_parsing_parameters(task_id, ["москва"]), 2)
+        self.assertEqual(sorted(post["text"] for post in self.plugin.get_task_posts(task_id)), sorted(texts[:5]))
+
+    def test_filter_plugin_uses_index(self):
+        """FilterPlugin отбирает и чистит посты задачи по индексу по правилам filter_posts_by_keywords_fast"""
+        filter_plugin = FilterPlugin()
+        filter_plugin.set_database_plugin(self.plugin)
+        keywords = ["москва", "дня футбол"]
+
+        for exact_match in (True, False):
+            expected = filter_plugin.filter_posts_by_keywords_fast(self.plugin.get_task_posts(self.task_id), keywords, exact_match)
+            found = filter_plugin.filter_posts_from_database(self.task_id, keywords, exact_match)
+
+            self.assertEqual(
+                sorted((post["id"], tuple(post["keywords_matched"])) for post in found),
+                sorted((post["id"], tuple(post["keywords_matched"])) for post in expected),
+            )
+
+        kept = self.plugin.search_posts(self.task_id, ["москва", "дня", "футбол"])
+        removed = filter_plugin.clean_by_parsing_parameters(self.task_id, keywords, exact_match=False)
+        self.assertEqual(removed, 2000 - len(kept))
+        self.assertEqual([post["id"] for post in self.plugin.get_task_posts(self.task_id)][::-1], kept)
+        self.assertEqual(self.plugin.get_task_statistics(self.task_id)["total_posts"], len(kept))
+
+
+if __name__ == "__main__":
+    unittest.main()
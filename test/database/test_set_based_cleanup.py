@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Юнит-тесты очистки постов в БД запросами над множествами (дубликаты, update_task_posts)
+"""
+
+import unittest
+
+from helpers import DatabaseTestCase, make_posts
+from src.plugins.post_processor.deduplication.deduplication_plugin import DeduplicationPlugin
+
+
+class TestSetBasedCleanup(DatabaseTestCase):
+    """Тесты find_duplicates, count_duplicates, delete_duplicates и update_task_posts"""
+
+    def setUp(self):
+        super().setUp()
+        # Одинаковые ссылки в разных задачах - дубликаты по link_hash
+        self.task_ids = [self.plugin.create_task(f"Задача {i}", ["пост"]) for i in range(3)]
+        self.plugin.save_posts(self.task_ids[0], make_posts(0, 10))
+        self.plugin.save_posts(self.task_ids[1], make_posts(5, 10))
+        self.plugin.save_posts(self.task_ids[2], make_posts(8, 4))
+
+    def test_find_duplicates_returns_full_groups_in_one_query(self):
+        """Группы целиком, посты по возрастанию id, без запроса на каждый пост"""
+        statements = []
+        self.plugin.connection.set_trace_callback(statements.append)
+        try:
+            groups = self.plugin.find_duplicates()
+        finally:
+            self.plugin.connection.set_trace_callback(None)
+
+        self.assertEqual(len(statements), 1)
+        self.assertEqual(
+            sorted(tuple(post["vk_id"] for post in group) for group in groups),
+            sorted((f"-1_{i}",) * (3 if 8 <= i <= 9 else 2) for i in range(5, 12)),
+        )
+        for group in groups:
+            self.assertEqual([post["id"] for post in group], sorted(post["id"] for post in group))
+            self.assertNotIn("group_size", group[0])
+            self.assertIn("text", group[0])
+
+        self.assertEqual(self.plugin.find_duplicates(self.task_ids[0]), [])
+        self.assertEqual(self.plugin.count_duplicates(), {"duplicate_groups": 7, "total_duplicates": 9})
+
+    def test_delete_duplicates_keeps_first_post(self):
+        """В каждой группе остаётся пост с меньшим id; итоги задач и индекс поиска следуют удалению"""
+        kept_ids = [group[0]["id"] for group in self.plugin.find_duplicates()]
+        self.assertEqual(self.plugin.sync_search_index(), 24)
+
+        self.assertEqual(self.plugin.delete_duplicates(), 9)
+        self.assertEqual(self.plugin.find_duplicates(), [])
+        kept = self.plugin.get_posts_by_ids(kept_ids)
+        self.assertEqual(len(kept), len(kept_ids))
+        expected = {f"-1_{i}": self.task_ids[0] if i < 10 else self.task_ids[1] for i in range(5, 12)}
+        self.assertEqual({post["vk_id"]: post["task_id"] for post in kept}, expected)
+
+        self.assertEqual([self.plugin.get_task_statistics(task_id)["total_posts"] for task_id in self.task_ids], [10, 5, 0])
+        self.assertEqual(self.plugin.reconcile_task_statistics()["fixed"], [])
+        count = self.plugin.connection.execute("SELECT COUNT(*) FROM posts").fetchone()[0]
+        self.assertEqual(self.plugin.connection.execute("SELECT COUNT(*) FROM posts_fts").fetchone()[0], count)
+
+    def test_deduplication_plugin_cleans_database(self):
+        """DeduplicationPlugin считает и удаляет дубликаты через DatabasePlugin"""
+        dedup = DeduplicationPlugin()
+        dedup.set_database_plugin(self.plugin)
+
+        self.assertEqual(
+            dedup.get_database_duplicate_statistics(),
+            {"duplicate_groups": 7, "total_duplicates": 9, "method": "link_hash"},
+        )
+        self.assertEqual(dedup.clean_duplicates_from_database(), 9)
+        self.assertEqual(dedup.clean_duplicates_from_database(), 0)
+        self.assertEqual(dedup.get_database_duplicate_statistics()["duplicate_groups"], 0)
+
+    def test_update_task_posts_removes_only_missing_posts(self):
+        """Удаляются посты задачи, которых нет в новом наборе; оставшиеся сохраняют id"""
+        task_id = self.task_ids[0]
+        ids_before = {post["vk_id"]: post["id"] for post in self.plugin.get_task_posts(task_id)}
+
+        self.plugin.update_task_posts(task_id, make_posts(4, 8))
+
+        posts = {post["vk_id"]: post["id"] for post in self.plugin.get_task_posts(task_id)}
+        self.assertEqual(sorted(posts), sorted(f"-1_{i}" for i in range(4, 12)))
+        for vk_id in (f"-1_{i}" for i in range(4, 10)):
+            self.assertEqual(posts[vk_id], ids_before[vk_id])
+        self.assertEqual(self.plugin.get_task_statistics(task_id)["total_posts"], 8)
+        self.assertEqual(len(self.plugin.get_task_posts(self.task_ids[1])), 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Юнит-тесты итогов задач, которые ведутся при записи постов
+"""
+
+import sqlite3
+import unittest
+
+import helpers
+from helpers import DatabaseTestCase
+
+
+def make_posts(start, count, likes=10):
+    return helpers.make_posts(
+        start, count, likes={"count": likes}, comments={"count": 2}, reposts=1, views={"count": 100}
+    )
+
+
+def totals(count, likes=10):
+    """Ожидаемые итоги для count постов make_posts"""
+    return {
+        "total_posts": count,
+        "total_likes": count * likes,
+        "total_comments": count * 2,
+        "total_reposts": count,
+        "total_views": count * 100,
+        "total_SI": count * (likes + 3),
+    }
+
+
+class TestTaskStatistics(DatabaseTestCase):
+    """Тесты итогов задач в tasks и reconcile_task_statistics"""
+
+    def setUp(self):
+        super().setUp()
+        self.task_id = self.plugin.create_task("Задача", ["пост"])
+        self.other_task_id = self.plugin.create_task("Другая задача", ["пост"])
+
+    def assertTotals(self, task_id, expected):
+        stats = self.plugin.get_task_statistics(task_id)
+        self.assertEqual({key: stats[key] for key in expected}, expected)
+
+    def test_inserts_count_only_new_posts(self):
+        """Повторно сохранённые посты не увеличивают итоги; итоги других задач не меняются"""
+        self.plugin.save_posts_bulk(self.task_id, make_posts(0, 30), chunk_size=7)
+        self.plugin.save_posts_bulk(self.task_id, make_posts(20, 30))
+        self.plugin.save_posts_bulk(self.other_task_id, make_posts(0, 5))
+
+        self.assertTotals(self.task_id, totals(50))
+        self.assertTotals(self.other_task_id, totals(5))
+        self.assertEqual(self.plugin.reconcile_task_statistics(), {"checked": 2, "fixed": []})
+
+    def test_updates_and_deletes_adjust_totals(self):
+        """Изменение метрик в update_task_posts и удаление постов поправляют итоги"""
+        self.plugin.save_posts(self.task_id, make_posts(0, 10))
+
+        self.plugin.update_task_posts(self.task_id, make_posts(0, 10, likes=20) + make_posts(10, 5, likes=20))
+        self.assertTotals(self.task_id, totals(15, likes=20))
+
+        with self.plugin.write_connection() as conn:
+            conn.execute("DELETE FROM posts WHERE task_id = ? AND vk_id IN ('-1_0', '-1_1')", (self.task_id,))
+        self.assertTotals(self.task_id, totals(13, likes=20))
+        self.assertEqual(self.plugin.reconcile_task_statistics(self.task_id)["fixed"], [])
+
+    def test_reconcile_fixes_drifted_totals(self):
+        """Сверка исправляет итоги, разошедшиеся с постами, и только их"""
+        self.plugin.save_posts(self.task_id, make_posts(0, 10))
+        with self.plugin.write_connection() as conn:
+            conn.execute("UPDATE tasks SET total_posts = 0, total_SI = 1 WHERE id = ?", (self.task_id,))
+
+        self.assertEqual(self.plugin.reconcile_task_statistics(), {"checked": 2, "fixed": [self.task_id]})
+        self.assertTotals(self.task_id, totals(10))
+        self.assertEqual(self.plugin.reconcile_task_statistics(self.task_id), {"checked": 1, "fixed": []})
+
+    def test_database_without_triggers_is_reconciled_on_start(self):
+        """База, созданная до триггеров, при инициализации получает их и сверенные итоги"""
+        self.plugin.save_posts(self.task_id, make_posts(0, 10))
+        self.plugin.shutdown()
+
+        conn = sqlite3.connect(self.plugin.db_path)
+        for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'").fetchall():
+            conn.execute(f"DROP TRIGGER {name}")
+        conn.execute("UPDATE tasks SET total_posts = 0")
+        conn.commit()
+        conn.close()
+
+        self.plugin.initialize()
+        self.assertTotals(self.task_id, totals(10))
+
+
+if __name__ == "__main__":
+    unittest.main()
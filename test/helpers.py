@@ -0,0 +1,63 @@
+"""
+Общие помощники тестов: фабрики постов и DatabasePlugin на временной базе
+"""
+
+import copy
+import os
+import random
+import tempfile
+import unittest
+
+from src.plugins.database.database_plugin import DatabasePlugin
+
+BASE_DATE = 1640995200
+
+
+def make_posts(start, count, text="Пост {i}", **fields):
+    """
+    Посты VK с id из range(start, start + count)
+
+    text - шаблон текста с подстановкой {i}; остальные поля (owner_id, likes,
+    keywords_matched, ...) переопределяют значения по умолчанию и копируются
+    в каждый пост.
+    """
+    defaults = {"owner_id": -1, "likes": {"count": 1}}
+    return [
+        {
+            "id": i,
+            "text": text.format(i=i),
+            "date": BASE_DATE + i,
+            **copy.deepcopy({**defaults, **fields}),
+        }
+        for i in range(start, start + count)
+    ]
+
+
+def make_random_posts(count, seed=0, texts=("Новость", "новость ", "Другая", ""), max_owner=30, max_id=30, max_date=2):
+    """Посты со случайными (owner_id, id) из небольшого диапазона, чтобы дубликатов было много"""
+    rnd = random.Random(seed)
+    posts = []
+    for _ in range(count):
+        owner_id, post_id = -rnd.randint(1, max_owner), rnd.randint(1, max_id)
+        posts.append(
+            {
+                "owner_id": owner_id,
+                "id": post_id,
+                "date": rnd.randint(0, max_date),
+                "text": rnd.choice(texts),
+                "link": f"https://vk.com/wall{owner_id}_{post_id}",
+            }
+        )
+    return posts
+
+
+class DatabaseTestCase(unittest.TestCase):
+    """Каждый тест получает self.plugin - инициализированный DatabasePlugin на временной базе"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.plugin = DatabasePlugin()
+        self.plugin.db_path = os.path.join(self.temp_dir.name, "test.db")
+        self.plugin.initialize()
+        self.addCleanup(self.plugin.shutdown)
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Тесты потокового конвейера поиска SearchPipeline
+"""
+
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+
+import pandas as pd
+
+from src.core.search_pipeline import SearchPipeline
+from src.plugins.database.database_plugin import DatabasePlugin
+from src.plugins.post_processor.pipeline import MinusWordStage, PostPipeline
+
+
+def make_batches(count, size, start_id=1):
+    """Пачки постов в формате ответа VK"""
+    batches, post_id = [], start_id
+    for _ in range(count):
+        batch = []
+        for _ in range(size):
+            batch.append(
+                {
+                    "owner_id": -1,
+                    "id": post_id,
+                    "date": 1722038400 + post_id,
+                    "text": f"пост {post_id} про новости" + (" и рекламу" if post_id % 3 == 0 else ""),
+                    "likes": {"count": post_id},
+                    "views": {"count": post_id * 10},
+                    "keywords_matched": ["новости"],
+                }
+            )
+            post_id += 1
+        batches.append(batch)
+    return batches
+
+
+async def stream(batches, delay=0.0, log=None):
+    for batch in batches:
+        if delay:
+            await asyncio.sleep(delay)
+        if log is not None:
+            log.append(("fetched", len(batch)))
+        yield batch
+
+
+class SlowDatabase:
+    """База, которая пишет медленнее, чем приходят страницы"""
+
+    post_to_csv_row = staticmethod(DatabasePlugin.post_to_csv_row)
+
+    def __init__(self, delay, log, fail_after=None):
+        self.delay = delay
+        self.log = log
+        self.fail_after = fail_after
+        self.saved = 0
+
+    def save_posts(self, task_id, posts):
+        time.sleep(self.delay)
+        if self.fail_after is not None and self.saved >= self.fail_after:
+            raise RuntimeError("диск заполнен")
+        self.saved += len(posts)
+        self.log.append(("saved", len(posts)))
+        return len(posts)
+
+
+class TestSearchPipeline(unittest.TestCase):
+    """Тесты SearchPipeline"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.database = DatabasePlugin()
+        self.database.db_path = os.path.join(self.temp_dir.name, "test.db")
+        self.database.initialize()
+
+    def tearDown(self):
+        self.database.shutdown()
+        self.temp_dir.cleanup()
+
+    def test_stream_matches_task_export(self):
+        """Потоковый CSV совпадает с выгрузкой задачи, минус-слова отсеяны до записи"""
+        task_id = self.database.create_task("Поток", ["новости"], exact_match=True)
+        csv_path = os.path.join(self.temp_dir.name, "stream.csv")
+        pipeline = SearchPipeline(
+            self.database, post_pipeline=PostPipeline([MinusWordStage(["реклам"])]), csv_path=csv_path
+        )
+
+        stats = asyncio.run(pipeline.run(stream(make_batches(5, 30)), task_id))
+
+        self.assertEqual(stats["posts_received"], 150)
+        self.assertEqual(stats["posts_processed"], 100)
+        self.assertEqual(stats["posts_saved"], 100)
+        self.assertIsNotNone(stats["time_to_first_post"])
+        self.assertTrue(pipeline.csv_written)
+
+        export_path = os.path.join(self.temp_dir.name, "export.csv")
+        self.assertTrue(self.database.export_task_to_csv(task_id, export_path))
+        streamed = pd.read_csv(csv_path).sort_values("link").reset_index(drop=True)
+        exported = pd.read_csv(export_path).sort_values("link").reset_index(drop=True)
+        pd.testing.assert_frame_equal(streamed, exported, check_dtype=False)
+
+    def test_backpressure_bounds_posts_in_flight(self):
+        """Медленная запись приостанавливает загрузку: в полёте не больше очередей"""
+        log = []
+        queue_size = 2
+        pipeline = SearchPipeline(SlowDatabase(0.02, log), queue_size=queue_size)
+
+        stats = asyncio.run(pipeline.run(stream(make_batches(30, 10), log=log), task_id=1))
+
+        self.assertEqual(stats["posts_saved"], 300)
+        self.assertLessEqual(stats["peak_process_queue"], queue_size)
+        self.assertLessEqual(stats["peak_write_queue"], queue_size)
+
+        in_flight = max_in_flight = 0
+        for event, count in log:
+            in_flight += count if event == "fetched" else -count
+            max_in_flight = max(max_in_flight, in_flight)
+        # Две очереди, пачка в обработке, пачка в записи и пачка у загрузчика
+        self.assertLessEqual(max_in_flight, (2 * queue_size + 3) * 10)
+
+    def test_write_error_stops_fetching(self):
+        """Ошибка записи отменяет загрузку и пробрасывается наружу"""
+        log = []
+        closed = []
+
+        async def endless():
+            try:
+                post_id = 1
+                while True:
+                    yield make_batches(1, 10, start_id=post_id)[0]
+                    post_id += 10
+            finally:
+                closed.append(True)
+
+        pipeline = SearchPipeline(SlowDatabase(0.0, log, fail_after=30), queue_size=2)
+        with self.assertRaises(RuntimeError):
+            asyncio.run(pipeline.run(endless(), task_id=1))
+
+        self.assertEqual(closed, [True])
+        self.assertEqual(pipeline.stats["posts_saved"], 30)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,158 @@
+"""
+Бенчмарк сохранения постов в DatabasePlugin
+
+Сравнивает прежнее сохранение (новое соединение без настроек, INSERT на
+каждый пост в цикле Python, пересчёт итогов задачи по всем постам после
+каждой пачки) с пакетным save_posts_bulk(), которое ведёт итоги по
+вставленным строкам (индекс posts_fts дополняется позже, перед поиском, и в
+замер не входит). Полный прогон на 200 000 постов одной пачкой или пачками по 1000:
+
+    python test/performance/test_database_ingestion_performance.py
+    python test/performance/test_database_ingestion_performance.py 200000 1000
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+from src.plugins.database.database_plugin import TASK_STATISTICS_TRIGGERS, DatabasePlugin
+
+
+def generate_posts(count: int) -> List[Dict]:
+    """Посты в формате ответа VK, как в test/database/test_database_system.py"""
+    return [
+        {
+            "id": i,
+            "owner_id": -123456 - i % 100,
+            "text": f"Тестовый пост номер {i} с ключевыми словами тестовый пост",
+            "date": 1640995200 + i * 60,
+            "likes": {"count": 10 + i % 50},
+            "comments": {"count": 5 + i % 20},
+            "reposts": {"count": 2 + i % 10},
+            "views": {"count": 100 + i % 200},
+            "keywords_matched": ["тестовый", "пост"],
+        }
+        for i in range(count)
+    ]
+
+
+def legacy_save_posts(db_path: str, task_id: int, posts: List[Dict]) -> int:
+    """Прежний DatabasePlugin.save_posts(): INSERT на каждый пост и пересчёт статистики"""
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    cursor = conn.cursor()
+    saved_count = 0
+    for post in posts:
+        owner_id, post_id = post.get("owner_id", 0), post.get("id", 0)
+        link = f"https://vk.com/wall{owner_id}_{post_id}"
+        text = post.get("text", "")
+        if not text:
+            continue
+        metrics = [
+            post[key].get("count", 0) if isinstance(post.get(key), dict) else post.get(key, 0)
+            for key in ("likes", "comments", "reposts", "views")
+        ]
+        cursor.execute(
+            """
+            INSERT OR IGNORE INTO posts
+            (task_id, vk_id, link, link_hash, text, text_hash, date,
+             likes, comments, reposts, views, keywords_matched)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                task_id,
+                f"{owner_id}_{post_id}",
+                link,
+                hashlib.md5(link.encode("utf-8"), usedforsecurity=False).hexdigest(),
+                text,
+                hashlib.md5(text.encode("utf-8"), usedforsecurity=False).hexdigest(),
+                post.get("date", 0),
+                *metrics,
+                json.dumps(post.get("keywords_matched", []), ensure_ascii=False),
+            ),
+        )
+        if cursor.rowcount > 0:
+            saved_count += 1
+    cursor.execute("SELECT COUNT(*), SUM(likes), SUM(comments), SUM(reposts), SUM(views) FROM posts WHERE task_id = ?", (task_id,))
+    conn.commit()
+    conn.close()
+    return saved_count
+
+
+def make_database(directory: str, name: str) -> DatabasePlugin:
+    database = DatabasePlugin()
+    database.db_path = os.path.join(directory, name)
+    database.initialize()
+    return database
+
+
+def run_benchmark(count: int, batch_size: int = None) -> Dict[str, Dict[str, float]]:
+    """Строк в секунду для прежнего и пакетного сохранения пачками по batch_size"""
+    posts = generate_posts(count)
+    batch_size = batch_size or count
+    batches = [posts[start:start + batch_size] for start in range(0, count, batch_size)]
+    results = {}
+
+    with tempfile.TemporaryDirectory() as directory:
+        # Прежняя схема: журнал DELETE, индексы, дублирующие UNIQUE(task_id, link_hash), и без триггеров итогов
+        legacy_db = make_database(directory, "legacy.db")
+        with legacy_db.write_connection() as conn:
+            for trigger in TASK_STATISTICS_TRIGGERS:
+                conn.execute(f"DROP TRIGGER {trigger}")
+            conn.execute("CREATE INDEX idx_posts_task_id ON posts(task_id)")
+            conn.execute("CREATE INDEX idx_posts_task_link_hash ON posts(task_id, link_hash)")
+        task_id = legacy_db.create_task("legacy", ["тест"])
+        legacy_db.shutdown()
+        conn = sqlite3.connect(legacy_db.db_path)
+        conn.execute("PRAGMA journal_mode=DELETE")
+        conn.close()
+        started = time.perf_counter()
+        saved = sum(legacy_save_posts(legacy_db.db_path, task_id, batch) for batch in batches)
+        results["legacy"] = {"rows": count, "saved": saved, "rows_per_second": count / (time.perf_counter() - started)}
+
+        database = make_database(directory, "bulk.db")
+        task_id = database.create_task("bulk", ["тест"])
+        started = time.perf_counter()
+        saved = sum(database.save_posts_bulk(task_id, batch)["saved"] for batch in batches)
+        results["bulk"] = {"rows": count, "saved": saved, "rows_per_second": count / (time.perf_counter() - started)}
+        assert database.get_task_statistics(task_id)["total_posts"] == count
+        assert database.sync_search_index() == count
+        database.shutdown()
+
+    results["bulk"]["speedup"] = results["bulk"]["rows_per_second"] / results["legacy"]["rows_per_second"]
+    return results
+
+
+def print_results(results: Dict[str, Dict[str, float]]) -> None:
+    print("\n📊 Сохранение постов:")
+    for name, data in results.items():
+        speedup = f" x{data['speedup']:.1f}" if "speedup" in data else ""
+        print(f"  {name:<8} {data['rows']:>8} строк  {data['rows_per_second']:>10.0f} строк/с{speedup}")
+
+
+def test_bulk_ingestion_speedup():
+    """Пакетное сохранение сохраняет все посты и быстрее прежнего"""
+    results = run_benchmark(20_000)
+    print_results(results)
+
+    assert results["bulk"]["saved"] == results["legacy"]["saved"] == 20_000
+    assert results["bulk"]["speedup"] > 1
+
+
+def test_streaming_ingestion_speedup():
+    """При записи пачками итоги задачи не пересчитываются по всем постам, и выигрыш сохраняется"""
+    results = run_benchmark(20_000, 500)
+    print_results(results)
+
+    assert results["bulk"]["saved"] == results["legacy"]["saved"] == 20_000
+    assert results["bulk"]["speedup"] > 1
+
+
+if __name__ == "__main__":
+    posts_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    batch = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    print_results(run_benchmark(posts_count, batch))
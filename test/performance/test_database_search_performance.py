@@ -0,0 +1,93 @@
+"""
+Бенчмарк повторной фильтрации задачи из базы данных
+
+Сравнивает прежнюю фильтрацию (все посты задачи загружаются в словари и
+проверяются в Python) с поиском по полнотекстовому индексу posts_fts:
+время и пик памяти Python (tracemalloc). Полный прогон на 1 000 000 постов:
+
+    python test/performance/test_database_search_performance.py 1000000
+"""
+
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Dict
+
+from src.plugins.database.database_plugin import DatabasePlugin
+from src.plugins.post_processor.filter.filter_plugin import FilterPlugin
+
+KEYWORDS = ["футбол", "хоккей матч"]
+TOPICS = ["футбол", "хоккей", "матч", "погода", "новости", "выборы", "концерт", "хоккейный матч"]
+
+
+def generate_posts(start: int, count: int):
+    return [
+        {
+            "id": i,
+            "owner_id": -1 - i % 100,
+            "text": f"Пост номер {i}: {TOPICS[i % len(TOPICS)]} и {TOPICS[i * 7 % len(TOPICS)]} сегодня",
+            "date": 1640995200 + i,
+        }
+        for i in range(start, start + count)
+    ]
+
+
+def measure(function) -> Dict[str, float]:
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = function()
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"found": len(result), "seconds": elapsed, "peak_mb": peak / 2**20}
+
+
+def run_benchmark(count: int) -> Dict[str, Dict[str, float]]:
+    """Время и пик памяти прежней фильтрации и поиска по индексу"""
+    with tempfile.TemporaryDirectory() as directory:
+        database = DatabasePlugin()
+        database.db_path = os.path.join(directory, "search.db")
+        database.initialize()
+        task_id = database.create_task("search", KEYWORDS)
+        for start in range(0, count, 50_000):
+            database.save_posts_bulk(task_id, generate_posts(start, min(50_000, count - start)))
+        # Индекс дополняется перед первым поиском; в замер поиска это не входит
+        database.sync_search_index()
+
+        filter_plugin = FilterPlugin()
+        filter_plugin.set_database_plugin(database)
+
+        results = {
+            "legacy": measure(
+                lambda: filter_plugin.filter_posts_by_keywords_fast(database.get_task_posts(task_id), KEYWORDS)
+            ),
+            "fts": measure(lambda: filter_plugin.filter_posts_from_database(task_id, KEYWORDS)),
+            "fts_ids": measure(lambda: database.search_posts(task_id, KEYWORDS)),
+        }
+        database.shutdown()
+
+    results["fts"]["speedup"] = results["legacy"]["seconds"] / results["fts"]["seconds"]
+    return results
+
+
+def print_results(results: Dict[str, Dict[str, float]]) -> None:
+    print("\n📊 Повторная фильтрация задачи:")
+    for name, data in results.items():
+        speedup = f" x{data['speedup']:.1f}" if "speedup" in data else ""
+        print(f"  {name:<8} {data['found']:>8} постов  {data['seconds']:>7.2f} с  {data['peak_mb']:>8.1f} МБ{speedup}")
+
+
+def test_database_refilter_uses_index():
+    """Поиск по индексу находит те же посты, быстрее и без загрузки всей задачи"""
+    results = run_benchmark(50_000)
+    print_results(results)
+
+    assert results["fts"]["found"] == results["fts_ids"]["found"] == results["legacy"]["found"]
+    assert results["fts"]["speedup"] > 1
+    assert results["fts_ids"]["peak_mb"] < results["legacy"]["peak_mb"] / 10
+
+
+if __name__ == "__main__":
+    print_results(run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000))
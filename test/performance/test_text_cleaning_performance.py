@@ -0,0 +1,122 @@
+"""
+Бенчмарк движка очистки текста на постах в формате VK
+
+Сравнивает прежнюю последовательную очистку (emoji.demojize + re.sub на
+каждый вызов) с TextCleaningEngine.clean() и clean_many().
+Полный прогон на 100 000 постов:
+
+    python test/performance/test_text_cleaning_performance.py
+"""
+
+import random
+import re
+import sys
+import time
+from typing import Callable, Dict, List
+
+import emoji
+
+from src.plugins.post_processor.text_processing.cleaning_engine import TextCleaningEngine
+
+DEFAULT_CONFIG = {
+    "remove_emojis": True,
+    "remove_hashtags": True,
+    "remove_mentions": True,
+    "remove_urls": False,
+    "normalize_whitespace": True,
+}
+
+WORDS = (
+    "новости сегодня в городе прошла встреча жителей с администрацией по вопросам "
+    "благоустройства двора парковки ремонта дорог и освещения улиц в выходные"
+).split()
+EMOJIS = ["🔥", "❤️", "👍", "😂", "🎉", "👍🏽", "🇷🇺", "1️⃣", "👨‍👩‍👧", "✅"]
+
+
+def generate_vk_posts(count: int, seed: int = 42) -> List[str]:
+    """Тексты постов: половина с эмодзи, часть с хэштегами, упоминаниями и ссылками"""
+    rnd = random.Random(seed)
+    texts = []
+    for i in range(count):
+        words = [rnd.choice(WORDS) for _ in range(rnd.randint(10, 80))]
+        if i % 2 == 0:
+            for _ in range(rnd.randint(1, 5)):
+                words.insert(rnd.randrange(len(words)), rnd.choice(EMOJIS))
+        if i % 3 == 0:
+            words.append("#новости #город")
+        if i % 5 == 0:
+            words.insert(0, f"@club{i}")
+        texts.append(" ".join(words) + f" — «подробнее»…\n\nhttps://vk.com/wall-1_{i}")
+    return texts
+
+
+def sequential_clean(text: str, config: Dict[str, bool] = DEFAULT_CONFIG) -> str:
+    """Прежняя очистка TextProcessingPlugin.clean_text_completely()"""
+    if not text:
+        return ""
+    if config["remove_emojis"]:
+        import emoji as emoji_module
+
+        text = re.sub(r":[a-zA-Z_]+:", "", emoji_module.demojize(text))
+    if config["remove_hashtags"]:
+        text = re.sub(r"#\w+", "", text)
+    if config["remove_mentions"]:
+        text = re.sub(r"@\w+", "", text)
+    if config["remove_urls"]:
+        text = re.sub(r"https?://[^\s]+", "", text)
+        text = re.sub(r"www\.[^\s]+", "", text)
+    if config["normalize_whitespace"]:
+        text = re.sub(r"\s+", " ", text).strip()
+    return text
+
+
+def run_benchmark(count: int) -> Dict[str, Dict[str, float]]:
+    """Время и пропускная способность каждого способа очистки"""
+    texts = generate_vk_posts(count)
+    engine = TextCleaningEngine(**DEFAULT_CONFIG)
+    engine.clean("🔥")  # таблица эмодзи строится один раз, вне замера
+
+    methods: Dict[str, Callable[[], List[str]]] = {
+        "sequential": lambda: [sequential_clean(text) for text in texts],
+        "engine.clean": lambda: [engine.clean(text) for text in texts],
+        "engine.clean_many": lambda: engine.clean_many(texts),
+    }
+
+    results, outputs = {}, {}
+    for name, method in methods.items():
+        started = time.perf_counter()
+        outputs[name] = method()
+        elapsed = time.perf_counter() - started
+        results[name] = {"seconds": elapsed, "posts_per_second": count / elapsed}
+
+    assert outputs["engine.clean"] == outputs["sequential"]
+    assert outputs["engine.clean_many"] == outputs["sequential"]
+
+    baseline = results["sequential"]["seconds"]
+    for data in results.values():
+        data["speedup"] = baseline / data["seconds"]
+    return results
+
+
+def print_results(count: int, results: Dict[str, Dict[str, float]]) -> None:
+    print(f"\n📊 Очистка текста ({count} постов VK, emoji {emoji.__version__}):")
+    print("-" * 62)
+    print(f"{'Метод':<20} {'Время (с)':<12} {'Постов/с':<14} {'Ускорение':<10}")
+    print("-" * 62)
+    for name, data in results.items():
+        print(f"{name:<20} {data['seconds']:<12.3f} {data['posts_per_second']:<14.0f} x{data['speedup']:<9.1f}")
+
+
+def test_text_cleaning_engine_speedup():
+    """Движок даёт тот же результат и быстрее прежней очистки"""
+    count = 5000
+    results = run_benchmark(count)
+    print_results(count, results)
+
+    assert results["engine.clean"]["speedup"] > 1
+    assert results["engine.clean_many"]["speedup"] > 1
+
+
+if __name__ == "__main__":
+    posts = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    print_results(posts, run_benchmark(posts))
@@ -120,6 +120,25 @@ class TestFilterPlugin(unittest.TestCase):
         self.assertIn(3, owner_ids)
         self.assertNotIn(4, owner_ids)  # Пост без ключевых слов не должен быть включен
     
+    def test_match_posts_returns_every_matched_keyword(self):
+        """Скомпилированный матчер возвращает все совпавшие ключи и переиспользуется"""
+        posts = [
+            {"text": "Лис передает привет родной Бурятии", "owner_id": 1, "id": 100},
+            {"text": "Обычный пост без ключевых слов", "owner_id": 2, "id": 200},
+        ]
+        keywords = ["Привет родной", "лис передает", "Бурятии"]
+
+        matched = self.plugin.match_posts_by_keywords(posts, keywords)
+        self.assertEqual(matched, [(posts[0], ["Привет родной", "лис передает", "Бурятии"])])
+
+        hits_before = self.plugin.get_statistics()["keyword_matchers"]["hits"]
+        self.plugin.match_posts_by_keywords(posts, list(reversed(keywords)))
+        self.assertEqual(self.plugin.get_statistics()["keyword_matchers"]["hits"], hits_before + 1)
+
+        # Без очистки и без точного совпадения ключ сравнивается с целыми словами
+        word_matched = self.plugin.match_posts_by_keywords(posts, ["лис", "пере"], exact_match=False, use_text_cleaning=False)
+        self.assertEqual(word_matched, [(posts[0], ["лис"])])
+
     def test_filter_posts_comprehensive(self):
         """Тест комплексной фильтрации по ключевым фразам"""
         posts = [
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Юнит-тесты поиска почти-дубликатов (MinHash/LSH)
+"""
+
+import os
+import tempfile
+import unittest
+
+from src.plugins.database.database_plugin import DatabasePlugin
+from src.plugins.post_processor.deduplication.deduplication_plugin import DeduplicationPlugin
+from src.plugins.post_processor.deduplication.near_duplicates import NearDuplicateIndex, lsh_parameters
+
+PRESS_RELEASE = (
+    "Пресс-релиз администрации города: в субботу на центральной площади пройдёт ярмарка выходного дня, "
+    "участие примут фермеры из районов области и местные производители"
+)
+
+
+def make_post(post_id, text):
+    return {"owner_id": -1, "id": post_id, "date": 1722038400, "text": text, "link": f"https://vk.com/wall-1_{post_id}"}
+
+
+class TestNearDuplicates(unittest.TestCase):
+    """Тесты NearDuplicateIndex и DeduplicationPlugin.remove_near_duplicates"""
+
+    def test_lsh_threshold_not_above_requested(self):
+        """Порог полос LSH не выше заданного порога сходства"""
+        for threshold in (0.5, 0.7, 0.8, 0.9):
+            bands, rows = lsh_parameters(128, threshold)
+            self.assertLessEqual(bands * rows, 128)
+            self.assertLessEqual((1 / bands) ** (1 / rows), threshold)
+
+    def test_edited_repost_joins_cluster(self):
+        """Перепост с небольшой правкой попадает в кластер оригинала, другой текст - нет"""
+        index = NearDuplicateIndex(threshold=0.7)
+
+        self.assertEqual(index.add("a", PRESS_RELEASE), ("a", 0.0))
+        cluster, similarity = index.add("b", PRESS_RELEASE.replace("субботу", "воскресенье") + " Подробнее на сайте!")
+        self.assertEqual(cluster, "a")
+        self.assertGreaterEqual(similarity, 0.7)
+        self.assertEqual(index.add("c", "Прогноз погоды на выходные: дожди и ветер")[0], "c")
+        self.assertEqual(index.add("d", "")[0], "d")
+        self.assertTrue(index.is_near_duplicate("b"))
+        self.assertEqual(index.get_statistics()["clusters"], 3)
+
+    def test_threshold_is_configurable(self):
+        """Строгий порог не объединяет заметно отличающиеся тексты"""
+        posts = [make_post(1, PRESS_RELEASE), make_post(2, PRESS_RELEASE + " Вход свободный, приходите всей семьёй.")]
+        plugin = DeduplicationPlugin()
+
+        self.assertEqual(len(plugin.remove_near_duplicates([dict(post) for post in posts], threshold=0.6)), 1)
+        self.assertEqual(len(plugin.remove_near_duplicates([dict(post) for post in posts], threshold=0.95)), 2)
+
+    def test_cluster_ids_written_to_posts(self):
+        """Кластеры записываются во все посты, остаётся первый пост кластера"""
+        posts = [
+            make_post(1, PRESS_RELEASE),
+            make_post(2, "Погода на выходные"),
+            make_post(3, PRESS_RELEASE.upper() + "!!!"),
+        ]
+        plugin = DeduplicationPlugin()
+        plugin.config["deduplication_method"] = "near_duplicate"
+
+        unique = plugin.remove_duplicates(posts)
+
+        self.assertEqual([post["id"] for post in unique], [1, 2])
+        self.assertEqual([post["near_duplicate_cluster"] for post in posts], [posts[0]["link"], posts[1]["link"], posts[0]["link"]])
+        self.assertEqual([post["is_near_duplicate"] for post in posts], [False, False, True])
+
+    def test_repeated_link_is_duplicate(self):
+        """Тот же пост, найденный повторно, удаляется вместе с почти-дубликатами"""
+        posts = [make_post(1, PRESS_RELEASE), make_post(1, PRESS_RELEASE), make_post(2, PRESS_RELEASE + "!")]
+        plugin = DeduplicationPlugin()
+
+        unique = plugin.remove_duplicates(posts, "near_duplicate")
+
+        self.assertEqual([post["id"] for post in unique], [1])
+        self.assertIs(unique[0], posts[0])
+        self.assertEqual([post["is_near_duplicate"] for post in posts], [False, True, True])
+        self.assertEqual({post["near_duplicate_cluster"] for post in posts}, {posts[0]["link"]})
+
+    def test_incremental_index_checks_stored_posts(self):
+        """Новая пачка проверяется против сохранённых публикаций задачи"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            database = DatabasePlugin()
+            database.db_path = os.path.join(temp_dir, "tasks.db")
+            database.initialize()
+            task_id = database.create_task("Задача", ["ярмарка"])
+            database.save_posts(task_id, [make_post(1, PRESS_RELEASE)])
+
+            plugin = DeduplicationPlugin()
+            plugin.set_database_plugin(database)
+            batch = [make_post(2, "Ярмарка! " + PRESS_RELEASE), make_post(3, "Новый пост о ремонте дорог")]
+            unique = plugin.remove_near_duplicates(batch, task_id=task_id)
+            next_batch = plugin.remove_near_duplicates([make_post(4, "Новый пост о ремонте дорог.")], task_id=task_id)
+            # Пост, уже сохранённый в задаче, - дубликат, даже если он один в пачке
+            stored_again = plugin.remove_near_duplicates([make_post(1, PRESS_RELEASE)], task_id=task_id)
+            database.shutdown()
+
+        self.assertEqual([post["id"] for post in unique], [3])
+        self.assertEqual(batch[0]["near_duplicate_cluster"], "https://vk.com/wall-1_1")
+        self.assertEqual(next_batch, [])
+        self.assertEqual(stored_again, [])
+        self.assertEqual(len(plugin.get_near_duplicate_index(task_id)), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -277,6 +277,59 @@ class TestOptimizedMethods:
         except ImportError:
             pytest.skip("concurrent.futures недоступен для параллельной обработки")
 
+    def test_fused_pipeline_stage_counters(self, plugin_manager, test_posts):
+        """Тест однопроходного конвейера: счётчики этапов и минус-слова"""
+        post_processor = plugin_manager.get_plugin("post_processor")
+        keywords = ["технологии", "интеллект"]
+
+        result = post_processor.process_posts(
+            test_posts, keywords, exact_match=False, minus_words=["IT"]
+        )
+
+        counters = result["stage_counters"]
+        assert list(counters) == ["deduplication", "minus_words", "filtering"]
+        assert counters["deduplication"]["dropped"] == result["duplicates_removed"] == 1
+        assert counters["minus_words"]["dropped"] == result["minus_words_excluded"] == 1
+        assert counters["filtering"]["passed"] == result["final_count"]
+        assert all("IT" not in post["text"] for post in result["final_posts"])
+
+        # Каждый пост проходит цепочку один раз: на входе этапа ровно столько, сколько вышло из предыдущего
+        pipeline = post_processor.build_pipeline(
+            ["deduplication", "text_processing", "filtering"], keywords, exact_match=False
+        )
+        final_posts = pipeline.run(test_posts)
+        dedup, cleaning, filtering = pipeline.stages
+        assert dedup.passed + dedup.dropped == len(test_posts)
+        assert cleaning.passed == dedup.passed
+        assert filtering.passed + filtering.dropped == cleaning.passed
+        assert all("cleaned_text" in post for post in final_posts)
+
+    def test_process_posts_multiprocess(self, plugin_manager, test_posts):
+        """Тест многопроцессной обработки: результат совпадает с последовательной"""
+        post_processor = plugin_manager.get_plugin("post_processor")
+        keywords = ["технологии", "интеллект"]
+        large_posts = [
+            {**post, "link": f"{post['link']}_{i % 7}"} for i in range(20) for post in test_posts
+        ]
+
+        for exact_match in (True, False):
+            expected = post_processor.process_posts_optimized(
+                [dict(post) for post in large_posts], keywords, exact_match, early_termination=False
+            )
+            result = post_processor.process_posts_parallel(
+                [dict(post) for post in large_posts], keywords, exact_match, max_workers=2, mode="process"
+            )
+
+            assert result["optimization_level"] == "multiprocess"
+            assert result["final_posts"] == expected["final_posts"]
+            assert result["duplicates_removed"] == expected["duplicates_removed"]
+            assert result["chunks_processed"] >= 1
+
+        # Пул переиспользуется между вызовами
+        pool_stats = post_processor.get_statistics()["process_pool"]
+        assert pool_stats["running"]
+        assert pool_stats["pools_created"] == 1
+
     def test_cache_management(self, plugin_manager, test_posts):
         """Тест управления кэшем"""
         post_processor = plugin_manager.get_plugin("post_processor")
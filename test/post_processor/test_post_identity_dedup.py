@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Юнит-тесты целочисленной дедупликации по (owner_id, id)
+"""
+
+import unittest
+
+from helpers import make_random_posts
+from src.plugins.post_processor.deduplication.deduplication_plugin import DeduplicationPlugin
+from src.plugins.post_processor.deduplication.post_identity import (
+    MISSING_IDENTITY,
+    first_occurrence_mask,
+    identity_keys,
+    pack_identity,
+)
+
+
+class TestPostIdentityDedup(unittest.TestCase):
+    """Тесты post_identity и DeduplicationPlugin.remove_duplicates_by_post_id"""
+
+    def test_packing_is_injective_for_signed_owners(self):
+        """Пары с отрицательным owner_id упаковываются без коллизий"""
+        pairs = [(-1, 0), (-1, 2**32 - 1), (0, 1), (1, 0), (-(2**31) + 1, 5), (2**31 - 1, 5)]
+        packed = [pack_identity(owner_id, post_id) for owner_id, post_id in pairs]
+
+        self.assertEqual(len(set(packed)), len(pairs))
+        self.assertIsNone(pack_identity(1, 2**32))
+        self.assertIsNone(pack_identity(1, -1))
+
+    def test_matches_link_dedup_and_keeps_order(self):
+        """Результат совпадает с дедупликацией по ссылке, порядок первых вхождений сохраняется"""
+        posts = make_random_posts(5000)
+        plugin = DeduplicationPlugin()
+
+        self.assertEqual(plugin.remove_duplicates_by_post_id(posts), plugin.remove_duplicates_by_link_hash(posts))
+        self.assertEqual(plugin.remove_duplicates(posts, method="post_id"), plugin.remove_duplicates_by_link_hash(posts))
+
+    def test_database_rows_and_missing_identity(self):
+        """Строки БД берут идентичность из vk_id; посты без идентичности не отбрасываются"""
+        posts = [
+            {"id": 1, "vk_id": "-5_7"},
+            {"id": 2, "vk_id": "-5_7"},
+            {"text": "без идентичности"},
+            {"text": "без идентичности"},
+            {"id": 3, "vk_id": "-5_8"},
+        ]
+        keys = identity_keys(posts)
+
+        self.assertEqual(keys[0], pack_identity(-5, 7))
+        self.assertEqual(keys[2], MISSING_IDENTITY)
+        self.assertEqual(first_occurrence_mask(keys).tolist(), [True, False, True, True, True])
+        self.assertEqual(first_occurrence_mask(keys, keep_missing=False).tolist(), [True, False, False, False, True])
+
+    def test_statistics_match_separate_passes(self):
+        """Статистика за один проход совпадает с отдельными прогонами методов"""
+        posts = make_random_posts(2000, seed=1) + [{"text": "без ссылки"}]
+        plugin = DeduplicationPlugin()
+        stats = plugin.get_duplicate_statistics(posts)
+
+        total = len(posts)
+        for method in ("link_hash", "post_id", "text", "content_hash"):
+            unique = len(getattr(plugin, f"remove_duplicates_by_{method}")(posts))
+            self.assertEqual(stats[f"unique_by_{method}"], unique, method)
+            self.assertEqual(stats[f"duplicates_by_{method}"], total - unique, method)
+        self.assertEqual(plugin.get_duplicate_statistics([])["total"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
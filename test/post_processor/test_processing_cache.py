@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Юнит-тесты кэша обработки ProcessingCache
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from src.plugins.database.database_plugin import DatabasePlugin
+from src.plugins.post_processor.filter.filter_plugin import FilterPlugin
+from src.plugins.post_processor.post_processor_plugin import PostProcessorPlugin
+from src.plugins.post_processor.processing_cache import ProcessingCache, content_digest, keyword_namespace
+from src.plugins.post_processor.text_processing.text_processing_plugin import TextProcessingPlugin
+
+
+class TestProcessingCache(unittest.TestCase):
+    """Тесты ProcessingCache"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.temp_dir.name, "cache.db")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_keys_are_stable_across_processes(self):
+        """Дайджесты не зависят от процесса (в отличие от hash())"""
+        code = (
+            "from src.plugins.post_processor.processing_cache import content_digest, keyword_namespace;"
+            "print(content_digest('Текст поста 🔥'), keyword_namespace('match', ['Б', 'а'], True))"
+        )
+        output = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True, env={**os.environ, "PYTHONHASHSEED": "123"}
+        ).stdout.split()
+
+        self.assertEqual(output, [content_digest("Текст поста 🔥"), keyword_namespace("match", ["а", "б"], True)])
+
+    def test_lru_eviction_by_entries_and_memory(self):
+        """Вытесняются давно не использованные записи при превышении лимитов"""
+        cache = ProcessingCache(max_entries=3)
+        for index in range(3):
+            cache.set("clean:x", str(index), f"текст {index}")
+        cache.get("clean:x", "0")
+        cache.set("match:y", "3", False)
+
+        self.assertIsNone(cache.get("clean:x", "1"))
+        self.assertEqual(cache.get("clean:x", "0"), "текст 0")
+        self.assertIs(cache.get("match:y", "3"), False)
+        self.assertEqual((cache.count("clean"), cache.count("match")), (2, 1))
+
+        small = ProcessingCache(max_memory_mb=0.01)
+        for index in range(200):
+            small.set("clean:x", str(index), "x" * 100)
+        self.assertLessEqual(small.memory_bytes, small.max_memory_bytes)
+        self.assertGreater(small.stats["evictions"], 0)
+
+    def test_disk_backing_survives_restart(self):
+        """Записи из файла кэша доступны новому экземпляру"""
+        cache = ProcessingCache(db_path=self.db_path)
+        cache.set("clean:x", content_digest("текст"), "очищенный")
+        cache.set("match:y", content_digest("текст"), True)
+        cache.close()
+
+        reopened = ProcessingCache(db_path=self.db_path)
+        self.assertEqual(reopened.get("clean:x", content_digest("текст")), "очищенный")
+        self.assertIs(reopened.get("match:y", content_digest("текст")), True)
+        self.assertEqual(reopened.stats["disk_hits"], 2)
+
+        reopened.clear()
+        self.assertIsNone(reopened.get("clean:x", content_digest("текст")))
+        reopened.close()
+
+    def test_refiltering_stored_task_is_cache_lookup(self):
+        """Повторная обработка задачи из БД с теми же ключами не очищает и не проверяет тексты заново"""
+        database = DatabasePlugin()
+        database.db_path = os.path.join(self.temp_dir.name, "tasks.db")
+        database.initialize()
+        task_id = database.create_task("Задача", ["технологии"], exact_match=False)
+        database.save_posts(
+            task_id,
+            [
+                {"owner_id": -1, "id": index, "date": 1722038400, "text": text}
+                for index, text in enumerate(
+                    ["Новые технологии #it", "Погода на выходные", "Технологии будущего 🔥", "Спорт"]
+                )
+            ],
+        )
+
+        def make_processor():
+            processor = PostProcessorPlugin()
+            processor.config["cache_path"] = self.db_path
+            processor.config["processing_order"] = ["deduplication", "text_processing", "filtering"]
+            processor.set_database_plugin(database)
+            processor.set_filter_plugin(FilterPlugin())
+            processor.set_text_processing_plugin(TextProcessingPlugin())
+            return processor
+
+        processor = make_processor()
+        first = processor.process_posts_from_database(task_id, ["технологии"], exact_match=False)
+        processor.shutdown()
+
+        # Новый экземпляр (как после перезапуска) с тем же файлом кэша
+        processor = make_processor()
+        calls = []
+        clean = processor.text_processing_plugin.clean_text_completely
+        processor.text_processing_plugin.clean_text_completely = lambda text: calls.append(text) or clean(text)
+        second = processor.process_posts_from_database(task_id, ["технологии"], exact_match=False)
+        processor.shutdown()
+        database.shutdown()
+
+        self.assertEqual(first["final_count"], 2)
+        self.assertEqual([post["link"] for post in second["final_posts"]], [post["link"] for post in first["final_posts"]])
+        self.assertEqual(calls, [])
+        counters = second["stage_counters"]
+        self.assertEqual(counters["text_processing"]["cache_hits"], 4)
+        self.assertEqual(counters["filtering"]["cache_hits"], 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Юнит-тесты шардированной дедупликации remove_duplicates_parallel
+"""
+
+import asyncio
+import unittest
+
+import helpers
+from src.plugins.post_processor.deduplication.deduplication_plugin import DeduplicationPlugin
+from src.plugins.post_processor.deduplication.sharded_dedup import combine_shard, dedup_shard, merge_shards, shard_chunk
+
+
+def make_posts(count, seed=0):
+    # Четыре частых текста и 500 редких в пропорции 4:1
+    texts = ["Новость", " новость", "НОВОСТЬ дня", ""] * 500 + [f"текст {i}" for i in range(1, 501)]
+    posts = helpers.make_random_posts(count, seed, texts, max_owner=40, max_id=40, max_date=1)
+    return posts + [{"text": "без ссылки и идентичности"}, {"text": "без ссылки и идентичности"}]
+
+
+class TestShardedDedup(unittest.TestCase):
+    """Тесты sharded_dedup и DeduplicationPlugin.remove_duplicates_parallel"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.plugin = DeduplicationPlugin()
+        cls.plugin.config["parallel_min_posts"] = 1
+        cls.plugin.config["parallel_shards"] = 3
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.plugin.shutdown()
+
+    def test_matches_sequential_for_every_method(self):
+        """Для каждого точного метода результат совпадает с remove_duplicates()"""
+        posts = make_posts(3000)
+        for method in ("link_hash", "post_id", "text", "content_hash"):
+            expected = self.plugin.remove_duplicates(posts, method)
+            result = asyncio.run(self.plugin.remove_duplicates_parallel(posts, method, max_workers=2))
+
+            self.assertEqual(result, expected, method)
+            stats = self.plugin.last_parallel_stats
+            self.assertEqual(len(stats["shard_sizes"]), 3)
+            self.assertEqual(sum(stats["shard_unique"]) + (method == "post_id") * 2, len(expected), method)
+
+    def test_shards_hold_whole_key_groups(self):
+        """Одинаковые ключи из разных чанков попадают в один шард, и слияние не требует второго прохода"""
+        records = ["a", "b", "a", None, "c", "b", "a"]
+        chunks = [shard_chunk("link_hash", records[:4], 0, 2), shard_chunk("link_hash", records[4:], 4, 2)]
+        shards = [combine_shard([chunk[shard] for chunk in chunks]) for shard in range(2)]
+
+        unique = merge_shards([dedup_shard(indexes, keys) for indexes, keys in shards])
+        self.assertEqual(unique.tolist(), [0, 1, 4])
+
+    def test_small_lists_and_near_duplicates_run_synchronously(self):
+        """Небольшие списки и near_duplicate не уходят в пул процессов"""
+        plugin = DeduplicationPlugin()
+        posts = make_posts(10)
+
+        result = asyncio.run(plugin.remove_duplicates_parallel(posts, "link_hash"))
+        self.assertEqual(result, plugin.remove_duplicates(posts, "link_hash"))
+        self.assertIsNone(plugin.process_pool)
+
+
+if __name__ == "__main__":
+    unittest.main()
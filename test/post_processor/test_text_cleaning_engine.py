@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Юнит-тесты движка очистки текста TextCleaningEngine
+"""
+
+import itertools
+import re
+import unittest
+
+import emoji
+
+from src.plugins.post_processor.text_processing.cleaning_engine import (
+    ENGINE_CONFIG_KEYS,
+    TextCleaningEngine,
+    get_emoji_table,
+)
+from src.plugins.post_processor.text_processing.text_processing_plugin import TextProcessingPlugin
+
+
+def sequential_clean(text, config):
+    """Прежняя последовательная очистка - эталон для сравнения"""
+    if not text:
+        return ""
+    if config["remove_emojis"]:
+        text = re.sub(r":[a-zA-Z_]+:", "", emoji.demojize(text))
+    if config["remove_hashtags"]:
+        text = re.sub(r"#\w+", "", text)
+    if config["remove_mentions"]:
+        text = re.sub(r"@\w+", "", text)
+    if config["remove_urls"]:
+        text = re.sub(r"https?://[^\s]+", "", text)
+        text = re.sub(r"www\.[^\s]+", "", text)
+    if config["normalize_whitespace"]:
+        text = re.sub(r"\s+", " ", text).strip()
+    return text
+
+
+SAMPLES = [
+    "",
+    "Обычный пост без эмодзи, но с числами 2025 и датой 01.02",
+    "Праздник 🎉🎉 во дворе! #праздник @club1 подробнее https://vk.com/wall-1_2",
+    "Семья 👨‍👩‍👧 и флаг 🇷🇺, кнопка 1️⃣ и сердце ❤️",
+    "Тон кожи 👍🏽 и отдельный 🏽, ZWJ без пары ‍ и селектор ︎ в тексте",
+    "Время 10:30: встреча :smile: и a:b🔥c",
+    "#:fire:tag и @#смешанный @user#tag www.http://x.ru http#x://y",
+    "Текст\n\n\tс   пробелами\u00a0и\u2003юникодом  ",
+    "«Цитата» — тире… © ® ™ № 5",
+]
+
+
+class TestTextCleaningEngine(unittest.TestCase):
+    """Тесты TextCleaningEngine"""
+
+    def test_matches_sequential_cleaning_for_all_configs(self):
+        """Для любой конфигурации результат совпадает с прежней очисткой"""
+        for flags in itertools.product([True, False], repeat=len(ENGINE_CONFIG_KEYS)):
+            config = dict(zip(ENGINE_CONFIG_KEYS, flags))
+            engine = TextCleaningEngine(**config)
+            expected = [sequential_clean(text, config) for text in SAMPLES]
+
+            self.assertEqual([engine.clean(text) for text in SAMPLES], expected, config)
+            self.assertEqual(engine.clean_many(SAMPLES), expected, config)
+
+    def test_emoji_table_matches_demojize(self):
+        """Таблица эмодзи даёт тот же результат, что demojize"""
+        table = get_emoji_table()
+        for text in SAMPLES:
+            self.assertEqual(table.demojize_text(text), emoji.demojize(text))
+
+    def test_clean_many_handles_separator_and_empty_values(self):
+        """Тексты с разделителем пачки и пустые значения очищаются как по одному"""
+        engine = TextCleaningEngine()
+        texts = ["пост\x1eс разделителем #тег", None, "", "🔥 обычный"]
+
+        self.assertEqual(engine.clean_many(texts), [engine.clean(text) for text in texts])
+
+    def test_plugin_rebuilds_engine_on_config_change(self):
+        """TextProcessingPlugin пересобирает движок при изменении конфигурации"""
+        plugin = TextProcessingPlugin()
+        text = "Новости #город https://vk.com/news"
+
+        self.assertEqual(plugin.clean_text_completely(text), "Новости https://vk.com/news")
+        plugin.config["remove_urls"] = True
+        self.assertEqual(plugin.clean_many([text]), ["Новости"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Юнит-тесты для TokenLimiter
+Проверяют token bucket с отдельной полосой на каждый токен
+"""
+
+import threading
+import unittest
+
+from src.plugins.token_manager.token_limiter import TokenLimiter, get_token_limiter
+
+
+class TestTokenLimiter(unittest.TestCase):
+    """Тесты для TokenLimiter"""
+
+    def test_bucket_spaces_requests_after_burst(self):
+        """После всплеска запросы одного токена идут с интервалом 1/rate"""
+        limiter = TokenLimiter(rate_per_second=10, burst=2)
+        waits = [limiter.reserve("token_a") for _ in range(5)]
+
+        self.assertEqual(waits[:2], [0.0, 0.0])
+        self.assertAlmostEqual(waits[2], 0.1, delta=0.02)
+        self.assertAlmostEqual(waits[4], 0.3, delta=0.02)
+
+    def test_token_lanes_are_independent(self):
+        """Нагрузка на один токен не задерживает другой"""
+        limiter = TokenLimiter(rate_per_second=3, burst=1)
+        for _ in range(10):
+            limiter.reserve("token_a")
+
+        self.assertEqual(limiter.reserve("token_b"), 0.0)
+        self.assertEqual(limiter.get_statistics()["aggregate_rate"], 6)
+
+    def test_blocked_token_waits_for_cooldown(self):
+        """Заблокированный токен ждёт окончания cooldown"""
+        limiter = TokenLimiter(["token_a"], cooldown_seconds=30)
+        limiter.block_token("token_a")
+
+        self.assertGreater(limiter.reserve("token_a"), 29)
+        self.assertIsNone(limiter.get_token())
+
+    def test_shared_limiter_is_process_wide(self):
+        """Все потоки получают один и тот же лимитер"""
+        limiters = []
+        threads = [threading.Thread(target=lambda: limiters.append(get_token_limiter())) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertTrue(all(limiter is limiters[0] for limiter in limiters))
+
+
+if __name__ == "__main__":
+    unittest.main()
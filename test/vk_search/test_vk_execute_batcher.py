@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Юнит-тесты для VKExecuteBatcher
+Проверяют упаковку вызовов в execute и раздачу результатов
+"""
+
+import asyncio
+import json
+import unittest
+
+from src.plugins.vk_search.vk_execute_batcher import VKExecuteBatcher
+
+
+class FakeResponse:
+    """Ответ aiohttp с заранее заданным JSON"""
+
+    def __init__(self, payload, status=200):
+        self.payload = payload
+        self.status = status
+
+    async def json(self):
+        return self.payload
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+
+class FakeSession:
+    """Сессия, которая отвечает на execute, выполняя вызовы локально"""
+
+    def __init__(self):
+        self.posts = []
+
+    def post(self, url, data=None):
+        self.posts.append(data)
+        body = data["code"][len("return ["):-len("];")]
+        calls = body.split("API.newsfeed.search(")[1:]
+        results, errors = [], []
+        for call in calls:
+            params = json.loads(call.rstrip(",")[:-1])
+            if params["q"] == "bad":
+                results.append(False)
+                errors.append({"method": "newsfeed.search", "error_code": 100, "error_msg": "bad query"})
+            else:
+                results.append({"items": [{"id": 1, "owner_id": 1, "text": params["q"]}], "count": 1})
+        return FakeResponse({"response": results, "execute_errors": errors})
+
+
+class TestVKExecuteBatcher(unittest.TestCase):
+    """Тесты для VKExecuteBatcher"""
+
+    def test_calls_are_packed_into_execute(self):
+        """30 вызовов одного токена укладываются в два запроса execute"""
+        batcher = VKExecuteBatcher(flush_interval=0.01)
+        session = FakeSession()
+
+        async def run():
+            calls = [
+                batcher.call(session, {"q": f"query {i}", "count": 200, "access_token": "t", "v": "5.131"})
+                for i in range(30)
+            ]
+            return await asyncio.gather(*calls)
+
+        results = asyncio.run(run())
+
+        self.assertEqual(len(session.posts), 2)
+        self.assertEqual(results[7]["response"]["items"][0]["text"], "query 7")
+        self.assertNotIn("access_token", session.posts[0]["code"])
+        self.assertEqual(batcher.get_statistics()["packed_calls"], 30)
+
+    def test_execute_errors_are_routed_to_callers(self):
+        """Ошибка вложенного вызова возвращается только его корутине"""
+        batcher = VKExecuteBatcher(flush_interval=0.01)
+        session = FakeSession()
+
+        async def run():
+            return await asyncio.gather(
+                batcher.call(session, {"q": "good", "access_token": "t", "v": "5.131"}),
+                batcher.call(session, {"q": "bad", "access_token": "t", "v": "5.131"}),
+                batcher.call(session, {"q": "also good", "access_token": "t", "v": "5.131"}),
+            )
+
+        good, bad, also_good = asyncio.run(run())
+
+        self.assertIn("response", good)
+        self.assertEqual(bad["error"]["error_code"], 100)
+        self.assertEqual(also_good["response"]["items"][0]["text"], "also good")
+
+    def test_top_level_error_applies_to_all_calls(self):
+        """Ошибка самого execute раздаётся всем вызовам пачки"""
+        error = {"error_code": 6, "error_msg": "Too many requests per second"}
+        results = VKExecuteBatcher.unpack({"error": error}, 3)
+        self.assertEqual(results, [{"error": error}] * 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
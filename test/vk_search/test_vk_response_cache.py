@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Юнит-тесты для VKResponseCache
+Проверяют ключи без токена, TTL, вытеснение по размеру и метрики
+"""
+
+import os
+import tempfile
+import time
+import unittest
+
+from src.plugins.vk_search.vk_response_cache import VKResponseCache, build_cache_key
+
+
+class TestVKResponseCache(unittest.TestCase):
+    """Тесты для VKResponseCache"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache = VKResponseCache(os.path.join(self.temp_dir.name, "cache.db"), max_size_mb=0.01)
+        self.cache.open()
+
+    def tearDown(self):
+        self.cache.close()
+        self.temp_dir.cleanup()
+
+    def test_key_ignores_token_and_minus_word_order(self):
+        """Ключ не зависит от токена, регистра, пробелов и порядка минус-слов"""
+        base = {"q": '"Новости  Москвы" -спорт -погода', "count": 200, "start_time": 1, "end_time": 2}
+        other = {**base, "q": '"новости москвы" -погода -спорт', "access_token": "another_token"}
+
+        self.assertEqual(build_cache_key({**base, "access_token": "token_a"}), build_cache_key(other))
+        self.assertNotEqual(build_cache_key(base), build_cache_key({**base, "start_from": "cursor"}))
+        self.assertNotEqual(build_cache_key(base), build_cache_key({**base, "q": '"новости москвы" -спорт'}))
+
+    def test_persists_between_instances(self):
+        """Запись переживает переоткрытие файла"""
+        page = {"items": [{"id": 1, "owner_id": 1, "text": "текст"}], "next_from": None, "total_count": 1}
+        self.cache.set("key", page, ttl=60)
+        self.cache.close()
+
+        reopened = VKResponseCache(self.cache.db_path)
+        reopened.open()
+        self.assertEqual(reopened.get("key"), page)
+        self.assertEqual(reopened.get_statistics()["hits"], 1)
+        reopened.close()
+
+    def test_expired_entry_is_a_miss(self):
+        """Истёкшая запись считается промахом и удаляется"""
+        self.cache.set("key", {"items": []}, ttl=0.05)
+        time.sleep(0.1)
+        self.assertIsNone(self.cache.get("key"))
+
+        stats = self.cache.get_statistics()
+        self.assertEqual(stats["expired"], 1)
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["entries"], 0)
+
+    def test_size_based_eviction_drops_least_recently_used(self):
+        """При превышении лимита вытесняются давно не используемые записи"""
+        page = {"items": [{"text": "x" * 2000}]}
+        for index in range(3):
+            self.cache.set(f"key{index}", page, ttl=60)
+            time.sleep(0.01)
+        self.cache.get("key0")
+        for index in range(3, 8):
+            self.cache.set(f"key{index}", page, ttl=60)
+
+        stats = self.cache.get_statistics()
+        self.assertLessEqual(stats["size_bytes"], stats["max_size_bytes"])
+        self.assertGreater(stats["evictions"], 0)
+        self.assertIsNone(self.cache.get("key1"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Юнит-тесты для VKRetryPolicy
+Проверяют стратегии по кодам ошибок, бюджет повторов и карантин токенов
+"""
+
+import asyncio
+import time
+import unittest
+
+import aiohttp
+
+from src.plugins.token_manager.token_limiter import TokenLimiter
+from src.plugins.vk_search.vk_retry_policy import FAIL, QUARANTINE, RETRY, VKAPIError, VKRetryPolicy
+from src.plugins.vk_search.vk_search_plugin import VKSearchPlugin
+
+
+class TestVKRetryPolicy(unittest.TestCase):
+    """Тесты для VKRetryPolicy"""
+
+    def test_strategies_by_error_code(self):
+        """Каждый код ошибки получает свою стратегию"""
+        policy = VKRetryPolicy(max_attempts=5)
+
+        self.assertEqual(policy.decide(VKAPIError(6), 0)[0], RETRY)
+        self.assertEqual(policy.decide(VKAPIError(9), 0)[0], RETRY)
+        self.assertEqual(policy.decide(VKAPIError(5), 0), (QUARANTINE, 0.0))
+        self.assertEqual(policy.decide(VKAPIError(29), 0), (QUARANTINE, 0.0))
+        self.assertEqual(policy.decide(VKAPIError(http_status=502), 0)[0], RETRY)
+        self.assertEqual(policy.decide(aiohttp.ClientConnectionError(), 0)[0], RETRY)
+        self.assertEqual(policy.decide(VKAPIError(100), 0), (FAIL, 0.0))
+        self.assertEqual(policy.decide(VKAPIError(6), 4), (FAIL, 0.0))
+
+    def test_backoff_grows_with_jitter_and_cap(self):
+        """Задержка растёт экспоненциально, содержит jitter и ограничена сверху"""
+        policy = VKRetryPolicy(max_delay=4)
+
+        self.assertTrue(0.5 <= policy.backoff(1.0, 0) <= 1.0)
+        self.assertTrue(2.0 <= policy.backoff(1.0, 2) <= 4.0)
+        self.assertTrue(2.0 <= policy.backoff(1.0, 10) <= 4.0)
+        self.assertGreater(len({policy.backoff(1.0, 3) for _ in range(20)}), 1)
+
+    def test_global_retry_budget(self):
+        """После исчерпания бюджета повторы прекращаются"""
+        policy = VKRetryPolicy(max_attempts=10, retry_budget=2)
+        decisions = [policy.decide(VKAPIError(10), 0)[0] for _ in range(3)]
+
+        self.assertEqual(decisions, [RETRY, RETRY, FAIL])
+        self.assertEqual(policy.get_statistics()["budget_exhausted"], 1)
+        policy.reset_budget()
+        self.assertEqual(policy.decide(VKAPIError(10), 0)[0], RETRY)
+
+    def test_quarantined_token_work_moves_to_healthy_token(self):
+        """Ошибка 29 блокирует токен, запрос повторяется другим токеном"""
+        plugin = VKSearchPlugin()
+        plugin.config["access_token"] = "test_token"
+        plugin.config["enable_caching"] = False
+        plugin.rate_limiter = TokenLimiter(["token_a", "token_b"])
+        used_tokens = []
+
+        async def fake_request(session, params, query, attempt):
+            used_tokens.append(params["access_token"])
+            if params["access_token"] == "token_a":
+                raise VKAPIError(29, "Rate limit reached")
+            return {"items": [{"id": 1, "owner_id": 1}], "next_from": None, "total_count": 1}
+
+        plugin._make_vk_request = fake_request
+        page = asyncio.run(plugin._fetch_vk_page(None, {"q": "тест", "access_token": "token_a"}, "тест"))
+
+        self.assertEqual(used_tokens, ["token_a", "token_b"])
+        self.assertEqual(len(page["items"]), 1)
+        self.assertTrue(plugin.rate_limiter.is_blocked("token_a"))
+        self.assertEqual(plugin.get_statistics()["retries"]["quarantined"], 1)
+
+    def test_invalid_single_token_fails_search_without_waiting_quarantine(self):
+        """Ошибка 5 на единственном токене: задания отбрасываются, а не ждут конца карантина"""
+        plugin = VKSearchPlugin()
+        plugin.config["access_token"] = "test_token"
+        plugin.config["enable_caching"] = False
+        plugin.config["token_quarantine_seconds"] = 600
+        plugin.rate_limiter = TokenLimiter(["bad_token"])
+        requests = []
+
+        async def fake_session():
+            return None
+
+        async def fake_request(session, params, query, attempt):
+            requests.append(query)
+            await asyncio.sleep(0.01)
+            raise VKAPIError(5, "User authorization failed: invalid access_token")
+
+        plugin.session_manager.get_session = fake_session
+        plugin._make_vk_request = fake_request
+        keywords = [f"ключ{i}" for i in range(10)]
+        watermarks = {}
+
+        started = time.monotonic()
+        posts = asyncio.run(
+            asyncio.wait_for(
+                plugin.mass_search_with_tokens(
+                    queries=keywords, tokens=["bad_token"], batch_size=4, watermarks=watermarks
+                ),
+                timeout=5,
+            )
+        )
+
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertEqual(posts, [])
+        self.assertEqual(watermarks, {})
+        self.assertLessEqual(len(requests), 4)
+        self.assertTrue(plugin.rate_limiter.is_blocked("bad_token"))
+        self.assertIsNone(plugin.rate_limiter.get_token())
+        self.assertEqual(plugin.rate_limiter.reserve("bad_token"), 0.0)
+        # Запросы, ушедшие до отзыва токена, дают пустые страницы, остальные задания отброшены
+        self.assertEqual(plugin.scheduler_stats["jobs_failed"], len(keywords) - len(requests))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -89,6 +89,132 @@ class TestVKSearchPlugin(unittest.TestCase):
         with self.assertRaises(ValueError):
             self.plugin._parse_datetime("invalid_date")
 
+    def test_cursor_pagination_stops_on_short_page(self):
+        """Курсорная пагинация: продолжение только для ключей с полными страницами"""
+        def make_page(size, next_from=None, total=0):
+            items = [{"id": i, "owner_id": 1, "text": "x"} for i in range(size)]
+            return {"items": items, "next_from": next_from, "total_count": total}
+
+        pages = {
+            ("busy", None): make_page(200, "c1", 450),
+            ("busy", "c1"): make_page(200, "c2", 450),
+            ("busy", "c2"): make_page(50, None, 450),
+            ("rare", None): make_page(3, None, 3),
+        }
+
+        async def fake_fetch_page(session, params, query, retry_count=3):
+            return pages[(query, params.get("start_from"))]
+
+        self.plugin._fetch_vk_page = fake_fetch_page
+        batch = [("busy", "test_token"), ("rare", "test_token")]
+        posts = asyncio.run(self.plugin._process_search_batch(None, batch, True, None, None, None))
+
+        self.assertEqual(len(posts), 453)
+        pagination = self.plugin.get_statistics()["pagination"]
+        self.assertEqual(pagination["pages_per_keyword"], {"busy": 3, "rare": 1})
+        self.assertEqual(pagination["total_pages"], 4)
+        self.assertEqual(pagination["keywords_with_more_pages"], 1)
+
+    def test_saturated_window_bisection(self):
+        """Бисекция насыщенного окна даёт полное покрытие без дублей"""
+        all_posts = [{"id": i, "owner_id": 1, "date": 1000 + i * 10, "text": "x"} for i in range(2500)]
+
+        async def fake_fetch_page(session, params, query, retry_count=3):
+            window = [p for p in all_posts if params["start_time"] <= p["date"] <= params["end_time"]]
+            visible = window[:1000]  # VK не отдаёт больше ~1000 результатов на запрос
+            offset = int(params.get("start_from") or 0)
+            items = visible[offset:offset + params["count"]]
+            next_offset = offset + len(items)
+            next_from = str(next_offset) if next_offset < len(visible) else None
+            return {"items": items, "next_from": next_from, "total_count": len(window)}
+
+        self.plugin._fetch_vk_page = fake_fetch_page
+        self.plugin.config["min_window_seconds"] = 10
+        batch = [("busy", "test_token")]
+        posts = asyncio.run(
+            self.plugin._process_search_batch(None, batch, True, 1000, 1000 + 2500 * 10, None, split_windows=True)
+        )
+
+        self.assertEqual(len(posts), 2500)
+        self.assertEqual(len({(p["owner_id"], p["id"]) for p in posts}), 2500)
+        splitting = self.plugin.get_statistics()["window_splitting"]
+        self.assertGreater(splitting["splits_per_keyword"]["busy"], 0)
+        self.assertEqual(splitting["unresolved_windows"], 0)
+
+    def test_iter_search_streams_unique_batches(self):
+        """Потоковый поиск отдаёт страницы по мере готовности без дублей между ключами"""
+        pages = {
+            "alpha": [{"id": i, "owner_id": 1, "text": "alpha news"} for i in range(3)],
+            "beta": [{"id": i, "owner_id": 1, "text": "alpha beta"} for i in range(2, 5)],
+        }
+
+        async def fake_fetch_page(session, params, query, retry_count=3):
+            return {"items": pages[query], "next_from": None, "total_count": len(pages[query])}
+
+        async def consume():
+            batches = []
+            async for batch in self.plugin.iter_search(
+                keyword_token_pairs=[("alpha", "test_token"), ("beta", "test_token")],
+                exact_match=False,
+                max_pending_pages=1,
+            ):
+                batches.append(batch)
+            return batches
+
+        self.plugin._fetch_vk_page = fake_fetch_page
+        batches = asyncio.run(consume())
+
+        self.assertEqual(len(batches), 2)
+        ids = [post["id"] for batch in batches for post in batch]
+        self.assertEqual(sorted(ids), [0, 1, 2, 3, 4])
+        posts = {post["id"]: post for batch in batches for post in batch}
+        self.assertEqual(posts[3]["keywords_matched"], ["alpha", "beta"])
+        self.assertEqual(posts[3]["search_query"], "beta")
+
+    def test_strict_local_filter_modes(self):
+        """Строгая фильтрация: фраза целиком при exact_match, иначе все слова в любом порядке"""
+        posts = [
+            {"id": 1, "text": "Новости  🔥 Москвы: ремонт дорог"},
+            {"id": 2, "text": "Дорог ремонт в Москве"},
+            {"id": 3, "text": "🔥🔥"},
+        ]
+        keywords = ["ремонт дорог", "МОСКВ"]
+
+        exact = self.plugin._strict_local_filter([dict(post) for post in posts], keywords, True)
+        self.assertEqual([post["keywords_matched"] for post in exact], [keywords, ["МОСКВ"]])
+
+        loose = self.plugin._strict_local_filter([dict(post) for post in posts], keywords, False)
+        self.assertEqual([post["keywords_matched"] for post in loose], [keywords, keywords])
+
+    def test_iter_search_incremental_watermarks(self):
+        """Ключ с отметкой ищется от её даты, новые отметки сдвигаются только без ошибок"""
+        requested_start = {}
+
+        async def fake_fetch_page(session, params, query, retry_count=3):
+            requested_start[query] = params.get("start_time")
+            if query == "broken":
+                return {"items": [], "next_from": None, "total_count": 0, "failed": True}
+            items = [{"id": i, "owner_id": 1, "date": 1000 + i, "text": query} for i in range(3)]
+            return {"items": items, "next_from": None, "total_count": 3}
+
+        async def consume(watermarks):
+            async for _ in self.plugin.iter_search(
+                keyword_token_pairs=[("fresh", "test_token"), ("broken", "test_token")],
+                start_date=500,
+                end_date=5000,
+                exact_match=False,
+                since={"fresh": {"date": 900, "owner_id": 1, "id": 7}},
+                watermarks=watermarks,
+            ):
+                pass
+
+        self.plugin._fetch_vk_page = fake_fetch_page
+        watermarks = {}
+        asyncio.run(consume(watermarks))
+
+        self.assertEqual(requested_start, {"fresh": 900, "broken": 500})
+        self.assertEqual(watermarks, {"fresh": {"date": 1002, "owner_id": 1, "id": 2}})
+
     def test_real_mass_search_with_tokens(self):
         """Реальный массовый поиск по VK API с несколькими ключевыми словами"""
         # 1. Получаем токен
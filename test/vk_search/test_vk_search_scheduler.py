@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Юнит-тесты для VKSearchScheduler
+Проверяют работу без барьеров, полосы токенов и статистику воркеров
+"""
+
+import asyncio
+import unittest
+
+from src.plugins.vk_search.vk_search_scheduler import VKSearchScheduler
+
+
+class TestVKSearchScheduler(unittest.TestCase):
+    """Тесты для VKSearchScheduler"""
+
+    def test_slow_job_does_not_stall_other_workers(self):
+        """Медленное задание занимает один воркер, остальные разбирают очередь"""
+        done = []
+
+        async def handler(job, token):
+            await asyncio.sleep(0.3 if job["keyword"] == "slow" else 0.01)
+            done.append(job["keyword"])
+            # Быстрые ключи порождают продолжение (следующую страницу)
+            if job["keyword"] != "slow" and job["page"] < 3:
+                return [{**job, "page": job["page"] + 1}]
+            return []
+
+        jobs = [{"keyword": "slow", "page": 1}] + [{"keyword": f"fast{i}", "page": 1} for i in range(3)]
+        scheduler = VKSearchScheduler(handler, ["token_a"], workers=2)
+        asyncio.run(scheduler.run(jobs))
+
+        self.assertEqual(done[-1], "slow")
+        self.assertEqual(len(done), 10)
+
+        stats = scheduler.get_statistics()
+        self.assertEqual(stats["jobs_done"], 10)
+        self.assertEqual(len(stats["worker_stats"]), 2)
+        self.assertLess(stats["elapsed_seconds"], 0.5)
+        self.assertGreater(stats["average_utilization"], 0.5)
+
+    def test_workers_are_bound_to_token_lanes(self):
+        """Каждая полоса получает воркеров, ошибки заданий не останавливают очередь"""
+        tokens_used = set()
+
+        async def handler(job, token):
+            tokens_used.add(token)
+            await asyncio.sleep(0.01)
+            if job["keyword"] == "broken":
+                raise RuntimeError("сбой")
+            return []
+
+        jobs = [{"keyword": "broken"}] + [{"keyword": f"kw{i}"} for i in range(5)]
+        scheduler = VKSearchScheduler(handler, ["token_a", "token_b", "token_c"], workers=1)
+        asyncio.run(scheduler.run(jobs))
+
+        self.assertEqual(tokens_used, {"token_a", "token_b", "token_c"})
+        stats = scheduler.get_statistics()
+        self.assertEqual(stats["workers"], 3)
+        self.assertEqual(stats["jobs_failed"], 1)
+        self.assertEqual(stats["jobs_done"], 5)
+
+    def test_quarantined_lane_workers_switch_to_healthy_tokens(self):
+        """Воркеры карантинной полосы переходят на здоровые токены"""
+        tokens_used = []
+
+        async def handler(job, token):
+            tokens_used.append(token)
+            await asyncio.sleep(0.01)
+            return []
+
+        scheduler = VKSearchScheduler(
+            handler, ["token_a", "token_b"], workers=2, token_available=lambda token: token != "token_a"
+        )
+        asyncio.run(scheduler.run([{"keyword": f"kw{i}"} for i in range(4)]))
+
+        self.assertEqual(set(tokens_used), {"token_b"})
+        self.assertEqual(scheduler.get_statistics()["lane_switches"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
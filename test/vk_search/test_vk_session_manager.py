@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Юнит-тесты для VKSessionManager
+Проверяют переиспользование сессии и соединений между поисками
+"""
+
+import asyncio
+import unittest
+
+from aiohttp import web
+
+from src.plugins.vk_search.vk_session_manager import VKSessionManager
+
+
+class TestVKSessionManager(unittest.TestCase):
+    """Тесты для VKSessionManager"""
+
+    def setUp(self):
+        self.manager = VKSessionManager()
+
+    def tearDown(self):
+        self.manager.close()
+
+    async def _start_server(self):
+        async def handler(request):
+            return web.json_response({"response": {"items": []}})
+
+        app = web.Application()
+        app.router.add_get("/", handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        return runner, f"http://127.0.0.1:{port}/"
+
+    async def _request(self, url):
+        session = await self.manager.get_session()
+        async with session.get(url) as response:
+            return await response.json()
+
+    def test_connections_are_reused_between_searches(self):
+        """Несколько запусков через run() делят одну сессию и keep-alive соединение"""
+        runner, url = self.manager.run(self._start_server())
+        try:
+            for _ in range(3):
+                self.assertEqual(self.manager.run(self._request(url)), {"response": {"items": []}})
+
+            stats = self.manager.get_statistics()
+            self.assertEqual(stats["sessions_created"], 1)
+            self.assertEqual(stats["sessions_reused"], 2)
+            self.assertEqual(stats["connections_created"], 1)
+            self.assertEqual(stats["connections_reused"], 2)
+            self.assertEqual(stats["idle_connections"], 1)
+        finally:
+            self.manager.run(runner.cleanup())
+
+    def test_session_from_finished_loop_is_replaced(self):
+        """Сессия закрытого loop не переиспользуется, а close() не требует loop"""
+        first = asyncio.run(self.manager.get_session())
+        second = asyncio.run(self.manager.get_session())
+
+        self.assertIsNot(first, second)
+        self.assertEqual(self.manager.get_statistics()["sessions_created"], 2)
+        self.manager.close()
+        self.assertFalse(self.manager.get_statistics()["session_open"])
+
+
+if __name__ == "__main__":
+    unittest.main()